@@ -0,0 +1,90 @@
+"""
+Compare text (base64 Fernet token) and BLOB (raw token bytes) ciphertext storage.
+
+Builds two synthetic vaults of the same entries, then reports database size,
+compressed backup size, write/read throughput, and the time to migrate the
+text vault in place.
+
+    python benchmarks/ciphertext_format.py --entries 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from core.password import Encryption, token_to_raw  # noqa: E402
+from database.models import Database, PasswordManager  # noqa: E402
+
+
+def build_vault(path, passwords, encryption):
+    db = Database(str(path), profile='wal')
+    db.connect()
+    db.init_tables()
+    pm = PasswordManager(db)
+    started = time.perf_counter()
+    rows = ((f'site{i}.example', f'user{i}', encryption.encrypt(password), None)
+            for i, password in enumerate(passwords))
+    pm.add_passwords(rows)
+    db.checkpoint()
+    return db, pm, time.perf_counter() - started
+
+
+def read_all(db, encryption):
+    started = time.perf_counter()
+    for (encrypted,) in db.conn.execute('SELECT encrypted_password FROM passwords'):
+        encryption.decrypt(encrypted)
+    return time.perf_counter() - started
+
+
+def zipped_size(path, workdir):
+    zip_path = Path(workdir) / (path.name + '.zip')
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        zipf.write(path, path.name)
+    return zip_path.stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=50000)
+    args = parser.parse_args()
+
+    key = Encryption.generate_data_key()
+    passwords = [os.urandom(12).hex() for _ in range(args.entries)]
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, binary in (('text', False), ('blob', True)):
+            encryption = Encryption.from_key(key, binary=binary)
+            path = Path(workdir) / f'{name}.db'
+            db, pm, write_time = build_vault(path, passwords, encryption)
+            results[name] = {
+                'db_bytes': path.stat().st_size,
+                'zip_bytes': zipped_size(path, workdir),
+                'write_per_s': args.entries / write_time,
+                'read_per_s': args.entries / read_all(db, encryption),
+            }
+            if name == 'text':
+                started = time.perf_counter()
+                pm.convert_ciphertexts(token_to_raw)
+                db.conn.execute('VACUUM')
+                results['text']['migrate_s'] = time.perf_counter() - started
+                results['text']['migrated_db_bytes'] = path.stat().st_size
+            db.close()
+
+    text, blob = results['text'], results['blob']
+    print(f"{args.entries} entries")
+    print(f"{'':24}{'text':>14}{'blob':>14}{'change':>10}")
+    for label, field in (('database size (bytes)', 'db_bytes'), ('zipped size (bytes)', 'zip_bytes'),
+                         ('writes/s', 'write_per_s'), ('reads+decrypts/s', 'read_per_s')):
+        change = (blob[field] - text[field]) / text[field] * 100
+        print(f"{label:24}{text[field]:>14,.0f}{blob[field]:>14,.0f}{change:>+9.1f}%")
+    print(f"in-place migration: {text['migrate_s']:.2f}s, "
+          f"{text['db_bytes']:,} -> {text['migrated_db_bytes']:,} bytes")
+
+
+if __name__ == '__main__':
+    main()
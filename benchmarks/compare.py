@@ -0,0 +1,76 @@
+"""
+Compare two benchmark result files written by suite.py and flag regressions.
+
+    python benchmarks/compare.py baseline.json current.json --threshold 0.10
+
+Exits with status 1 when any benchmark's time per operation grew by more
+than the threshold.
+"""
+import argparse
+import json
+import sys
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def load_results(path) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD, out=sys.stdout) -> list:
+    """
+    Print old vs new time per operation for every benchmark present in both runs
+    Returns:
+        list: 'group/name' of each benchmark that regressed beyond threshold
+    """
+    regressions = []
+    print(f"{'benchmark':36}{'baseline':>14}{'current':>14}{'change':>10}", file=out)
+    for group, benchmarks in current['results'].items():
+        old_group = baseline['results'].get(group, {})
+        for name, stats in benchmarks.items():
+            label = f'{group}/{name}'
+            old = old_group.get(name)
+            if old is None:
+                print(f"{label:36}{'-':>14}{_format_time(stats['per_op']):>14}{'new':>10}", file=out)
+                continue
+            change = stats['per_op'] / old['per_op'] - 1
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressions.append(label)
+            elif change < -threshold:
+                flag = '  faster'
+            print(f"{label:36}{_format_time(old['per_op']):>14}{_format_time(stats['per_op']):>14}"
+                  f"{change:>+10.1%}{flag}", file=out)
+    missing = [f'{group}/{name}' for group, benchmarks in baseline['results'].items()
+               for name in benchmarks if name not in current['results'].get(group, {})]
+    if missing:
+        print(f"Not run this time: {', '.join(missing)}", file=out)
+    return regressions
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.3f} {unit}'
+    return f'{seconds / 1e-9:.1f} ns'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown counted as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    regressions = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Compare PasswordGen.generate called in a loop with PasswordGen.generate_batch.
+
+    python benchmarks/password_generation.py --count 100000 --length 16
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from core.generator import PasswordGen  # noqa: E402
+
+
+def measure(label, produce, count):
+    started = time.perf_counter()
+    passwords = produce()
+    elapsed = time.perf_counter() - started
+    assert len(passwords) == count
+    print(f"{label:22}{elapsed:8.3f}s {count / elapsed:>12,.0f} passwords/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--length', type=int, default=16)
+    args = parser.parse_args()
+
+    generator = PasswordGen()
+    print(f"{args.count} passwords of length {args.length}")
+    single = measure('generate() loop', lambda: [generator.generate(args.length) for _ in range(args.count)],
+                     args.count)
+    batch = measure('generate_batch()', lambda: list(generator.generate_batch(args.count, args.length)),
+                    args.count)
+    print(f"speedup: {single / batch:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
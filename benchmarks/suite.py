@@ -0,0 +1,422 @@
+"""
+Benchmark key derivation, encryption, vault reads and writes, backups and
+password generation over synthetic vaults of several sizes.
+
+    python benchmarks/suite.py --sizes 1k,100k --output results.json
+    python benchmarks/suite.py --sizes 1k --baseline results.json
+
+Vaults are built once per size under --work-dir (a temporary directory by
+default) and copied before each run, so benchmarks that write never change
+the template. Results are JSON; compare two files with compare.py.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from app import PasswordManagerApp  # noqa: E402
+from core.generator import PasswordGen  # noqa: E402
+from core.kdf import VaultHeader  # noqa: E402
+from core.password import Encryption  # noqa: E402
+
+from compare import DEFAULT_THRESHOLD, compare_results  # noqa: E402
+from synthetic_vault import (MASTER_PASSWORD, build_vault, format_size, parse_size,  # noqa: E402
+                             sample_accounts, working_directory)
+
+DEFAULT_SIZES = '1k,100k'
+# Operations per run for the per-call benchmarks
+SINGLE_OPS = 2000
+BULK_OPS = 20000
+LOOKUPS = 1000
+WRITES = 200
+
+GLOBAL_BENCHMARKS = {}
+VAULT_BENCHMARKS = {}
+
+
+def benchmark(registry, name):
+    """
+    Register a factory that does its setup and returns run(), which performs one
+    timed repetition and returns how many operations it did. A factory may
+    return (run, after) to reset state outside the timing after each repetition.
+    """
+    def register(factory):
+        registry[name] = factory
+        return factory
+    return register
+
+
+def timed(run, repeat: int, after=None) -> dict:
+    seconds = []
+    ops = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        ops = run()
+        seconds.append(time.perf_counter() - started)
+        if after:
+            after()
+    median = statistics.median(seconds)
+    return {
+        'runs': repeat,
+        'ops': ops,
+        'seconds': median,
+        'min_seconds': min(seconds),
+        'per_op': median / ops,
+        'ops_per_second': ops / median,
+    }
+
+
+class GlobalContext:
+    """State for benchmarks that do not depend on vault size"""
+
+    def __init__(self, seed: int):
+        rng = random.Random(seed)
+        self.encryption = Encryption.from_key(Encryption.generate_data_key(), binary=True)
+        self.plaintexts = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=16))
+                           for _ in range(BULK_OPS)]
+        self.tokens = [self.encryption.encrypt(password) for password in self.plaintexts]
+        self.generator = PasswordGen()
+
+
+class VaultContext:
+    """A working copy of a synthetic vault, run from inside its directory"""
+
+    def __init__(self, directory: Path, rows: int, seed: int):
+        self.directory = directory
+        self.rows = rows
+        self.accounts = sample_accounts(rows, LOOKUPS, seed)
+        self.app = None
+        self.backup = None
+        self.written = 0
+
+    def open(self) -> PasswordManagerApp:
+        if self.app:
+            self.app.close()
+        self.app = PasswordManagerApp(use_agent=False)
+        if not self.app.initialize_encryption(MASTER_PASSWORD):
+            raise RuntimeError("Could not unlock the synthetic vault")
+        return self.app
+
+    def close(self) -> None:
+        if self.app:
+            self.app.close()
+            self.app = None
+
+
+@benchmark(GLOBAL_BENCHMARKS, 'kdf_derive')
+def bench_kdf(ctx):
+    header = VaultHeader.new()
+
+    def run():
+        header.derive_key(MASTER_PASSWORD.encode())
+        return 1
+    return run
+
+
+@benchmark(GLOBAL_BENCHMARKS, 'encrypt_single')
+def bench_encrypt(ctx):
+    def run():
+        for password in ctx.plaintexts[:SINGLE_OPS]:
+            ctx.encryption.encrypt(password)
+        return SINGLE_OPS
+    return run
+
+
+@benchmark(GLOBAL_BENCHMARKS, 'decrypt_single')
+def bench_decrypt(ctx):
+    def run():
+        for token in ctx.tokens[:SINGLE_OPS]:
+            ctx.encryption.decrypt(token)
+        return SINGLE_OPS
+    return run
+
+
+@benchmark(GLOBAL_BENCHMARKS, 'encrypt_many')
+def bench_encrypt_many(ctx):
+    return lambda: sum(1 for _ in ctx.encryption.encrypt_many(ctx.plaintexts))
+
+
+@benchmark(GLOBAL_BENCHMARKS, 'decrypt_many')
+def bench_decrypt_many(ctx):
+    return lambda: sum(1 for _ in ctx.encryption.decrypt_many(ctx.tokens))
+
+
+@benchmark(GLOBAL_BENCHMARKS, 'generate')
+def bench_generate(ctx):
+    def run():
+        for _ in range(SINGLE_OPS):
+            ctx.generator.generate(16)
+        return SINGLE_OPS
+    return run
+
+
+@benchmark(GLOBAL_BENCHMARKS, 'generate_batch')
+def bench_generate_batch(ctx):
+    return lambda: sum(1 for _ in ctx.generator.generate_batch(BULK_OPS, 16))
+
+
+@benchmark(VAULT_BENCHMARKS, 'unlock')
+def bench_unlock(ctx):
+    def run():
+        app = PasswordManagerApp(use_agent=False)
+        try:
+            if not app.initialize_encryption(MASTER_PASSWORD):
+                raise RuntimeError("Unlock failed")
+        finally:
+            app.close()
+        return 1
+    return run
+
+
+@benchmark(VAULT_BENCHMARKS, 'get_password')
+def bench_get_password(ctx):
+    app = ctx.app
+
+    def run():
+        for website, username in ctx.accounts:
+            app.entry_cache.clear()
+            app.get_password(website, username).password
+        return len(ctx.accounts)
+    return run
+
+
+@benchmark(VAULT_BENCHMARKS, 'get_password_cached')
+def bench_get_password_cached(ctx):
+    app = ctx.app
+    hot = ctx.accounts[:app.entry_cache.max_entries]
+    for website, username in hot:
+        app.get_password(website, username).password
+
+    def run():
+        for i in range(LOOKUPS):
+            website, username = hot[i % len(hot)]
+            app.get_password(website, username).password
+        return LOOKUPS
+    return run
+
+
+@benchmark(VAULT_BENCHMARKS, 'add_password')
+def bench_add_password(ctx):
+    app = ctx.app
+
+    def run():
+        for _ in range(WRITES):
+            ctx.written += 1
+            if not app.add_password(f'bench{ctx.written}.example', 'bench-user', 'bench-password-123'):
+                raise RuntimeError("add_password failed")
+        return WRITES
+    return run
+
+
+@benchmark(VAULT_BENCHMARKS, 'get_all_passwords')
+def bench_get_all_passwords(ctx):
+    return lambda: len(ctx.app.password_manager.get_all_passwords())
+
+
+@benchmark(VAULT_BENCHMARKS, 'search_build')
+def bench_search_build(ctx):
+    def run():
+        ctx.app.search_index.build()
+        return 1
+    return run
+
+
+def _search(ctx, queries):
+    index = ctx.app.search_index
+    index.search(queries[0])  # builds the index outside the timing
+
+    def run():
+        for query in queries:
+            index.search(query)
+        return len(queries)
+    return run
+
+
+def _site_words(ctx):
+    return sorted({re.sub(r'\d+', '', website.split('.')[0]) for website, _ in ctx.accounts})
+
+
+@benchmark(VAULT_BENCHMARKS, 'search_selective')
+def bench_search_selective(ctx):
+    # 'mail4711': most trigrams are rare
+    return _search(ctx, [website.split('.')[0] for website, _ in ctx.accounts[:LOOKUPS // 5]])
+
+
+@benchmark(VAULT_BENCHMARKS, 'search_common')
+def bench_search_common(ctx):
+    # 'mail', 'example': every trigram is held by a large share of the vault
+    return _search(ctx, _site_words(ctx) + ['example'])
+
+
+@benchmark(VAULT_BENCHMARKS, 'search_typo')
+def bench_search_typo(ctx):
+    # 'mial', 'travle': the typo's trigrams match nothing, the rest are common
+    words = _site_words(ctx)
+    return _search(ctx, [word[0] + word[2] + word[1] + word[3:] for word in words]
+                   + [word[:-2] + word[-1] + word[-2] for word in words])
+
+
+@benchmark(VAULT_BENCHMARKS, 'backup_create')
+def bench_backup_create(ctx):
+    def run():
+        ctx.backup = ctx.app.storage.create_backup()
+        if not ctx.backup:
+            raise RuntimeError("Backup failed")
+        return 1
+    return run
+
+
+def _verify(ctx, deep):
+    def run():
+        if not ctx.app.storage.verify_backup(ctx.backup, deep=deep):
+            raise RuntimeError("Backup failed verification")
+        return 1
+    return run
+
+
+@benchmark(VAULT_BENCHMARKS, 'backup_verify')
+def bench_backup_verify(ctx):
+    return _verify(ctx, deep=False)
+
+
+@benchmark(VAULT_BENCHMARKS, 'backup_verify_deep')
+def bench_backup_verify_deep(ctx):
+    return _verify(ctx, deep=True)
+
+
+@benchmark(VAULT_BENCHMARKS, 'backup_restore')
+def bench_backup_restore(ctx):
+    # restore_data includes the deep check and leaves the database closed
+    def run():
+        if not ctx.app.restore_data(ctx.backup):
+            raise RuntimeError("Restore failed")
+        return 1
+    return run, ctx.open
+
+
+def _selected(registry, only):
+    return {name: factory for name, factory in registry.items()
+            if not only or any(part in name for part in only)}
+
+
+def run_global(args, only) -> dict:
+    ctx = GlobalContext(args.seed)
+    results = {}
+    for name, factory in _selected(GLOBAL_BENCHMARKS, only).items():
+        results[name] = _run_one('global', name, factory(ctx), args.repeat)
+    return results
+
+
+def run_vault(args, rows: int, work_dir: Path, only) -> dict:
+    label = format_size(rows)
+    template = work_dir / f'template-{label}'
+    if not (template / 'data' / 'passwords.db').exists():
+        print(f"Building {label} vault...", file=sys.stderr)
+        shutil.rmtree(template, ignore_errors=True)
+        build_vault(template, rows, args.seed)
+    run_dir = work_dir / f'run-{label}'
+    shutil.rmtree(run_dir, ignore_errors=True)
+    shutil.copytree(template, run_dir)
+
+    results = {}
+    with working_directory(run_dir):
+        ctx = VaultContext(run_dir, rows, args.seed)
+        ctx.open()
+        try:
+            for name, factory in _selected(VAULT_BENCHMARKS, only).items():
+                if name.startswith('backup_') and name != 'backup_create' and ctx.backup is None:
+                    ctx.backup = ctx.app.storage.create_backup()
+                results[name] = _run_one(label, name, factory(ctx), args.repeat)
+        finally:
+            ctx.close()
+    shutil.rmtree(run_dir, ignore_errors=True)
+    return results
+
+
+def _run_one(group, name, prepared, repeat) -> dict:
+    run, after = prepared if isinstance(prepared, tuple) else (prepared, None)
+    stats = timed(run, repeat, after)
+    print(f"{group + '/' + name:36}{stats['per_op'] * 1e6:>14,.1f} us/op{stats['ops_per_second']:>14,.0f} ops/s",
+          file=sys.stderr)
+    return stats
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="vault sizes, e.g. 1k,100k,1m (default 1k,100k)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per benchmark; the median is kept")
+    parser.add_argument('--only', help="comma-separated substrings of benchmark names to run")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', help="keep built vaults here to reuse them across runs")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="results file to compare against after the run")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    only = [part for part in args.only.split(',') if part] if args.only else None
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size]
+    work_dir = Path(args.work_dir).resolve() if args.work_dir else Path(tempfile.mkdtemp(prefix='pwbench-'))
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+    try:
+        results = run_global(args, only)
+        if results:
+            report['results']['global'] = results
+        for rows in sizes:
+            results = run_vault(args, rows, work_dir, only)
+            if results:
+                report['results'][format_size(rows)] = results
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare_results(baseline, report, args.threshold, out=sys.stderr):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Build a synthetic vault with the real key hierarchy and schema, for benchmarks.
+
+Entries get deterministic websites, usernames, notes, categories and
+passwords from a seeded RNG; ciphertexts differ between builds because
+Fernet tokens are randomised.
+
+    python benchmarks/synthetic_vault.py /tmp/vault-100k --rows 100k
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from app import PasswordManagerApp  # noqa: E402
+
+MASTER_PASSWORD = 'benchmark-master-password'
+CATEGORIES = ('work', 'personal', 'finance', 'shopping', 'social')
+# Rows encrypted and inserted per transaction
+BUILD_BATCH = 10000
+
+_SITE_WORDS = ('mail', 'shop', 'bank', 'news', 'cloud', 'photo', 'music', 'travel', 'code', 'chat')
+_PASSWORD_CHARS = string.ascii_letters + string.digits + '!@#$%^&*'
+
+
+def parse_size(text: str) -> int:
+    """'1k', '100k', '1m' or a plain number of rows"""
+    text = text.strip().lower()
+    scale = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def format_size(rows: int) -> str:
+    if rows >= 1000000 and rows % 1000000 == 0:
+        return f'{rows // 1000000}m'
+    if rows >= 1000 and rows % 1000 == 0:
+        return f'{rows // 1000}k'
+    return str(rows)
+
+
+@contextmanager
+def working_directory(path):
+    """The app keeps its vault under ./data, so run it from inside the vault directory"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def synthetic_entries(rows: int, seed: int = 0):
+    """Yield (website, username, password, notes, category) tuples"""
+    rng = random.Random(seed)
+    for i in range(rows):
+        website = f'{rng.choice(_SITE_WORDS)}{i}.example'
+        username = f'user{rng.randrange(1000000)}@example.com'
+        password = ''.join(rng.choices(_PASSWORD_CHARS, k=rng.randrange(10, 25)))
+        notes = f'recovery code {rng.randrange(10 ** 8):08d}' if rng.random() < 0.2 else None
+        category = rng.choice(CATEGORIES) if rng.random() < 0.6 else None
+        yield website, username, password, notes, category
+
+
+def sample_accounts(rows: int, count: int, seed: int = 0):
+    """(website, username) of count entries spread over a vault built with the same seed"""
+    wanted = set(random.Random(seed + 1).sample(range(rows), min(count, rows)))
+    return [(website, username) for i, (website, username, *_) in enumerate(synthetic_entries(rows, seed))
+            if i in wanted]
+
+
+def build_vault(directory, rows: int, seed: int = 0, progress=None) -> Path:
+    """
+    Create directory/data/passwords.db holding rows entries
+    Args:
+        directory: Vault directory; created if missing, must not hold a vault yet
+        rows: Number of entries
+        seed: Seed for the entry contents
+        progress: Optional callback(rows_written_so_far)
+    Returns:
+        Path: The database file
+    """
+    directory = Path(directory).resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    with working_directory(directory):
+        if Path('data/passwords.db').exists():
+            raise FileExistsError(f"{directory} already holds a vault")
+        app = PasswordManagerApp(use_agent=False)
+        try:
+            if not app.initialize_encryption(MASTER_PASSWORD):
+                raise RuntimeError("Could not set up the vault keys")
+            pm = app.password_manager
+            category_ids = {name: app.get_or_create_category(name) for name in CATEGORIES}
+            entries = synthetic_entries(rows, seed)
+            written = 0
+            while written < rows:
+                batch = [entry for _, entry in zip(range(BUILD_BATCH), entries)]
+                ciphertexts = app.encryption.encrypt_many(entry[2] for entry in batch)
+                first_id = pm.db.conn.execute('SELECT COALESCE(MAX(id), 0) FROM passwords').fetchone()[0] + 1
+                pm.add_passwords((website, username, result.value, notes)
+                                 for (website, username, _, notes, _), result in zip(batch, ciphertexts))
+                # add_passwords takes no category, so file the batch afterwards
+                members = {}
+                for entry_id, entry in enumerate(batch, first_id):
+                    if entry[4]:
+                        members.setdefault(entry[4], []).append(entry_id)
+                for name, entry_ids in members.items():
+                    pm.assign_category(entry_ids, category_ids[name])
+                written += len(batch)
+                if progress:
+                    progress(written)
+            app.db.checkpoint()
+            return (directory / app.storage.db_path).resolve()
+        finally:
+            app.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('directory')
+    parser.add_argument('--rows', type=parse_size, default=parse_size('1k'), help="e.g. 1k, 100k, 1m")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    path = build_vault(args.directory, args.rows, args.seed,
+                       lambda done: print(f"\r{done:,}/{args.rows:,} rows", end='', flush=True))
+    print(f"\nBuilt {path} ({path.stat().st_size / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s")
+    print(f"Master password: {MASTER_PASSWORD}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,909 @@
+import os
+from pathlib import Path
+from core.password import Encryption, token_to_raw
+from core.agent import AgentClient
+from core.kdf import VaultHeader, calibrate
+from core.generator import PasswordGen
+from database.models import Database, PasswordManager
+from database.search import SearchIndex
+from core.storage import StorageManager
+from core.importer import CredentialImporter, ImportStats
+from core.sync import SyncResult, VaultSync
+from core.scheduler import AutoBackupScheduler
+from core.audit import AuditReport, VaultAuditor
+from core.breach import BreachChecker
+from core.entry import Entry, EntryCache
+import shutil
+from contextlib import nullcontext
+from typing import Optional
+
+class PasswordManagerApp:
+    def __init__(self, use_agent: bool = True):
+        self.storage = StorageManager()
+        self.db = Database(str(self.storage.db_path), profile='wal')
+        self.db.connect()
+        self.db.init_tables()
+        self.password_manager = PasswordManager(self.db)
+        # Recently read entries; wiped on lock, invalidated by every write
+        self.entry_cache = EntryCache()
+        self.password_manager.add_listener(self._on_entry_change)
+        self.search_index = SearchIndex(self.password_manager)
+        self.generator = PasswordGen()
+        # Only opened on first lookup, so a configured corpus costs nothing at startup
+        self.breach_checker = BreachChecker.from_env()
+        self.encryption = None  
+        self.agent = AgentClient() if use_agent else None
+        self.auto_backup = None
+
+    @property
+    def vault_id(self) -> str:
+        """Identifies this vault to the unlock agent"""
+        return str(self.storage.db_path.resolve())
+
+    def load_header(self) -> Optional[VaultHeader]:
+        """Read the KDF header stored in the database, None for vaults that predate it"""
+        data = self.db.get_meta('header')
+        return VaultHeader.from_json(data) if data else None
+
+    def initialize_encryption(self, master_password: str) -> bool:
+        """Initialize encryption with master password"""
+        header = self.load_header()
+        wrapped_key = self.db.get_meta('wrapped_key')
+        try:
+            if header and wrapped_key:
+                self.encryption = Encryption(master_password, header, wrapped_key, self.binary_ciphertexts)
+            else:
+                self.encryption = self._upgrade_vault(master_password, header)
+        except ValueError as e:
+            print(e)
+            self.encryption = None
+            return False
+        except Exception as e:
+            # The upgrade rolled back, so the vault is as it was before this attempt
+            print(f"Could not upgrade the vault keys: {e}")
+            self.encryption = None
+            return False
+        if not self.key_matches_vault():
+            print("Warning: master password does not match the stored entries.")
+            self.encryption = None
+            return False
+        if not self.binary_ciphertexts:
+            converted = self.migrate_ciphertexts()
+            if converted:
+                print(f"Compacted {converted} stored passwords to the binary format.")
+        if self.agent and self.agent.start():
+            self.agent.put_key(self.vault_id, self.encryption.key)
+        return True
+
+    def unlock_from_agent(self) -> bool:
+        """
+        Reuse a key cached by the unlock agent instead of deriving it again.
+        Refuses (so the caller falls back to the master password) when the vault
+        has no wrapped key yet or the cached key does not decrypt its entries.
+        """
+        if not self.agent:
+            return False
+        key = self.agent.get_key(self.vault_id)
+        if not key:
+            return False
+        header = self.load_header()
+        wrapped_key = self.db.get_meta('wrapped_key')
+        if not (header and wrapped_key):
+            self.agent.lock(self.vault_id)
+            return False
+        try:
+            self.encryption = Encryption.from_key(key, header, wrapped_key, self.binary_ciphertexts)
+        except ValueError:
+            self.encryption = None
+        if not self.encryption or not self.key_matches_vault():
+            self.encryption = None
+            self.agent.lock(self.vault_id)
+            return False
+        return True
+
+    @property
+    def binary_ciphertexts(self) -> bool:
+        """Whether entries are stored as raw token bytes (BLOBs) rather than base64 text"""
+        return self.db.get_meta('ciphertext_format') == 'blob'
+
+    def migrate_ciphertexts(self, batch_size: int = 1000, progress=None, vacuum: bool = True) -> int:
+        """
+        Convert text tokens to raw BLOBs in place, one committed batch at a time.
+        Only the encoding changes, so no key is needed and the work can resume.
+        """
+        self.db.set_meta('ciphertext_format', 'blob')
+        if self.encryption:
+            self.encryption.binary = True
+        converted = self.password_manager.convert_ciphertexts(token_to_raw, batch_size, progress)
+        if converted and vacuum:
+            # Hand the freed quarter of every page back to the filesystem
+            self.db.conn.execute('VACUUM')
+        return converted
+
+    def _find_legacy_salt(self) -> Optional[bytes]:
+        """Salt of a vault without header: salt.bin in the working directory, then under data/"""
+        for salt_file in (Path('salt.bin'), self.storage.salt_path):
+            if salt_file.exists():
+                return salt_file.read_bytes()
+        return None
+
+    def _upgrade_vault(self, master_password: str, header: Optional[VaultHeader]) -> Encryption:
+        """Move a vault without a wrapped data key onto one, re-encrypting existing entries once"""
+        data_key = Encryption.from_key(Encryption.generate_data_key(), binary=True)
+        if self.password_manager.get_any_password() is None:
+            self.encryption = data_key
+            self._store_key_hierarchy(master_password, VaultHeader.new())
+            return self.encryption
+
+        if header is None:
+            salt = self._find_legacy_salt()
+            if salt is None:
+                raise ValueError("Vault salt not found (salt.bin)")
+            header = VaultHeader.legacy(salt)
+        self.encryption = Encryption(master_password, header)
+        if not self.key_matches_vault():
+            # Wrong password: leave the vault untouched and keep no key around
+            self.encryption = None
+            raise ValueError("Incorrect master password")
+        print("Upgrading vault keys, this happens once...")
+        self._reencrypt_all(data_key, master_password, VaultHeader.new())
+        return self.encryption
+
+    def _store_key_hierarchy(self, master_password: str, header: VaultHeader, commit: bool = True):
+        """Wrap the current data key under a new header; O(1) regardless of vault size"""
+        wrapped_key = self.encryption.wrap_key(master_password, header)
+        self.db.set_meta('header', header.to_json(), commit=False)
+        self.db.set_meta('wrapped_key', wrapped_key, commit=False)
+        if commit:
+            self.db.conn.commit()
+        self.encryption = Encryption.from_key(self.encryption.key, header, wrapped_key, self.encryption.binary)
+
+    def _reencrypt_all(self, new_encryption: Encryption, master_password: str, header: VaultHeader):
+        """Re-encrypt every entry under a new data key, in one transaction"""
+        rows = self.password_manager.get_all_encrypted()
+        ids = [row[0] for row in rows]
+        plaintexts = []
+        for result in self.encryption.decrypt_many(row[1] for row in rows):
+            if result.error:
+                raise Exception(f"Entry {ids[result.index]}: {result.error}")
+            plaintexts.append(result.value)
+        ciphertexts = [result.value for result in new_encryption.encrypt_many(plaintexts)]
+        old_encryption = self.encryption
+        try:
+            self.password_manager.replace_encrypted(zip(ciphertexts, ids), commit=False)
+            self.encryption = new_encryption
+            self._store_key_hierarchy(master_password, header, commit=False)
+            self.db.conn.commit()
+        except Exception:
+            self.db.conn.rollback()
+            self.encryption = old_encryption
+            raise
+
+    def change_master_password(self, old_password: str, new_password: str,
+                               header: Optional[VaultHeader] = None) -> bool:
+        """Re-wrap the data key under a new master password; entries are not touched"""
+        if not self.encryption or not self.encryption.verify_master_password(old_password):
+            print("Incorrect master password")
+            return False
+        if header is None:
+            current = self.encryption.header
+            header = VaultHeader.new(current.kdf, current.params)
+        try:
+            self._store_key_hierarchy(new_password, header)
+            return True
+        except Exception as e:
+            self.db.conn.rollback()
+            print(f"Failed to change master password: {e}")
+            return False
+
+    def calibrate_kdf(self, master_password: str, target_ms: float = 300) -> Optional[VaultHeader]:
+        """Benchmark this host, then re-wrap the data key to unlock in about target_ms"""
+        kdf, params = calibrate(target_ms=target_ms)
+        header = VaultHeader.new(kdf, params)
+        if self.change_master_password(master_password, master_password, header):
+            return header
+        return None
+
+    def key_matches_vault(self) -> bool:
+        """Check the current key against one stored entry (an empty vault always matches)"""
+        sample = self.password_manager.get_any_password()
+        if sample is None:
+            return True
+        try:
+            self.encryption.decrypt(sample)
+            return True
+        except Exception:
+            return False
+
+    def lock(self) -> None:
+        """Forget the key here and in the unlock agent"""
+        self.encryption = None
+        self.entry_cache.clear()
+        if self.agent:
+            self.agent.lock(self.vault_id)
+
+    def add_password(self, website: str, username: str, password: str, notes: str = None,
+                     category: Optional[str] = None) -> bool:
+        """Add encrypted password to database"""
+        if not self.encryption:
+            print("Please initialize encryption first!")
+            return False
+        try:
+            encrypted_password = self.encryption.encrypt(password)
+            category_id = self.get_or_create_category(category) if category else None
+            return self.password_manager.add_password(website, username, encrypted_password, notes, category_id)
+        except Exception as e:
+            print(f"Failed to add password: {e}")
+            return False
+
+    def get_password(self, website: str, username: Optional[str] = None) -> Optional[Entry]:
+        """Entry for a website (or one of its accounts); the password is decrypted when first read"""
+        if not self.encryption:
+            print("Please initialize encryption first!")
+            return None
+        key = (website, username)
+        entry = self.entry_cache.get(key)
+        if entry is None:
+            row = self.password_manager.get_password(website, username)
+            if not row:
+                return None
+            # Reached before under another key: keep the copy that may already be decrypted
+            entry = self.entry_cache.get_by_id(row[0]) or self._make_entry(row)
+            self.entry_cache.put(entry, key)
+        return entry
+
+    def get_password_by_id(self, entry_id: int) -> Optional[Entry]:
+        """Entry by id; the password is decrypted when first read"""
+        if not self.encryption:
+            print("Please initialize encryption first!")
+            return None
+        entry = self.entry_cache.get_by_id(entry_id)
+        if entry is None:
+            entry = self._make_entry(self.password_manager.get_password_by_id(entry_id))
+            if entry:
+                self.entry_cache.put(entry)
+        return entry
+
+    def _make_entry(self, row) -> Optional[Entry]:
+        return Entry(row, self.encryption, self.password_manager.get_category_name) if row else None
+
+    def _on_entry_change(self, event, entry_id):
+        self.entry_cache.invalidate(entry_id)
+
+    def list_accounts(self, website: str) -> list:
+        """Usernames stored for a website"""
+        return [row[2] for row in self.password_manager.get_passwords(website)]
+
+    def search_websites(self, prefix: str, limit: int = 10) -> list:
+        """(id, website, username) for websites starting with prefix, ignoring case"""
+        return self.password_manager.search_websites(prefix, limit)
+
+    def get_or_create_category(self, name: str) -> Optional[int]:
+        """Id of the named category, creating it on first use"""
+        category_id = self.password_manager.get_category_id(name)
+        if category_id is None and self.password_manager.add_category(name):
+            category_id = self.password_manager.get_category_id(name)
+        return category_id
+
+    def move_to_category(self, website: str, category: Optional[str], username: Optional[str] = None) -> int:
+        """Put every account for a website (or just one username) into a category; None clears it"""
+        ids = [row[0] for row in self.password_manager.get_passwords(website)
+               if username is None or row[2] == username]
+        category_id = self.get_or_create_category(category) if category else None
+        return self.password_manager.assign_category(ids, category_id)
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Typo-tolerant ranked search over website, username and notes"""
+        return self.search_index.search(query, limit)
+
+    def import_credentials(self, path: str, fmt: Optional[str] = None,
+                           progress=None) -> Optional[ImportStats]:
+        """Import a Chrome, Firefox, Bitwarden or KeePass export"""
+        if not self.encryption:
+            print("Please initialize encryption first!")
+            return None
+        try:
+            importer = CredentialImporter(self.password_manager, self.encryption, progress=progress)
+            return importer.import_file(path, fmt)
+        except Exception as e:
+            print(f"Import failed: {e}")
+            return None
+
+    def backup_data(self, backup_path: str = None, incremental: bool = False,
+                    progress=None) -> Optional[str]:
+        """Create backup of all data"""
+        try:
+            # Keep the scheduler from snapshotting or pruning chunks while this one is written
+            with self._backups_paused():
+                backup_location = self.storage.create_backup(backup_path, incremental, progress)
+                verified = backup_location and self.storage.verify_backup(backup_location)
+            if verified:
+                return backup_location
+            print("Backup verification failed")
+            return None
+        except Exception as e:
+            print(f"Backup failed: {e}")
+            return None
+
+    def start_auto_backup(self, **options) -> AutoBackupScheduler:
+        """Back up in the background after bursts of writes; options go to AutoBackupScheduler"""
+        if self.auto_backup is None:
+            self.auto_backup = AutoBackupScheduler(self.storage, self.password_manager, **options)
+        self.auto_backup.start()
+        return self.auto_backup
+
+    def stop_auto_backup(self, flush: bool = True) -> None:
+        if self.auto_backup:
+            self.auto_backup.stop(flush)
+
+    def _backups_paused(self):
+        return self.auto_backup.paused() if self.auto_backup else nullcontext()
+
+    def restore_data(self, backup_path: str) -> bool:
+        """Restore data from backup"""
+        try:
+            if not self.storage.verify_backup(backup_path, deep=True):
+                print("Invalid or corrupted backup")
+                return False
+            with self._backups_paused():
+                # The cached key belongs to the vault being replaced
+                self.lock()
+                # Close first so a leftover WAL cannot be replayed over the restored file
+                self.db.close()
+                restored = self.storage.restore_backup(backup_path)
+                if not restored:
+                    self.db.connect()
+            return restored
+        except Exception as e:
+            print(f"Restore failed: {e}")
+            return False
+
+    def restore_entries(self, backup_path: str, website: str, username: Optional[str] = None) -> Optional[int]:
+        """
+        Copy the accounts for a website (or one username) out of a backup into the live vault,
+        overwriting the password of accounts that still exist
+        Returns:
+            Optional[int]: Number of entries restored, None on failure
+        """
+        if not self.encryption:
+            print("Please initialize encryption first!")
+            return None
+        try:
+            with self.storage.backup_database(backup_path) as snapshot_path:
+                backup_db = Database(str(snapshot_path))
+                backup_db.connect()
+                try:
+                    backup_pm = PasswordManager(backup_db)
+                    rows = [row for row in backup_pm.get_passwords(website)
+                            if username is None or row[2] == username]
+                    categories = {row[7]: backup_pm.get_category_name(row[7]) for row in rows if row[7]}
+                finally:
+                    backup_db.close()
+
+            # Ciphertexts are copied as they are, so they must open with the current data key
+            for result in self.encryption.decrypt_many(row[3] for row in rows):
+                if result.error:
+                    print("This backup was encrypted with a different key and cannot be merged; "
+                          "restore it in full instead.")
+                    return None
+
+            restored = 0
+            for _, site, user, encrypted_password, notes, _, _, category_id in rows:
+                if self.encryption.binary and isinstance(encrypted_password, str):
+                    encrypted_password = token_to_raw(encrypted_password)
+                existing = self.password_manager.get_password(site, user)
+                if existing:
+                    restored += self.password_manager.update_password_by_id(existing[0], encrypted_password)
+                else:
+                    category = categories.get(category_id)
+                    restored += self.password_manager.add_password(
+                        site, user, encrypted_password, notes,
+                        self.get_or_create_category(category) if category else None)
+            return restored
+        except Exception as e:
+            print(f"Restore failed: {e}")
+            return None
+
+    def verify_backups(self, backup_path: str = None, deep: bool = False) -> dict:
+        """Verify every catalogued backup; returns backup directory -> valid"""
+        try:
+            return self.storage.verify_all_backups(backup_path, deep)
+        except Exception as e:
+            print(f"Verification failed: {e}")
+            return {}
+
+    def export_to_usb(self, usb_path: str) -> bool:
+        """Export database to USB drive"""
+        if not usb_path:
+            print("Please provide a USB drive path")
+            return False
+        try:
+            return self.storage.export_to_device(usb_path)
+        except Exception as e:
+            print(f"Export failed: {e}")
+            return False
+
+    def import_from_usb(self, usb_path: str) -> bool:
+        """Import database from USB drive"""
+        try:
+            with self._backups_paused():
+                self.lock()
+                self.db.close()
+                imported = self.storage.import_from_device(usb_path)
+                if not imported:
+                    self.db.connect()
+            return imported
+        except Exception as e:
+            print(f"Import failed: {e}")
+            return False
+
+    def sync_with_usb(self, usb_path: str) -> Optional[SyncResult]:
+        """
+        Merge changes with the vault copy on a USB drive, creating the copy on first use
+        Returns:
+            Optional[SyncResult]: Counts and conflicts, None on failure
+        """
+        if not self.encryption:
+            print("Please initialize encryption first!")
+            return None
+        if not usb_path:
+            print("Please provide a USB drive path")
+            return None
+        remote_db = None
+        try:
+            copy_path = self.storage.sync_copy_path(usb_path)
+            created = not copy_path.exists()
+            if created:
+                self.db.conn.commit()
+                self.storage.create_sync_copy(usb_path)
+            remote_db = Database(str(copy_path))
+            remote_db.connect()
+            remote_db.init_tables()
+            syncer = VaultSync(self.password_manager, PasswordManager(remote_db), self.encryption)
+            if created:
+                remote_db.new_replica_id()
+                syncer.mark_in_sync()
+                return SyncResult(0, 0, [])
+            return syncer.sync()
+        except Exception as e:
+            print(f"Sync failed: {e}")
+            return None
+        finally:
+            if remote_db:
+                remote_db.close()
+
+    def audit_vault(self, stale_days: int = 365) -> Optional[AuditReport]:
+        """
+        Find reused, weak and stale passwords across the whole vault
+        Returns:
+            Optional[AuditReport]: Findings, None on failure
+        """
+        if not self.encryption:
+            print("Please initialize encryption first!")
+            return None
+        try:
+            auditor = VaultAuditor(self.password_manager, self.encryption, self.generator, self.breach_checker)
+            return auditor.audit(stale_days)
+        except Exception as e:
+            print(f"Audit failed: {e}")
+            return None
+
+    def list_backups(self, backup_path: str = None) -> list:
+        """List available backups"""
+        try:
+            return self.storage.get_backup_list(backup_path)
+        except Exception as e:
+            print(f"Failed to list backups: {e}")
+            return []
+
+    def generate_password(self, length: int = 16, include_special: bool = True) -> Optional[str]:
+        """Generate a secure password"""
+        try:
+            return self.generator.generate(length, use_symbols=include_special)
+        except Exception as e:
+            print(f"Failed to generate password: {e}")
+            return None
+
+    def generate_passphrase(self, num_words: int = 5) -> Optional[tuple]:
+        """Memorable passphrase and its entropy in bits"""
+        try:
+            return self.generator.generate_passphrase(num_words)
+        except Exception as e:
+            print(f"Failed to generate passphrase: {e}")
+            return None
+
+    def check_strength(self, password: str, user_inputs=()) -> Optional[dict]:
+        """Estimated strength of a password, None if it could not be rated"""
+        try:
+            return self.generator.check_strength(password, user_inputs)
+        except Exception as e:
+            print(f"Failed to check password strength: {e}")
+            return None
+
+    def check_breached(self, password: str) -> Optional[int]:
+        """
+        Times the password appears in the offline breach corpus
+        Returns:
+            Optional[int]: 0 if never, None when no corpus is configured or the lookup failed
+        """
+        if self.breach_checker is None:
+            return None
+        try:
+            return self.breach_checker.lookup(password)
+        except Exception as e:
+            print(f"Failed to check breach corpus: {e}")
+            return None
+
+    def clear_database(self) -> bool:
+        """Clear all data and reset the database"""
+        try:
+            self.stop_auto_backup(flush=False)
+            self.lock()  # Otherwise the agent hands the old key to the fresh vault
+            self.close()  # Close database connection first
+            if os.path.exists('data'):
+                shutil.rmtree('data')
+            return True
+        except Exception as e:
+            print(f"Error clearing database: {e}")
+            return False
+
+    def close(self):
+        """Clean up and close connections"""
+        try:
+            self.stop_auto_backup()
+            if self.breach_checker is not None:
+                self.breach_checker.close()
+            self.db.close()
+        except Exception as e:
+            print(f"Error closing database: {e}")
+
+def print_menu():
+    print("\n=== Password Manager CLI ===")
+    print("1. Add Password")
+    print("2. Get Password")
+    print("3. Generate Password")
+    print("4. List All Passwords")
+    print("5. Create Backup")
+    print("6. Restore from Backup")
+    print("7. Export to USB")
+    print("8. Import from USB")
+    print("9. List Backups")
+    print("10. Clear Database")
+    print("11. Calibrate Key Derivation")
+    print("12. Change Master Password")
+    print("13. Search Entries")
+    print("14. Import from Browser/Password Manager Export")
+    print("15. Manage Categories")
+    print("16. Verify All Backups")
+    print("17. Sync with USB")
+    print("18. Audit Vault")
+    print("19. Lock and Exit")
+    print("20. Exit")
+    return input("Choose an option (1-20): ")
+
+def run_interactive():
+    """The menu-driven session started when main.py is run without a command"""
+    app = PasswordManagerApp()
+    
+    print("\n⚠️  IMPORTANT: Please remember your master password!")
+    print("There is NO WAY to recover your passwords if you forget the master password.")
+    print("The master password is never stored and is required to decrypt your passwords.\n")
+    
+    try:
+        if app.unlock_from_agent():
+            print("Unlocked with cached key from the unlock agent.")
+        else:
+            # Get master password 
+            master_password = input("Enter master password: ")
+            if not app.initialize_encryption(master_password):
+                return
+        app.start_auto_backup()
+        # Index entry metadata while the user reads the menu, not on their first search
+        app.search_index.start_build()
+        
+        while True:
+            try:
+                choice = print_menu()
+                
+                if choice == '1':
+                    website = input("Enter website: ")
+                    username = input("Enter username: ")
+                    use_generated = input("Generate password? (y/n): ").lower() == 'y'
+                    if use_generated:
+                        length = int(input("Enter password length (default 16): ") or "16")
+                        special = input("Include special characters? (y/n): ").lower() == 'y'
+                        password = app.generate_password(length, special)
+                        if password:
+                            print(f"Generated password: {password}")
+                        else:
+                            continue
+                    else:
+                        password = input("Enter password: ")
+                        strength = app.check_strength(password, (website, username))
+                        breached = app.check_breached(password)
+                        weak = strength and strength['strength'] < 3
+                        if weak:
+                            print(f"Weak password: about 10^{strength['guesses_log10']:.0f} guesses "
+                                  f"({', '.join(strength['patterns'])}).")
+                        if breached:
+                            print(f"This password appears {breached:,} times in known data breaches.")
+                        if (weak or breached) and input("Use it anyway? (y/n): ").lower() != 'y':
+                            continue
+                    notes = input("Enter notes (optional): ")
+                    category = input("Enter category (optional): ") or None
+                    
+                    if app.add_password(website, username, password, notes, category):
+                        print("Password added successfully!")
+                    else:
+                        print("Failed to add password.")
+
+                elif choice == '2':
+                    website = input("Enter website to search: ")
+                    username = None
+                    accounts = app.list_accounts(website)
+                    if len(accounts) > 1:
+                        print("\nAccounts for this website:")
+                        for account in accounts:
+                            print(f"- {account}")
+                        username = input("Enter username: ")
+                    elif not accounts:
+                        matches = app.search_websites(website)
+                        if matches:
+                            print("\nNo exact match. Websites starting with that:")
+                            for _, match_website, match_username in matches:
+                                print(f"- {match_website} ({match_username})")
+                            continue
+                    result = app.get_password(website, username)
+                    if result:
+                        print("\nPassword Details:")
+                        print(f"Website: {result['website']}")
+                        print(f"Username: {result['username']}")
+                        print(f"Password: {result['password']}")
+                        if result['notes']:
+                            print(f"Notes: {result['notes']}")
+                        print(f"Created: {result['created']}")
+                        print(f"Last Updated: {result['updated']}")
+                        if result['category']:
+                            print(f"Category: {result['category']}")
+                    else:
+                        print("Password not found.")
+
+                elif choice == '3':
+                    if input("Generate a (p)assword or a (m)emorable passphrase? ").lower() == 'm':
+                        num_words = int(input("Number of words (default 5): ") or "5")
+                        result = app.generate_passphrase(num_words)
+                        if result:
+                            passphrase, bits = result
+                            print(f"\nGenerated passphrase: {passphrase}")
+                            print(f"Entropy: {bits:.1f} bits")
+                    else:
+                        length = int(input("Enter password length (default 16): ") or "16")
+                        special = input("Include special characters? (y/n): ").lower() == 'y'
+                        password = app.generate_password(length, special)
+                        if password:
+                            print(f"\nGenerated password: {password}")
+
+                elif choice == '4':
+                    sort = input("Sort by (website/updated, default website): ").strip().lower()
+                    if sort.startswith('updated'):
+                        pages = app.password_manager.iter_password_pages('updated_at', descending=True)
+                    else:
+                        pages = app.password_manager.iter_password_pages('website')
+                    shown = 0
+                    for page in pages:
+                        if not shown:
+                            print("\nAll Stored Passwords:")
+                        for id_, website, username, notes, created, updated, _, category in page:
+                            print(f"\nWebsite: {website}")
+                            print(f"Username: {username}")
+                            if notes:
+                                print(f"Notes: {notes}")
+                            print(f"Created: {created}")
+                            print(f"Last Updated: {updated}")
+                            if category:
+                                print(f"Category: {category}")
+                        shown += len(page)
+                        if input(f"\n-- {shown} shown, Enter for more, q to stop: ").lower() == 'q':
+                            break
+                    if not shown:
+                        print("No passwords stored.")
+
+                elif choice == '5':
+                    backup_path = input("Enter backups folder (or press Enter for default): ")
+                    backup_path = backup_path if backup_path else None
+                    incremental = input("Incremental backup (only changed chunks)? (y/n): ").lower() == 'y'
+                    backup_location = app.backup_data(backup_path, incremental)
+                    if backup_location:
+                        print(f"Backup created and verified at: {backup_location}")
+                    else:
+                        print("Backup failed.")
+
+                elif choice == '6':
+                    backup_path = input("Enter backup path to restore from: ")
+                    website = input("Website to restore (or press Enter to restore everything): ")
+                    if website:
+                        username = input("Username (or press Enter for all accounts): ") or None
+                        restored = app.restore_entries(backup_path, website, username)
+                        if restored is not None:
+                            print(f"Restored {restored} entries from the backup.")
+                    elif app.restore_data(backup_path):
+                        print("Backup restored and verified successfully!")
+                        print("Please restart the application to use the restored data.")
+                        break
+                    else:
+                        print("Failed to restore backup.")
+
+                elif choice == '7':
+                    usb_path = input("Enter USB drive path: ")
+                    if app.export_to_usb(usb_path):
+                        print(f"Data exported to: {usb_path}")
+                    else:
+                        print("Export failed.")
+
+                elif choice == '8':
+                    usb_path = input("Enter USB drive path: ")
+                    if app.import_from_usb(usb_path):
+                        print("Data imported successfully!")
+                        print("Please restart the application to use the imported data.")
+                        break
+                    else:
+                        print("Import failed.")
+
+                elif choice == '9':
+                    backup_path = input("Enter backup directory to list (or press Enter for default): ")
+                    backup_path = backup_path if backup_path else None
+                    backups = app.list_backups(backup_path)
+                    if backups:
+                        print("\nAvailable Backups:")
+                        for backup in backups:
+                            print(f"- {backup}")
+                    else:
+                        print("No backups found.")
+                    if backup_path is None:
+                        automatic = app.list_backups(str(app.storage.auto_backup_path))
+                        if automatic:
+                            print("\nAutomatic Backups:")
+                            for backup in automatic:
+                                print(f"- {backup}")
+                    if app.auto_backup and app.auto_backup.last_error:
+                        print(f"Last automatic backup failed: {app.auto_backup.last_error}")
+
+                elif choice == '10':
+                    print("\n⚠️  WARNING: This will permanently delete all stored passwords!")
+                    confirm = input("Are you sure you want to clear the database? (type 'YES' to confirm): ")
+                    if confirm == 'YES':
+                        if app.clear_database():
+                            print("Database cleared successfully.")
+                            print("Please restart the application to create a new database.")
+                            break
+                        else:
+                            print("Failed to clear database.")
+
+                elif choice == '11':
+                    target = float(input("Target unlock time in ms (default 300): ") or "300")
+                    master_password = input("Re-enter master password: ")
+                    header = app.calibrate_kdf(master_password, target)
+                    if header:
+                        print(f"Vault re-keyed with {header.kdf} {header.params}")
+
+                elif choice == '12':
+                    old_password = input("Enter current master password: ")
+                    new_password = input("Enter new master password: ")
+                    if new_password != input("Confirm new master password: "):
+                        print("Passwords do not match.")
+                    elif app.change_master_password(old_password, new_password):
+                        print("Master password changed.")
+
+                elif choice == '13':
+                    query = input("Search for: ")
+                    results = app.search(query)
+                    if results:
+                        print("\nBest matches:")
+                        for number, (_, website, username, _) in enumerate(results, 1):
+                            print(f"{number}. {website} ({username})")
+                        pick = input("Show password for number (or press Enter to skip): ")
+                        if pick:
+                            entry = app.get_password_by_id(results[int(pick) - 1][0])
+                            if entry:
+                                print(f"Password: {entry['password']}")
+                    else:
+                        print("No matches found.")
+
+                elif choice == '14':
+                    path = input("Enter export file path (Chrome/Firefox/Bitwarden CSV or JSON, KeePass CSV): ")
+                    stats = app.import_credentials(path, progress=lambda s: print(
+                        f"  {s.read} rows read, {s.imported} imported ({s.rows_per_second:.0f} rows/s)"))
+                    if stats:
+                        print(f"Imported {stats.imported} entries, skipped {stats.duplicates} duplicates "
+                              f"and {stats.skipped} incomplete rows in {stats.elapsed:.1f}s.")
+                        if stats.errors:
+                            print(f"{stats.errors} entries could not be imported.")
+
+                elif choice == '15':
+                    print("\nCategories:")
+                    for name, count in app.password_manager.get_category_counts():
+                        print(f"- {name or 'Uncategorized'}: {count}")
+                    action = input("(a)dd, (d)elete, (m)ove entries, (s)how entries, or Enter to go back: ").lower()
+                    if action == 'a':
+                        if app.password_manager.add_category(input("New category name: ")):
+                            print("Category added.")
+                    elif action == 'd':
+                        if app.password_manager.delete_category(input("Category to delete: ")):
+                            print("Category deleted, its entries are now uncategorized.")
+                    elif action == 'm':
+                        website = input("Website: ")
+                        username = input("Username (or press Enter for all accounts): ") or None
+                        category = input("Category (or press Enter to clear): ") or None
+                        moved = app.move_to_category(website, category, username)
+                        print(f"Moved {moved} entries.")
+                    elif action == 's':
+                        name = input("Category: ")
+                        for _, website, username, _, _, updated, _ in app.password_manager.get_passwords_by_category(name):
+                            print(f"- {website} ({username}), updated {updated}")
+
+                elif choice == '16':
+                    deep = input("Deep check (decompress and re-hash everything)? (y/N): ").lower() == 'y'
+                    results = app.verify_backups(deep=deep)
+                    results.update(app.verify_backups(str(app.storage.auto_backup_path), deep))
+                    if not results:
+                        print("No backups found.")
+                    for backup, valid in results.items():
+                        print(f"- {backup}: {'OK' if valid else 'FAILED'}")
+
+                elif choice == '17':
+                    usb_path = input("Enter USB drive path: ")
+                    result = app.sync_with_usb(usb_path)
+                    if result:
+                        print(f"Sent {result.sent} and received {result.received} changed entries.")
+                        for conflict in result.conflicts:
+                            print(f"- Conflict on {conflict.website} ({conflict.username}): kept the "
+                                  f"{conflict.winner} version (local {conflict.local_time}, "
+                                  f"USB {conflict.remote_time})")
+
+                elif choice == '18':
+                    stale_days = int(input("Flag passwords older than how many days? (default 365): ") or "365")
+                    report = app.audit_vault(stale_days)
+                    if report:
+                        print(f"\nAudited {report.scanned} entries.")
+                        print(f"\nReused passwords ({len(report.reused)} groups):")
+                        for group in report.reused:
+                            print("- " + ", ".join(f"{entry.website} ({entry.username})" for entry in group))
+                        print(f"\nWeak passwords ({len(report.weak)}):")
+                        for item in report.weak:
+                            print(f"- {item.entry.website} ({item.entry.username}): strength {item.strength}/4, "
+                                  f"about 10^{item.guesses_log10:.0f} guesses ({', '.join(item.patterns)})")
+                        print(f"\nNot changed in {stale_days} days ({len(report.stale)}):")
+                        for entry in report.stale:
+                            print(f"- {entry.website} ({entry.username}): last updated {entry.updated_at}")
+                        if app.breach_checker is not None:
+                            print(f"\nFound in data breaches ({len(report.breached)}):")
+                            for item in report.breached:
+                                print(f"- {item.entry.website} ({item.entry.username}): "
+                                      f"seen {item.occurrences:,} times")
+                        if report.failed:
+                            print(f"\nCould not decrypt ({len(report.failed)}):")
+                            for entry in report.failed:
+                                print(f"- {entry.website} ({entry.username})")
+
+                elif choice == '19':
+                    app.lock()
+                    print("Vault locked.")
+                    break
+
+                elif choice == '20':
+                    break
+                else:
+                    print("Invalid choice. Please try again.")
+
+            except ValueError as e:
+                print(f"Invalid input: {e}")
+            except Exception as e:
+                print(f"An error occurred: {e}")
+                print("Please try again.")
+
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    except Exception as e:
+        print(f"Fatal error: {e}")
+    finally:
+        app.close()
@@ -0,0 +1,268 @@
+"""Local unlock agent that keeps derived vault keys in memory between runs"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+CONNECT_TIMEOUT = 0.5
+MAX_REQUEST_SIZE = 64 * 1024
+
+
+def default_socket_path() -> Path:
+    """Per-user socket path, overridable with PWMGR_AGENT_SOCK"""
+    override = os.environ.get('PWMGR_AGENT_SOCK')
+    if override:
+        return Path(override)
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return Path(runtime_dir) / f'pwmgr-{os.getuid()}' / 'agent.sock'
+
+
+def _peer_uid(sock: socket.socket) -> Optional[int]:
+    """Uid of the process at the other end of a Unix socket, None where the platform cannot tell"""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', creds)
+    return uid
+
+
+def _check_private_dir(path: Path):
+    """Refuse a socket directory that another user could have created or can write to"""
+    info = os.lstat(path)
+    if stat.S_ISLNK(info.st_mode) or not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f"{path} is not a directory")
+    if info.st_uid != os.getuid():
+        raise RuntimeError(f"{path} is owned by uid {info.st_uid}, not {os.getuid()}")
+    if stat.S_IMODE(info.st_mode) != 0o700:
+        raise RuntimeError(f"{path} has mode {stat.S_IMODE(info.st_mode):o}; expected 700")
+
+
+class _KeyStore:
+    """Thread-safe in-memory key table with an idle deadline"""
+
+    def __init__(self, idle_timeout: float):
+        self.idle_timeout = idle_timeout
+        self.keys = {}
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def get(self, vault: str) -> Optional[bytes]:
+        with self.lock:
+            self.touch()
+            key = self.keys.get(vault)
+            return bytes(key) if key is not None else None
+
+    def put(self, vault: str, key: bytes):
+        with self.lock:
+            self.touch()
+            self._wipe(vault)
+            self.keys[vault] = bytearray(key)
+
+    def wipe(self, vault: Optional[str] = None):
+        with self.lock:
+            if vault is None:
+                for name in list(self.keys):
+                    self._wipe(name)
+            else:
+                self._wipe(vault)
+
+    def _wipe(self, vault: str):
+        key = self.keys.pop(vault, None)
+        if key is not None:
+            # Best effort: overwrite the buffer before dropping it
+            key[:] = b'\x00' * len(key)
+
+    def idle_expired(self) -> bool:
+        return time.monotonic() - self.last_used > self.idle_timeout
+
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        if not self._peer_allowed():
+            return
+        line = self.rfile.readline(MAX_REQUEST_SIZE)
+        try:
+            request = json.loads(line)
+            response = self.server.dispatch(request)
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+
+    def _peer_allowed(self) -> bool:
+        """Reject connections from other users where the platform tells us who they are"""
+        uid = _peer_uid(self.request)
+        return uid is None or uid == os.getuid()
+
+
+class UnlockAgent(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server holding derived Fernet keys until idle timeout or lock"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Optional[Path] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.store = _KeyStore(idle_timeout)
+        self._prepare_socket_dir()
+
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.socket_path), _AgentHandler)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.socket_path, 0o600)
+
+    def _prepare_socket_dir(self):
+        self.socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # In a shared /tmp another user may have created the directory first
+        _check_private_dir(self.socket_path.parent)
+        if self.socket_path.exists():
+            if AgentClient(self.socket_path).ping():
+                raise RuntimeError(f"Agent already running on {self.socket_path}")
+            self.socket_path.unlink()
+
+    def dispatch(self, request: dict) -> dict:
+        cmd = request.get('cmd')
+        vault = request.get('vault')
+        if cmd == 'ping':
+            return {'ok': True}
+        if cmd == 'get':
+            key = self.store.get(vault)
+            if key is None:
+                return {'ok': False, 'error': 'locked'}
+            return {'ok': True, 'key': key.decode()}
+        if cmd == 'put':
+            self.store.put(vault, request['key'].encode())
+            return {'ok': True}
+        if cmd == 'lock':
+            self.store.wipe(vault)
+            return {'ok': True}
+        if cmd == 'stop':
+            self.store.wipe()
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True}
+        return {'ok': False, 'error': f'unknown command: {cmd}'}
+
+    def _watch_idle(self):
+        while True:
+            time.sleep(1)
+            if self.store.idle_expired():
+                self.store.wipe()
+                self.shutdown()
+                return
+
+    def run(self):
+        """Serve until stopped or idle for longer than the timeout"""
+        threading.Thread(target=self._watch_idle, daemon=True).start()
+        try:
+            self.serve_forever()
+        finally:
+            self.store.wipe()
+            self.server_close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class AgentClient:
+    """Talks to a running UnlockAgent; every call fails soft when none is running"""
+
+    def __init__(self, socket_path: Optional[Path] = None):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+
+    def _request(self, payload: dict) -> Optional[dict]:
+        if not self.socket_path.exists():
+            return None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(CONNECT_TIMEOUT)
+                sock.connect(str(self.socket_path))
+                # Never hand a key to, or take one from, a socket another user is serving
+                uid = _peer_uid(sock)
+                if uid is not None and uid != os.getuid():
+                    return None
+                sock.sendall(json.dumps(payload).encode() + b'\n')
+                with sock.makefile('rb') as f:
+                    return json.loads(f.readline(MAX_REQUEST_SIZE))
+        except (OSError, ValueError):
+            return None
+
+    def ping(self) -> bool:
+        response = self._request({'cmd': 'ping'})
+        return bool(response and response.get('ok'))
+
+    def get_key(self, vault: str) -> Optional[bytes]:
+        response = self._request({'cmd': 'get', 'vault': vault})
+        if response and response.get('ok'):
+            return response['key'].encode()
+        return None
+
+    def put_key(self, vault: str, key: bytes) -> bool:
+        response = self._request({'cmd': 'put', 'vault': vault, 'key': key.decode()})
+        return bool(response and response.get('ok'))
+
+    def lock(self, vault: Optional[str] = None) -> bool:
+        response = self._request({'cmd': 'lock', 'vault': vault})
+        return bool(response and response.get('ok'))
+
+    def stop(self) -> bool:
+        response = self._request({'cmd': 'stop'})
+        return bool(response and response.get('ok'))
+
+    def start(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT, wait: float = 2.0) -> bool:
+        """Spawn a detached agent process if none is answering"""
+        if self.ping():
+            return True
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), 'serve',
+             '--socket', str(self.socket_path), '--timeout', str(idle_timeout)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            if self.ping():
+                return True
+            time.sleep(0.05)
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Password manager unlock agent")
+    parser.add_argument('command', choices=['serve', 'status', 'lock', 'stop'])
+    parser.add_argument('--socket', help="Socket path (default: per-user runtime dir)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="Idle seconds before keys are wiped and the agent exits")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        UnlockAgent(args.socket, args.timeout).run()
+        return
+
+    client = AgentClient(args.socket)
+    if args.command == 'status':
+        print("running" if client.ping() else "not running")
+    elif args.command == 'lock':
+        print("locked" if client.lock() else "agent not running")
+    elif args.command == 'stop':
+        print("stopped" if client.stop() else "agent not running")
+
+
+if __name__ == "__main__":
+    main()
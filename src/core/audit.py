@@ -0,0 +1,117 @@
+"""Vault-wide audit for reused, weak and stale passwords"""
+import hashlib
+import hmac
+import os
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from core.password import DEFAULT_CHUNK_SIZE
+
+DEFAULT_STALE_DAYS = 365
+# Entries rated below this on the 0-4 scale are reported as weak
+DEFAULT_MIN_STRENGTH = 3
+
+
+class AuditEntry(NamedTuple):
+    id: int
+    website: str
+    username: str
+    updated_at: str
+
+
+class WeakEntry(NamedTuple):
+    entry: AuditEntry
+    strength: int
+    guesses_log10: float
+    patterns: List[str]
+
+
+class BreachedEntry(NamedTuple):
+    entry: AuditEntry
+    occurrences: int
+
+
+class AuditReport(NamedTuple):
+    scanned: int
+    reused: List[List[AuditEntry]]
+    weak: List[WeakEntry]
+    stale: List[AuditEntry]
+    failed: List[AuditEntry]
+    breached: List[BreachedEntry]
+
+
+class VaultAuditor:
+    """
+    Streams every entry through decrypt_many, so tokens are decrypted a chunk
+    at a time (on a worker pool if asked for) and each plaintext is dropped as
+    soon as it has been rated and hashed. Reuse is found by grouping entries on an HMAC
+    of the password under a key that only lives for one audit, so the groups
+    reveal nothing once the audit is over. With a BreachChecker every
+    password is also looked up in the offline breach corpus.
+    """
+
+    def __init__(self, password_manager, encryption, generator, breach_checker=None):
+        self.password_manager = password_manager
+        self.encryption = encryption
+        self.generator = generator
+        self.breach_checker = breach_checker
+
+    def audit(self, stale_days: int = DEFAULT_STALE_DAYS, min_strength: int = DEFAULT_MIN_STRENGTH,
+              batch_size: int = DEFAULT_CHUNK_SIZE, workers: Optional[int] = None,
+              use_processes: bool = False) -> AuditReport:
+        """
+        Audit the whole vault
+        Args:
+            stale_days: Report entries not updated for this many days
+            min_strength: Report entries whose strength (0-4) is below this
+            batch_size: Rows read per page, and the most passwords held decrypted
+                at once; each worker gets a slice of it
+            workers: Decryption workers; defaults to decrypting inline
+            use_processes: Decrypt in processes instead of threads
+        Returns:
+            AuditReport: Findings, with reuse groups ordered largest first
+        """
+        hash_key = os.urandom(32)
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=stale_days)).strftime('%Y-%m-%d %H:%M:%S')
+        groups: Dict[bytes, List[AuditEntry]] = {}
+        weak, stale, failed, breached = [], [], [], []
+        scanned = 0
+
+        # decrypt_many reads ahead of the results it yields; both stay in id order
+        entries = deque()
+        # One chunk per worker in flight, so plaintexts waiting to be rated never
+        # exceed batch_size however many cores there are
+        workers = workers or 1
+        chunk_size = max(1, batch_size // workers)
+
+        def ciphertexts():
+            for page in self.password_manager.iter_encrypted_pages(batch_size):
+                for entry_id, website, username, encrypted, updated_at in page:
+                    entries.append(AuditEntry(entry_id, website, username, updated_at))
+                    yield encrypted
+
+        for result in self.encryption.decrypt_many(ciphertexts(), chunk_size=chunk_size, workers=workers,
+                                                   use_processes=use_processes, max_in_flight=workers):
+            entry = entries.popleft()
+            scanned += 1
+            if entry.updated_at and entry.updated_at < cutoff:
+                stale.append(entry)
+            if result.error:
+                failed.append(entry)
+                continue
+            digest = hmac.new(hash_key, result.value.encode(), hashlib.sha256).digest()
+            groups.setdefault(digest, []).append(entry)
+            strength = self.generator.check_strength(result.value, (entry.website, entry.username))
+            if strength['strength'] < min_strength:
+                weak.append(WeakEntry(entry, strength['strength'], strength['guesses_log10'], strength['patterns']))
+            if self.breach_checker is not None:
+                occurrences = self.breach_checker.lookup(result.value)
+                if occurrences:
+                    breached.append(BreachedEntry(entry, occurrences))
+
+        reused = sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
+        weak.sort(key=lambda item: item.guesses_log10)
+        stale.sort(key=lambda entry: entry.updated_at)
+        breached.sort(key=lambda item: item.occurrences, reverse=True)
+        return AuditReport(scanned, reused, weak, stale, failed, breached)
@@ -0,0 +1,250 @@
+"""
+Offline breached-password lookups against a local copy of the Have I Been
+Pwned SHA-1 corpus, packed into a sorted binary file.
+
+Packed layout (all integers little-endian):
+    header   MAGIC, version (u32), reserved (u32)
+    index    65537 x u64: number of the first record whose hash starts with
+             each 2-byte prefix, the last slot holding the record count
+    records  sorted 20-byte SHA-1 digests, each followed by its count (u32)
+
+A lookup reads the prefix slots, then binary-searches the ~1/65536 of the
+file they bound through mmap, so only a handful of pages are touched.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+# Points at a corpus packed with pack_corpus; a "<path>.bloom" next to it is loaded too
+HIBP_ENV = 'PWMGR_HIBP'
+
+MAGIC = b'HIBPSHA1'
+BLOOM_MAGIC = b'HIBPBLM1'
+VERSION = 1
+DIGEST_SIZE = 20
+RECORD = struct.Struct(f'<{DIGEST_SIZE}sI')
+PREFIXES = 1 << 16
+_HEADER = struct.Struct('<8sII')
+_INDEX = struct.Struct(f'<{PREFIXES + 1}Q')
+DATA_OFFSET = _HEADER.size + _INDEX.size
+_BLOOM_HEADER = struct.Struct('<8sIQ')
+
+# Records buffered before each write while packing
+_WRITE_BATCH = 1 << 14
+
+
+def _digest(password: str) -> bytes:
+    return hashlib.sha1(password.encode()).digest()
+
+
+def pack_corpus(source, dest) -> int:
+    """
+    Convert the downloadable "HASH:COUNT" text file (ordered by hash) into the packed format
+    Args:
+        source: Text corpus, one uppercase hex SHA-1 and its count per line
+        dest: Packed file to write; replaced only once packing succeeds
+    Returns:
+        int: Number of records written
+    """
+    index = [0] * (PREFIXES + 1)
+    previous = b''
+    count = 0
+    tmp = Path(f'{dest}.tmp')
+    with open(source, 'rb') as src, open(tmp, 'wb') as out:
+        out.write(_HEADER.pack(MAGIC, VERSION, 0))
+        out.write(_INDEX.pack(*index))
+        batch = []
+        for line in src:
+            line = line.strip()
+            if not line:
+                continue
+            hex_digest, _, occurrences = line.partition(b':')
+            digest = bytes.fromhex(hex_digest.decode())
+            if len(digest) != DIGEST_SIZE:
+                raise ValueError(f"Not a SHA-1 hash on line {count + 1}")
+            if digest <= previous:
+                raise ValueError("Corpus must be sorted by hash without duplicates")
+            previous = digest
+            index[int.from_bytes(digest[:2], 'big') + 1] += 1
+            batch.append(RECORD.pack(digest, min(int(occurrences or 1), 0xFFFFFFFF)))
+            count += 1
+            if len(batch) >= _WRITE_BATCH:
+                out.write(b''.join(batch))
+                batch.clear()
+        out.write(b''.join(batch))
+
+        # Turn per-prefix counts into the first record number of each prefix
+        for prefix in range(PREFIXES):
+            index[prefix + 1] += index[prefix]
+        out.seek(_HEADER.size)
+        out.write(_INDEX.pack(*index))
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, dest)
+    return count
+
+
+class BloomFilter:
+    """
+    Bit array over SHA-1 digests. The digests are already uniform, so the k
+    bit positions come from double hashing two 64-bit slices of the digest
+    rather than from extra hash functions.
+    """
+
+    def __init__(self, bits: bytearray, num_hashes: int):
+        self.bits = bits
+        self.size = len(bits) * 8
+        self.num_hashes = num_hashes
+
+    @classmethod
+    def sized_for(cls, entries: int, bits_per_entry: int = 10) -> 'BloomFilter':
+        """Empty filter; 10 bits per entry gives about a 1% false positive rate"""
+        size = max(64, entries * bits_per_entry)
+        num_hashes = max(1, round(bits_per_entry * math.log(2)))
+        return cls(bytearray((size + 7) // 8), num_hashes)
+
+    def _positions(self, digest: bytes):
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:16], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (first + i * step) % self.size
+
+    def add(self, digest: bytes) -> None:
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits, size = self.bits, self.size
+        position = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:16], 'little') | 1
+        for _ in range(self.num_hashes):
+            bit = position % size
+            if not bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+            position += step
+        return True
+
+    def save(self, path) -> None:
+        tmp = Path(f'{path}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(_BLOOM_HEADER.pack(BLOOM_MAGIC, self.num_hashes, self.size))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> 'BloomFilter':
+        """Read the whole filter into RAM"""
+        with open(path, 'rb') as f:
+            magic, num_hashes, size = _BLOOM_HEADER.unpack(f.read(_BLOOM_HEADER.size))
+            if magic != BLOOM_MAGIC:
+                raise ValueError(f"{path} is not a breach Bloom filter")
+            bits = bytearray(size // 8)
+            f.readinto(bits)
+        return cls(bits, num_hashes)
+
+
+class BreachChecker:
+    """
+    Looks passwords up in a packed corpus. The file is opened and mapped on
+    first use; with a Bloom filter loaded, passwords that are not in the
+    corpus (nearly all good ones) are answered from RAM without a disk read.
+    """
+
+    def __init__(self, path, bloom_path=None):
+        self.path = Path(path)
+        self.bloom_path = Path(bloom_path) if bloom_path else None
+        self.bloom: Optional[BloomFilter] = None
+        self._file = None
+        self._map = None
+        self._index = None
+
+    @classmethod
+    def from_env(cls) -> Optional['BreachChecker']:
+        path = os.environ.get(HIBP_ENV)
+        if not path:
+            return None
+        bloom_path = Path(f'{path}.bloom')
+        return cls(path, bloom_path if bloom_path.exists() else None)
+
+    def _open(self) -> None:
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a packed breach corpus")
+        self._index = _INDEX.unpack_from(self._map, _HEADER.size)
+        if len(self._map) != DATA_OFFSET + self._index[-1] * RECORD.size:
+            self.close()
+            raise ValueError(f"{self.path} is truncated")
+        if self.bloom_path:
+            self.bloom = BloomFilter.load(self.bloom_path)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        if self._map is None:
+            self._open()
+        return self._index[-1]
+
+    def _search(self, digest: bytes) -> int:
+        prefix = int.from_bytes(digest[:2], 'big')
+        low, high = self._index[prefix], self._index[prefix + 1]
+        mapped = self._map
+        while low < high:
+            middle = (low + high) // 2
+            offset = DATA_OFFSET + middle * RECORD.size
+            found = mapped[offset:offset + DIGEST_SIZE]
+            if found < digest:
+                low = middle + 1
+            elif found > digest:
+                high = middle
+            else:
+                return RECORD.unpack_from(mapped, offset)[1]
+        return 0
+
+    def lookup_digest(self, digest: bytes) -> int:
+        if self._map is None:
+            self._open()
+        if self.bloom is not None and digest not in self.bloom:
+            return 0
+        return self._search(digest)
+
+    def lookup(self, password: str) -> int:
+        """How many times the password appears in the corpus, 0 if never"""
+        return self.lookup_digest(_digest(password))
+
+    def lookup_many(self, passwords: Iterable[str]) -> List[int]:
+        """Counts in input order; lookups run in hash order so the file is read front to back"""
+        digests = [_digest(password) for password in passwords]
+        counts = [0] * len(digests)
+        for position in sorted(range(len(digests)), key=digests.__getitem__):
+            counts[position] = self.lookup_digest(digests[position])
+        return counts
+
+    def build_bloom(self, bloom_path=None, bits_per_entry: int = 10) -> BloomFilter:
+        """
+        Build the Bloom filter from the packed corpus and save it next to it
+        Args:
+            bloom_path: Where to save it; defaults to "<corpus>.bloom"
+            bits_per_entry: Filter bits per breached hash; more means fewer disk reads
+        """
+        if self._map is None:
+            self._open()
+        bloom = BloomFilter.sized_for(len(self), bits_per_entry)
+        for offset in range(DATA_OFFSET, len(self._map), RECORD.size):
+            bloom.add(self._map[offset:offset + DIGEST_SIZE])
+        self.bloom_path = Path(bloom_path or f'{self.path}.bloom')
+        bloom.save(self.bloom_path)
+        self.bloom = bloom
+        return bloom
@@ -0,0 +1,110 @@
+"""Content-addressed chunk store used by incremental backups"""
+import hashlib
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List
+
+# SQLite's default page size; changes to a database touch whole pages, so
+# chunk boundaries only ever fall between pages
+PAGE_SIZE = 4096
+
+
+class ChunkStore:
+    """
+    Stores zlib-compressed chunks under their SHA-256, two hex digits per
+    fan-out directory. A chunk is written once no matter how many snapshots
+    reference it.
+    """
+
+    def __init__(self, root, avg_pages: int = 16, min_pages: int = 4, max_pages: int = 256):
+        self.root = Path(root)
+        self.avg_pages = avg_pages
+        self.min_pages = min_pages
+        self.max_pages = max_pages
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def split(self, f: BinaryIO) -> Iterator[bytes]:
+        """
+        Content-defined chunking at page granularity: a chunk ends after a
+        page whose CRC is divisible by avg_pages, within min/max bounds.
+        Editing one page therefore only changes the chunk holding it.
+        """
+        pages = []
+        while True:
+            page = f.read(PAGE_SIZE)
+            if not page:
+                break
+            pages.append(page)
+            at_boundary = zlib.crc32(page) % self.avg_pages == 0
+            if (at_boundary and len(pages) >= self.min_pages) or len(pages) >= self.max_pages:
+                yield b''.join(pages)
+                pages = []
+        if pages:
+            yield b''.join(pages)
+
+    def put(self, data: bytes) -> str:
+        """Store a chunk unless already present; returns its digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # A unique name, so two backups storing the same chunk never share a file
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=path.parent)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(zlib.compress(data))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Read a chunk back, checking it still matches its digest"""
+        data = zlib.decompress(self._path(digest).read_bytes())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Chunk {digest} is corrupted")
+        return data
+
+    def exists(self, digest: str) -> bool:
+        return self._path(digest).exists()
+
+    def store_file(self, f: BinaryIO) -> dict:
+        """Chunk and store a file; returns its manifest entry"""
+        file_hash = hashlib.sha256()
+        size = 0
+        chunks = []
+        for chunk in self.split(f):
+            file_hash.update(chunk)
+            size += len(chunk)
+            chunks.append(self.put(chunk))
+        return {'size': size, 'sha256': file_hash.hexdigest(), 'chunks': chunks}
+
+    def restore_file(self, entry: dict, f: BinaryIO) -> None:
+        """Write a file described by a manifest entry, checking the result"""
+        file_hash = hashlib.sha256()
+        for digest in entry['chunks']:
+            data = self.get(digest)
+            file_hash.update(data)
+            f.write(data)
+        if file_hash.hexdigest() != entry['sha256']:
+            raise ValueError("Restored file does not match its manifest")
+
+    def all_digests(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return [path.name for path in self.root.glob('??/*') if not path.name.endswith('.tmp')]
+
+    def collect_garbage(self, referenced: Iterable[str]) -> int:
+        """Delete chunks no manifest references; returns how many were removed"""
+        keep = set(referenced)
+        removed = 0
+        for digest in self.all_digests():
+            if digest not in keep:
+                self._path(digest).unlink()
+                removed += 1
+        return removed
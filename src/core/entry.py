@@ -0,0 +1,135 @@
+"""Vault entries that decrypt on demand, and a short-lived cache of them"""
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_TTL_SECONDS = 60
+
+_UNRESOLVED = object()
+
+
+class Entry:
+    """
+    One passwords row. The ciphertext is only decrypted the first time
+    .password is read, and the category name only looked up when asked for,
+    so callers that just want metadata never touch Fernet.
+
+    Supports entry['field'] and to_dict() for code written against the old
+    dict results.
+    """
+
+    __slots__ = ('id', 'website', 'username', 'notes', 'created', 'updated', 'category_id',
+                 '_encrypted', '_encryption', '_password', '_category', '_category_name')
+
+    FIELDS = ('id', 'website', 'username', 'password', 'notes', 'created', 'updated', 'category')
+
+    def __init__(self, row, encryption, category_name: Callable[[int], Optional[str]]):
+        """
+        Args:
+            row: passwords row in table order (id, website, username, encrypted_password, notes,
+                 created_at, updated_at, category_id)
+            encryption: Encryption able to open the ciphertext
+            category_name: Looks a category id up, e.g. PasswordManager.get_category_name
+        """
+        (self.id, self.website, self.username, self._encrypted, self.notes,
+         self.created, self.updated, self.category_id) = row
+        self._encryption = encryption
+        self._password = None
+        self._category = _UNRESOLVED
+        self._category_name = category_name
+
+    @property
+    def password(self) -> str:
+        if self._password is None:
+            if self._encryption is None:
+                raise ValueError("Vault is locked")
+            self._password = self._encryption.decrypt(self._encrypted)
+        return self._password
+
+    @property
+    def category(self) -> Optional[str]:
+        if self._category is _UNRESOLVED:
+            self._category = self._category_name(self.category_id) if self.category_id else None
+        return self._category
+
+    def wipe(self) -> None:
+        """Drop the plaintext and the key, so the entry cannot be read again"""
+        self._password = None
+        self._encryption = None
+
+    def __getitem__(self, field: str):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"Entry(id={self.id!r}, website={self.website!r}, username={self.username!r})"
+
+
+class EntryCache:
+    """
+    LRU of recently read entries, each kept for at most ttl seconds.
+
+    Entries are stored by id; lookup keys such as (website, username) only
+    point at ids, so invalidating an id covers every key that found it.
+    clear() wipes every cached entry, which is what locking relies on.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._keys = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Entry]:
+        entry_id = self._keys.get(key)
+        return self.get_by_id(entry_id) if entry_id is not None else None
+
+    def get_by_id(self, entry_id: int) -> Optional[Entry]:
+        cached = self._entries.get(entry_id)
+        if cached is None:
+            return None
+        expires, entry, _ = cached
+        if expires <= self.clock():
+            self._remove(entry_id)
+            return None
+        self._entries.move_to_end(entry_id)
+        return entry
+
+    def put(self, entry: Entry, *keys: Hashable) -> None:
+        """Cache an entry, reachable by its id and any of keys"""
+        if self.max_entries <= 0:
+            return
+        if entry.id in self._entries:
+            keys = tuple(set(keys) | set(self._entries[entry.id][2]))
+        self._entries[entry.id] = (self.clock() + self.ttl, entry, keys)
+        self._entries.move_to_end(entry.id)
+        for key in keys:
+            self._keys[key] = entry.id
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, entry_id: int) -> None:
+        if entry_id in self._entries:
+            self._remove(entry_id)
+
+    def clear(self) -> None:
+        for _, entry, _ in self._entries.values():
+            entry.wipe()
+        self._entries.clear()
+        self._keys.clear()
+
+    def _remove(self, entry_id: int) -> None:
+        _, _, keys = self._entries.pop(entry_id)
+        for key in keys:
+            if self._keys.get(key) == entry_id:
+                del self._keys[key]
@@ -1,15 +1,44 @@
+import math
+import os
 import secrets
 import string
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
+
+if TYPE_CHECKING:
+    from core.wordlist import Wordlist
+
+# Random bytes drawn per os.urandom call in batch mode
+BATCH_BUFFER_SIZE = 64 * 1024
+
+# Used when no external wordlist is configured
+DEFAULT_WORDS = (
+    "apple", "banana", "cherry", "dragon", "eagle", "forest",
+    "garden", "harbor", "island", "jungle", "knight", "lemon",
+    "mountain", "ninja", "orange", "pepper", "queen", "river",
+    "silver", "tiger", "umbrella", "violet", "window", "yellow"
+)
 
 class PasswordGen:
     """Generate secure password with customizable options"""
     
-    def __init__(self):
+    def __init__(self, wordlist: Optional['Wordlist'] = None):
+        self._wordlist = wordlist
         self.lowercase = string.ascii_lowercase
         self.uppercase = string.ascii_uppercase
         self.digits = string.digits
         self.symbols = "!@#$%^&*()_+-=[]{}|;:,.<>?"
 
+    @property
+    def wordlist(self) -> 'Wordlist':
+        """Configured or built-in wordlist, resolved on first use so plain generation never imports it"""
+        # Compare with None: truth-testing a Wordlist would call __len__ and load it
+        if self._wordlist is None:
+            from core.wordlist import Wordlist
+
+            wordlist = Wordlist.from_env()
+            self._wordlist = wordlist if wordlist is not None else Wordlist(words=DEFAULT_WORDS)
+        return self._wordlist
+
     def generate(self, length=16, use_lowercase=True, use_uppercase=True, 
                 use_digits=True, use_symbols=True) -> str:
         """Generate a password with specified requirements"""
@@ -45,44 +74,80 @@ class PasswordGen:
         secrets.SystemRandom().shuffle(password_list)
         return ''.join(password_list)
     
+    def generate_batch(self, count, length=16, use_lowercase=True, use_uppercase=True,
+                       use_digits=True, use_symbols=True) -> Iterator[str]:
+        """
+        Generate count passwords with the same guarantees as generate, one
+        character from every selected class, from bulk os.urandom buffers.
+        Bytes are mapped to characters with bytes.translate, dropping the
+        top 256 % len(alphabet) byte values so every character is equally
+        likely, and passwords missing a class are rejected whole, which keeps
+        the result uniform over all passwords that satisfy the rules.
+        """
+        if length < 8:
+            raise ValueError("Password must be at least 8 characters long")
+
+        classes = [chars for chars, used in ((self.lowercase, use_lowercase), (self.uppercase, use_uppercase),
+                                             (self.digits, use_digits), (self.symbols, use_symbols)) if used]
+        if not classes:
+            raise ValueError("At least one character type must be selected")
+
+        alphabet = ''.join(classes).encode('ascii')
+        limit = 256 - 256 % len(alphabet)
+        table = bytes(alphabet[value % len(alphabet)] for value in range(256))
+        rejected = bytes(range(limit, 256))
+        class_sets = [frozenset(chars) for chars in classes]
+
+        produced = 0
+        pending = ''
+        while produced < count:
+            pending += os.urandom(BATCH_BUFFER_SIZE).translate(table, rejected).decode('ascii')
+            usable = len(pending) - len(pending) % length
+            for start in range(0, usable, length):
+                password = pending[start:start + length]
+                if all(not chars.isdisjoint(password) for chars in class_sets):
+                    yield password
+                    produced += 1
+                    if produced == count:
+                        return
+            pending = pending[usable:]
+
     def generate_memorable(self, num_words=3, separator="-") -> str:
         """Generate a memorable password using words"""
-        word_list = [
-            "apple", "banana", "cherry", "dragon", "eagle", "forest",
-            "garden", "harbor", "island", "jungle", "knight", "lemon",
-            "mountain", "ninja", "orange", "pepper", "queen", "river",
-            "silver", "tiger", "umbrella", "violet", "window", "yellow"
-        ]
-
-        words = [secrets.choice(word_list) for _ in range(num_words)]
+        return self.generate_passphrase(num_words, separator)[0]
+
+    def generate_passphrase(self, num_words=3, separator="-") -> Tuple[str, float]:
+        """Memorable password plus its entropy in bits"""
+        words = [self.wordlist.choice() for _ in range(num_words)]
         words.append(str(secrets.randbelow(100)))
-        return separator.join(words)
+        return separator.join(words), self.passphrase_entropy(num_words)
+
+    def passphrase_entropy(self, num_words=3) -> float:
+        """Bits of entropy of a passphrase: every word plus the trailing number below 100"""
+        return num_words * self.wordlist.bits_per_word + math.log2(100)
+
+    def check_strength(self, password: str, user_inputs=()) -> dict:
+        """
+        Check password strength
+        Args:
+            password: Password to rate
+            user_inputs: Words tied to the entry (website, username) that an attacker would try first
+        Returns:
+            dict: Character class flags, the estimated guesses, strength 0-4 and score 0-100
+        """
+        from core.strength import estimate
 
-    def check_strength(self, password: str) -> dict:
-        """Check password strength"""
-        metrics = {
+        result = estimate(password, user_inputs)
+        return {
             'length': len(password),
             'has_lowercase': any(c.islower() for c in password),
             'has_uppercase': any(c.isupper() for c in password),
             'has_digits': any(c.isdigit() for c in password),
             'has_symbols': any(c in self.symbols for c in password),
-            'score': 0
-        }
-
-        score = 0
-        if metrics['length'] >= 12:
-            score += 25
-        elif metrics['length'] >= 8:
-            score += 10
-        
-        if metrics['has_lowercase']:
-            score += 25
-        if metrics['has_uppercase']:
-            score += 25
-        if metrics['has_digits']:
-            score += 15
-        if metrics['has_symbols']:
-            score += 10
-
-        metrics['score'] = min(100, score)
-        return metrics
\ No newline at end of file
+            'guesses': result.guesses,
+            'guesses_log10': result.guesses_log10,
+            'strength': result.score,
+            'patterns': [match.pattern for match in result.sequence],
+            # 10^12 guesses and up is out of reach for an offline attack on a slow hash
+            'score': min(100, round(result.guesses_log10 * 100 / 12))
+        }
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""Streaming import of credentials exported by browsers and other password managers"""
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional, TextIO
+from urllib.parse import urlsplit
+
+FORMAT_CHROME = 'chrome'
+FORMAT_FIREFOX = 'firefox'
+FORMAT_BITWARDEN_CSV = 'bitwarden-csv'
+FORMAT_BITWARDEN_JSON = 'bitwarden-json'
+FORMAT_KEEPASS = 'keepass'
+
+FORMATS = (FORMAT_CHROME, FORMAT_FIREFOX, FORMAT_BITWARDEN_CSV, FORMAT_BITWARDEN_JSON, FORMAT_KEEPASS)
+
+DEFAULT_BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+
+
+class Credential(NamedTuple):
+    website: str
+    username: str
+    password: str
+    notes: Optional[str]
+
+
+class ImportStats:
+    """Running totals reported to the progress callback after every batch"""
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"ImportStats(read={self.read}, imported={self.imported}, duplicates={self.duplicates}, "
+                f"skipped={self.skipped}, errors={self.errors}, rows_per_second={self.rows_per_second:.0f})")
+
+
+def normalize_website(url: str, fallback: str = '') -> str:
+    """Reduce a URL to its lower-cased host without 'www.'; keep plain names as they are"""
+    url = (url or '').strip()
+    if not url:
+        return (fallback or '').strip()
+    parts = urlsplit(url if '://' in url else f'//{url}')
+    host = (parts.hostname or '').lower()
+    if not host:
+        return url
+    return host[4:] if host.startswith('www.') else host
+
+
+def detect_format(path: Path) -> str:
+    """Guess the exporter from the file extension and CSV header"""
+    if path.suffix.lower() == '.json':
+        return FORMAT_BITWARDEN_JSON
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = {column.strip().lower() for column in next(csv.reader(f), [])}
+    if {'login_uri', 'login_username', 'login_password'} <= header:
+        return FORMAT_BITWARDEN_CSV
+    if {'httprealm', 'formactionorigin'} & header:
+        return FORMAT_FIREFOX
+    if {'title', 'group'} <= header or {'account', 'login name'} <= header:
+        return FORMAT_KEEPASS
+    if {'name', 'url', 'username', 'password'} <= header:
+        return FORMAT_CHROME
+    raise ValueError(f"Unrecognised export format: {path}")
+
+
+def _lower_keys(row: dict) -> dict:
+    return {(key or '').strip().lower(): value or '' for key, value in row.items()}
+
+
+def _read_csv(f: TextIO, fmt: str) -> Iterator[Credential]:
+    for row in csv.DictReader(f):
+        row = _lower_keys(row)
+        if fmt == FORMAT_CHROME:
+            yield Credential(normalize_website(row.get('url'), row.get('name')),
+                             row.get('username', ''), row.get('password', ''), row.get('note') or None)
+        elif fmt == FORMAT_FIREFOX:
+            yield Credential(normalize_website(row.get('url')),
+                             row.get('username', ''), row.get('password', ''), None)
+        elif fmt == FORMAT_BITWARDEN_CSV:
+            if row.get('type', 'login') != 'login':
+                continue
+            yield Credential(normalize_website(row.get('login_uri'), row.get('name')),
+                             row.get('login_username', ''), row.get('login_password', ''),
+                             row.get('notes') or None)
+        elif fmt == FORMAT_KEEPASS:
+            # KeePassXC and KeePass 2.x name their columns differently
+            yield Credential(
+                normalize_website(row.get('url') or row.get('web site'), row.get('title') or row.get('account')),
+                row.get('username') or row.get('login name', ''),
+                row.get('password', ''),
+                row.get('notes') or row.get('comments') or None,
+            )
+
+
+def _iter_top_level(f: TextIO) -> Iterator:
+    """
+    Yield ('key', value) for small top-level members and ('item', value) for
+    each element of the top-level "items" array, decoding one element at a
+    time so the whole document is never held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(READ_SIZE)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    def expect(chars):
+        nonlocal pos
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] not in chars:
+            raise ValueError(f"Malformed JSON export, expected one of {chars!r}")
+        pos += 1
+        return buffer[pos - 1]
+
+    def decode():
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(buffer) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+
+    fill()
+    expect('{')
+    skip_whitespace()
+    if buffer[pos:pos + 1] == '}':
+        return
+    while True:
+        key = decode()
+        expect(':')
+        if key == 'items':
+            expect('[')
+            skip_whitespace()
+            if buffer[pos:pos + 1] == ']':
+                pos += 1
+            else:
+                while True:
+                    yield 'item', decode()
+                    if expect(',]') == ']':
+                        break
+        else:
+            yield 'key', (key, decode())
+        if expect(',}') == '}':
+            return
+
+
+def _read_bitwarden_json(f: TextIO) -> Iterator[Credential]:
+    for kind, value in _iter_top_level(f):
+        if kind == 'key':
+            key, data = value
+            if key == 'encrypted' and data:
+                raise ValueError("Encrypted Bitwarden exports are not supported")
+            continue
+        login = value.get('login')
+        if not login:
+            continue
+        uris = login.get('uris') or []
+        uri = uris[0].get('uri', '') if uris else ''
+        yield Credential(normalize_website(uri, value.get('name')),
+                         login.get('username') or '', login.get('password') or '',
+                         value.get('notes') or None)
+
+
+def read_export(path: Path, fmt: Optional[str] = None) -> Iterator[Credential]:
+    """Stream normalised credentials from an export file"""
+    path = Path(path)
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if fmt == FORMAT_BITWARDEN_JSON:
+            yield from _read_bitwarden_json(f)
+        else:
+            yield from _read_csv(f, fmt)
+
+
+class CredentialImporter:
+    """Dedupes, encrypts in parallel batches and writes each batch in one transaction"""
+
+    def __init__(self, password_manager, encryption, batch_size: int = DEFAULT_BATCH_SIZE,
+                 progress: Optional[Callable[[ImportStats], None]] = None):
+        self.password_manager = password_manager
+        self.encryption = encryption
+        self.batch_size = batch_size
+        self.progress = progress
+
+    def import_file(self, path, fmt: Optional[str] = None) -> ImportStats:
+        """
+        Import one export file
+        Args:
+            path: Export file
+            fmt: One of FORMATS, detected from the file when None
+        Returns:
+            ImportStats: Totals for the whole file
+        """
+        stats = ImportStats()
+        # Only (website, username) keys are kept for the whole run, never passwords
+        seen = set(self.password_manager.iter_account_keys())
+        batch = []
+        for credential in read_export(path, fmt):
+            stats.read += 1
+            if not credential.website or not credential.password:
+                stats.skipped += 1
+                continue
+            key = (credential.website, credential.username)
+            if key in seen:
+                stats.duplicates += 1
+                continue
+            seen.add(key)
+            batch.append(credential)
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch, stats)
+                batch = []
+        if batch:
+            self._write_batch(batch, stats)
+        return stats
+
+    def _write_batch(self, batch, stats: ImportStats):
+        rows = []
+        for result in self.encryption.encrypt_many(credential.password for credential in batch):
+            if result.error:
+                stats.errors += 1
+                continue
+            credential = batch[result.index]
+            rows.append((credential.website, credential.username, result.value, credential.notes))
+        written = self.password_manager.add_passwords(rows, chunk_size=self.batch_size)
+        stats.imported += written
+        stats.errors += len(rows) - written
+        if self.progress:
+            self.progress(stats)
@@ -0,0 +1,153 @@
+"""Pluggable key derivation and the vault header that records its parameters"""
+import base64
+import hashlib
+import json
+import os
+import time
+from typing import Optional, Tuple
+
+try:
+    from argon2.low_level import Type as _Argon2Type, hash_secret_raw as _argon2_hash
+except ImportError:  # argon2-cffi is optional
+    _argon2_hash = None
+
+KDF_PBKDF2 = 'pbkdf2-sha256'
+KDF_SCRYPT = 'scrypt'
+KDF_ARGON2ID = 'argon2id'
+
+KEY_LENGTH = 32
+SALT_LENGTH = 16
+
+# Parameters every vault used before the header existed
+LEGACY_KDF = KDF_PBKDF2
+LEGACY_PARAMS = {'iterations': 100000}
+
+DEFAULT_PARAMS = {
+    KDF_PBKDF2: {'iterations': 600000},
+    KDF_SCRYPT: {'n': 2 ** 15, 'r': 8, 'p': 1},
+    KDF_ARGON2ID: {'time_cost': 3, 'memory_cost': 64 * 1024, 'parallelism': 4},
+}
+
+SCRYPT_MAX_N = 2 ** 20
+ARGON2_MAX_TIME_COST = 64
+
+
+def available_kdfs() -> list:
+    """KDFs usable on this host, strongest first"""
+    kdfs = [KDF_SCRYPT, KDF_PBKDF2]
+    if _argon2_hash is not None:
+        kdfs.insert(0, KDF_ARGON2ID)
+    return kdfs
+
+
+def default_kdf() -> str:
+    return available_kdfs()[0]
+
+
+def derive(kdf: str, params: dict, password: bytes, salt: bytes) -> bytes:
+    """Derive a raw 32-byte key"""
+    if kdf == KDF_PBKDF2:
+        return hashlib.pbkdf2_hmac('sha256', password, salt, params['iterations'], KEY_LENGTH)
+    if kdf == KDF_SCRYPT:
+        n, r, p = params['n'], params['r'], params['p']
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p, dklen=KEY_LENGTH)
+    if kdf == KDF_ARGON2ID:
+        if _argon2_hash is None:
+            raise ValueError("argon2id requires the argon2-cffi package")
+        return _argon2_hash(password, salt, time_cost=params['time_cost'],
+                            memory_cost=params['memory_cost'], parallelism=params['parallelism'],
+                            hash_len=KEY_LENGTH, type=_Argon2Type.ID)
+    raise ValueError(f"Unknown KDF: {kdf}")
+
+
+def _time_derive(kdf: str, params: dict) -> float:
+    """Seconds taken by one derivation with a throwaway password and salt"""
+    start = time.perf_counter()
+    derive(kdf, params, b'calibration', os.urandom(SALT_LENGTH))
+    return time.perf_counter() - start
+
+
+def calibrate(kdf: Optional[str] = None, target_ms: float = 300) -> Tuple[str, dict]:
+    """
+    Benchmark this host and pick parameters that take about target_ms to unlock
+    Args:
+        kdf: KDF to tune, defaults to the strongest available one
+        target_ms: Desired unlock latency in milliseconds
+    Returns:
+        Tuple[str, dict]: KDF name and its parameters
+    """
+    kdf = kdf or default_kdf()
+    target = target_ms / 1000
+
+    if kdf == KDF_PBKDF2:
+        probe = 50000
+        elapsed = _time_derive(kdf, {'iterations': probe})
+        iterations = int(probe * target / max(elapsed, 1e-6))
+        return kdf, {'iterations': max(LEGACY_PARAMS['iterations'], iterations)}
+
+    if kdf == KDF_SCRYPT:
+        # scrypt cost is linear in n, which has to stay a power of two
+        params = dict(DEFAULT_PARAMS[KDF_SCRYPT], n=2 ** 14)
+        while params['n'] < SCRYPT_MAX_N and _time_derive(kdf, params) * 2 <= target:
+            params['n'] *= 2
+        return kdf, params
+
+    if kdf == KDF_ARGON2ID:
+        params = dict(DEFAULT_PARAMS[KDF_ARGON2ID], time_cost=1)
+        elapsed = _time_derive(kdf, params)
+        params['time_cost'] = min(ARGON2_MAX_TIME_COST, max(1, round(target / max(elapsed, 1e-6))))
+        return kdf, params
+
+    raise ValueError(f"Unknown KDF: {kdf}")
+
+
+class VaultHeader:
+    """KDF name, parameters and salt, stored alongside the encrypted entries"""
+
+    VERSION = 1
+
+    def __init__(self, kdf: str, params: dict, salt: bytes):
+        self.kdf = kdf
+        self.params = dict(params)
+        self.salt = salt
+
+    @classmethod
+    def new(cls, kdf: Optional[str] = None, params: Optional[dict] = None) -> 'VaultHeader':
+        """Fresh header with a random salt"""
+        kdf = kdf or default_kdf()
+        return cls(kdf, params or DEFAULT_PARAMS[kdf], os.urandom(SALT_LENGTH))
+
+    @classmethod
+    def legacy(cls, salt: bytes) -> 'VaultHeader':
+        """Header describing a vault created before headers existed"""
+        return cls(LEGACY_KDF, LEGACY_PARAMS, salt)
+
+    def derive_key(self, master_password: bytes) -> bytes:
+        """Derive the url-safe base64 key Fernet expects"""
+        return base64.urlsafe_b64encode(derive(self.kdf, self.params, master_password, self.salt))
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'version': self.VERSION,
+            'kdf': self.kdf,
+            'params': self.params,
+            'salt': base64.b64encode(self.salt).decode(),
+        }, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, data: str) -> 'VaultHeader':
+        header = json.loads(data)
+        if header.get('version') != cls.VERSION:
+            raise ValueError(f"Unsupported vault header version: {header.get('version')}")
+        return cls(header['kdf'], header['params'], base64.b64decode(header['salt']))
+
+    def is_legacy(self) -> bool:
+        return self.kdf == LEGACY_KDF and self.params == LEGACY_PARAMS
+
+    def __eq__(self, other):
+        return (isinstance(other, VaultHeader) and self.kdf == other.kdf
+                and self.params == other.params and self.salt == other.salt)
+
+    def __repr__(self):
+        return f"VaultHeader(kdf={self.kdf!r}, params={self.params!r})"
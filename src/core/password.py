@@ -1,20 +1,124 @@
 import os
 import base64
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+import hmac
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Union
+from cryptography.fernet import Fernet, InvalidToken
+from core.kdf import VaultHeader, derive
+
+DEFAULT_CHUNK_SIZE = 256
+
+# Ciphertexts are either Fernet tokens as text (the original format) or the
+# same tokens base64-decoded to raw bytes, which SQLite stores as BLOBs a
+# quarter smaller. decrypt accepts both, so a vault can be converted in place.
+Ciphertext = Union[str, bytes]
+
+
+def token_to_raw(token: str) -> bytes:
+    """Raw bytes of a text Fernet token"""
+    return base64.urlsafe_b64decode(token)
+
+
+def _as_token(ciphertext: Ciphertext) -> bytes:
+    if isinstance(ciphertext, str):
+        return ciphertext.encode()
+    return base64.urlsafe_b64encode(ciphertext)
+
+
+class BatchResult(NamedTuple):
+    """Outcome for one item of a batch; exactly one of value/error is set"""
+    index: int
+    value: Optional[Ciphertext]
+    error: Optional[str]
+
+
+def _process_items(operation: str, fernet: Fernet, start: int, items: Iterable[Ciphertext],
+                   binary: bool = False) -> Iterator[BatchResult]:
+    """Encrypt or decrypt items one by one, numbering results from start"""
+    for offset, item in enumerate(items, start):
+        try:
+            if operation == 'encrypt':
+                token = fernet.encrypt(item.encode() if isinstance(item, str) else item)
+                value = base64.urlsafe_b64decode(token) if binary else token.decode()
+            else:
+                value = fernet.decrypt(_as_token(item)).decode()
+            yield BatchResult(offset, value, None)
+        except Exception as e:
+            yield BatchResult(offset, None, f"{operation.capitalize()}ion failed: {type(e).__name__} {e}".rstrip())
+
+
+def _process_chunk(operation: str, key: bytes, start: int, chunk: List[Ciphertext],
+                   binary: bool = False) -> List[BatchResult]:
+    """Encrypt or decrypt one chunk; module level so process pools can pickle it"""
+    return list(_process_items(operation, Fernet(key), start, chunk, binary))
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class Encryption:
-    """handles encryption and decryption of passwords"""
+    """
+    handles encryption and decryption of passwords
+
+    Entries are encrypted with a random data key (self.key). The key derived
+    from the master password only wraps that data key, so changing the
+    password or KDF rewrites the wrapped key and nothing else. Vaults without
+    a wrapped key still encrypt entries with the derived key directly.
+
+    With binary set, encrypt returns raw token bytes instead of base64 text.
+    """
     
-    def __init__(self, master_password: str):
-        """initialize encryption with master password"""
-        self.salt = self._get_or_gen_salt()
-        self.key = self._derive_key(master_password.encode(), self.salt)
+    def __init__(self, master_password: str, header: Optional[VaultHeader] = None,
+                 wrapped_key: Optional[str] = None, binary: bool = False):
+        """initialize encryption with master password, the vault's KDF header and wrapped data key"""
+        self.header = header or VaultHeader.legacy(self._get_or_gen_salt())
+        self.salt = self.header.salt
+        self.wrapped_key = wrapped_key
+        self.binary = binary
+        master_key = self._derive_key(master_password.encode(), self.salt)
+        self.key = self._unwrap_key(master_key, wrapped_key) if wrapped_key else master_key
         self.fernet = Fernet(self.key)
+
+    @classmethod
+    def from_key(cls, key: bytes, header: Optional[VaultHeader] = None,
+                 wrapped_key: Optional[str] = None, binary: bool = False) -> 'Encryption':
+        """Build an instance around an already unwrapped data key, skipping the KDF"""
+        instance = cls.__new__(cls)
+        instance.header = header
+        instance.salt = header.salt if header else None
+        instance.wrapped_key = wrapped_key
+        instance.binary = binary
+        instance.key = key
+        instance.fernet = Fernet(key)
+        return instance
+
+    @staticmethod
+    def generate_data_key() -> bytes:
+        """New random data key for a vault"""
+        return Fernet.generate_key()
+
+    @staticmethod
+    def _unwrap_key(master_key: bytes, wrapped_key: str) -> bytes:
+        try:
+            return Fernet(master_key).decrypt(wrapped_key.encode())
+        except InvalidToken:
+            raise ValueError("Incorrect master password")
+
+    def wrap_key(self, master_password: str, header: VaultHeader) -> str:
+        """Wrap this instance's data key under a key derived with the given header"""
+        master_key = header.derive_key(master_password.encode())
+        return Fernet(master_key).encrypt(self.key).decode()
         
     def _get_or_gen_salt(self) -> bytes:
-        '''Get existing salt or generate new one'''
+        '''Get existing salt or generate new one (vaults without a header only)'''
         salt_file = 'salt.bin'
         if os.path.exists(salt_file):
             with open(salt_file, "rb") as f:
@@ -27,35 +131,84 @@ class Encryption:
 
     def _derive_key(self, master_password: bytes, salt: bytes) -> bytes:
         '''Derive encryption key from master password'''
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(master_password))
-        return key
-
-    def encrypt(self, password: str) -> str:
+        raw = derive(self.header.kdf, self.header.params, master_password, salt)
+        return base64.urlsafe_b64encode(raw)
+
+    def encrypt(self, password: str) -> Ciphertext:
         '''Encrypt a password'''
         try:
             encrypted = self.fernet.encrypt(password.encode())
-            return encrypted.decode()
+            return base64.urlsafe_b64decode(encrypted) if self.binary else encrypted.decode()
         except Exception as e:
             raise Exception(f"Encryption failed: {e}")
         
-    def decrypt(self, encrypted_password: str) -> str:
-        '''Decrypt a password'''
+    def decrypt(self, encrypted_password: Ciphertext) -> str:
+        '''Decrypt a password stored either as token text or raw token bytes'''
         try:
-            decrypted = self.fernet.decrypt(encrypted_password.encode())
+            decrypted = self.fernet.decrypt(_as_token(encrypted_password))
             return decrypted.decode()
         except Exception as e:
             raise Exception(f"Decryption failed: {e}")
 
+    def encrypt_many(self, passwords: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     workers: Optional[int] = None, use_processes: bool = False,
+                     max_in_flight: Optional[int] = None) -> Iterator[BatchResult]:
+        """Encrypt a stream of passwords, yielding one BatchResult per item in input order"""
+        return self._run_batch('encrypt', passwords, chunk_size, workers, use_processes, max_in_flight)
+
+    def decrypt_many(self, encrypted_passwords: Iterable[Ciphertext], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     workers: Optional[int] = None, use_processes: bool = False,
+                     max_in_flight: Optional[int] = None) -> Iterator[BatchResult]:
+        """Decrypt a stream of tokens, yielding one BatchResult per item in input order"""
+        return self._run_batch('decrypt', encrypted_passwords, chunk_size, workers, use_processes,
+                               max_in_flight)
+
+    def _run_batch(self, operation: str, items: Iterable[Ciphertext], chunk_size: int,
+                   workers: Optional[int], use_processes: bool,
+                   max_in_flight: Optional[int] = None) -> Iterator[BatchResult]:
+        """
+        Run the batch inline unless the caller asks for more than one worker;
+        at about 10 us an item, a pool costs more than it saves on one core.
+        With workers > 1, chunks fan out to a pool while at most max_in_flight
+        of them (two per worker by default) are submitted or awaiting their
+        turn to be yielded, so memory stays bounded however long the input is.
+        A batch that fits in one chunk still runs inline.
+        """
+        if not workers or workers <= 1:
+            yield from _process_items(operation, self.fernet, 0, items, self.binary)
+            return
+
+        chunks = _chunked(items, chunk_size)
+        first = next(chunks, None)
+        if first is None:
+            return
+        second = next(chunks, None)
+        if second is None:
+            yield from _process_items(operation, self.fernet, 0, first, self.binary)
+            return
+
+        max_in_flight = max(1, max_in_flight or workers * 2)
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        executor = executor_cls(max_workers=workers)
+        pending = deque()
+        start = 0
+        try:
+            for chunk in chain((first, second), chunks):
+                pending.append(executor.submit(_process_chunk, operation, self.key, start, chunk, self.binary))
+                start += len(chunk)
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def verify_master_password(self, master_password: str) -> bool:
         """Verify if the master password is correct"""
         try:
             test_key = self._derive_key(master_password.encode(), self.salt)
-            return test_key == self.key
+            if self.wrapped_key:
+                test_key = self._unwrap_key(test_key, self.wrapped_key)
+            return hmac.compare_digest(test_key, self.key)
         except Exception:
             return False
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""Background auto-backup driven by vault writes"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+DEFAULT_EVERY_WRITES = 25
+DEFAULT_EVERY_MINUTES = 30
+DEFAULT_QUIET_SECONDS = 5
+DEFAULT_KEEP_LAST = 5
+
+
+class AutoBackupScheduler:
+    """
+    Takes an incremental backup on a background thread once enough writes
+    have accumulated (every_writes) or the oldest unsaved write is old enough
+    (every_minutes), but only after the vault has been quiet for
+    quiet_seconds, so a burst of edits or an import produces one snapshot.
+    Snapshots go to their own backups folder (storage.auto_backup_path unless
+    backup_path is given) and retention is applied there after every backup,
+    so manual backups are never pruned.
+
+    Writes are counted through a PasswordManager listener, which only bumps
+    counters under a lock; the snapshot itself uses its own read-only
+    connection, so interactive commands never wait on it.
+    """
+
+    def __init__(self, storage, password_manager, every_writes: int = DEFAULT_EVERY_WRITES,
+                 every_minutes: float = DEFAULT_EVERY_MINUTES, quiet_seconds: float = DEFAULT_QUIET_SECONDS,
+                 keep_last: int = DEFAULT_KEEP_LAST, incremental: bool = True,
+                 backup_path: Optional[str] = None):
+        self.storage = storage
+        self.backup_path = str(backup_path or storage.auto_backup_path)
+        self.every_writes = every_writes
+        self.every_seconds = every_minutes * 60
+        self.quiet_seconds = quiet_seconds
+        self.keep_last = keep_last
+        self.incremental = incremental
+
+        self.pending_writes = 0
+        self.first_write = None
+        self.last_write = None
+        self.last_backup = None
+        self.last_error = None
+        self._retry_at = 0.0
+
+        self._condition = threading.Condition()
+        # Held while a backup runs; manual backups, restore and clear take it too
+        self._backup_lock = threading.Lock()
+        self._paused = 0
+        self._stopping = False
+        self._thread = None
+        password_manager.add_listener(self._on_change)
+
+    def _on_change(self, event, entry_id):
+        now = time.monotonic()
+        with self._condition:
+            self.pending_writes += 1
+            if self.first_write is None:
+                self.first_write = now
+            self.last_write = now
+            self._condition.notify()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='auto-backup', daemon=True)
+            self._thread.start()
+
+    def stop(self, flush: bool = True) -> None:
+        """Stop the thread, first backing up any writes still pending when flush is set"""
+        if self._thread is None:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+        if flush and self.pending_writes and not self._paused:
+            self.backup_now()
+
+    @contextmanager
+    def paused(self):
+        """
+        Hold off automatic backups, waiting for one in progress, while the vault
+        file is replaced or a manual backup is written to the same chunk store
+        """
+        with self._condition:
+            self._paused += 1
+        try:
+            with self._backup_lock:
+                yield
+        finally:
+            with self._condition:
+                self._paused -= 1
+                self._condition.notify()
+
+    def _seconds_until_due(self, now: float) -> Optional[float]:
+        """0 when a backup is due, the time left when one will be, None when nothing is pending"""
+        if not self.pending_writes or self._paused:
+            return None
+        quiet_left = max(self.last_write + self.quiet_seconds, self._retry_at) - now
+        if self.pending_writes >= self.every_writes:
+            return max(0.0, quiet_left)
+        return max(0.0, quiet_left, self.first_write + self.every_seconds - now)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopping:
+                        return
+                    wait = self._seconds_until_due(time.monotonic())
+                    if wait == 0:
+                        break
+                    self._condition.wait(wait)
+            self.backup_now()
+
+    def backup_now(self) -> Optional[str]:
+        """Back up immediately; returns the backup location, None on failure"""
+        with self._backup_lock:
+            with self._condition:
+                taken = self.pending_writes
+                self.pending_writes = 0
+                self.first_write = None
+            try:
+                location = self.storage.create_backup(self.backup_path, incremental=self.incremental)
+                if not location or not self.storage.verify_backup(location):
+                    raise Exception("backup verification failed")
+                self.storage.cleanup_old_backups(self.backup_path, keep_last=self.keep_last)
+                self.last_backup = location
+                self.last_error = None
+                return location
+            except Exception as e:
+                self.last_error = str(e)
+                with self._condition:
+                    # Put the writes back and retry once every_minutes has passed
+                    self.pending_writes += taken
+                    if self.first_write is None:
+                        self.first_write = self.last_write
+                    self._retry_at = time.monotonic() + self.every_seconds
+                return None
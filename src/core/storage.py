@@ -1,16 +1,46 @@
+import hashlib
 import os
 import shutil
+import sqlite3
+import tempfile
+import threading
+import time
 import zipfile
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Iterator, Optional, List
+from core.chunkstore import ChunkStore
+
+MANIFEST_NAME = 'manifest.json'
+CATALOG_NAME = 'catalog.json'
+SYNC_DB_NAME = 'passwords_sync.db'
+CHUNKS_DIR = 'chunks'
+# Automatic backups live in their own folder so retention never touches manual ones
+AUTO_BACKUPS_DIR = 'auto'
+COPY_BUFFER_SIZE = 1024 * 1024
+ZIP64_LIMIT = 0x7FFFFFFF
+
+# progress(pages_copied, total_pages) while a snapshot is taken
+ProgressCallback = Callable[[int, int], None]
 
 class StorageManager:
-    def __init__(self, base_path: str = 'data'):
+    def __init__(self, base_path: str = 'data', pages_per_step: int = 1024, step_sleep: float = 0.0):
+        """
+        Args:
+            base_path: Directory holding the database and backups
+            pages_per_step: Database pages copied per online-backup step
+            step_sleep: Seconds to pause between steps so writers can get in
+        """
         self.base_path = Path(base_path)
         self.db_path = self.base_path / 'passwords.db'
         self.salt_path = self.base_path / 'salt.bin'
+        self.auto_backup_path = self.base_path / 'backups' / AUTO_BACKUPS_DIR
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self._catalog_lock = threading.Lock()
         self.init_storage()
 
     def init_storage(self):
@@ -18,99 +48,363 @@ class StorageManager:
         self.base_path.mkdir(exist_ok=True)
         (self.base_path / 'backups').mkdir(exist_ok=True)
 
-    def create_backup(self, backup_path: Optional[str] = None) -> Optional[str]:
+    @contextmanager
+    def snapshot(self, progress: Optional[ProgressCallback] = None) -> Iterator[Path]:
+        """
+        Consistent copy of the live database taken with the SQLite online
+        backup API, pages_per_step pages at a time with step_sleep between
+        steps. The source connection pins one read transaction for the whole
+        copy: in WAL mode that does not block writers, and it stops the backup
+        from restarting every time another connection commits. Yields the
+        path of a temporary file that is removed afterwards.
+        """
+        fd, tmp_name = tempfile.mkstemp(dir=self.base_path, prefix='.snapshot-', suffix='.db')
+        os.close(fd)
+        snapshot_path = Path(tmp_name)
+        try:
+            source = sqlite3.connect(self.db_path.resolve().as_uri() + '?mode=ro', uri=True,
+                                     isolation_level=None)
+            target = sqlite3.connect(snapshot_path)
+            try:
+                source.execute('BEGIN')
+                source.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchone()
+                def on_step(status, remaining, total):
+                    if progress:
+                        progress(total - remaining, total)
+                    if self.step_sleep and remaining:
+                        time.sleep(self.step_sleep)
+                source.backup(target, pages=self.pages_per_step, progress=on_step)
+                source.execute('COMMIT')
+            finally:
+                target.close()
+                source.close()
+            yield snapshot_path
+        finally:
+            snapshot_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _count_entries(snapshot_path: Path) -> Optional[int]:
+        try:
+            conn = sqlite3.connect(snapshot_path)
+            try:
+                return conn.execute('SELECT COUNT(*) FROM passwords').fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _write_archive(self, zip_path: Path, progress: Optional[ProgressCallback] = None) -> dict:
+        """
+        Zip a snapshot of the database plus salt and metadata, streaming the copy
+        Returns:
+            dict: Catalog details gathered on the way (member hashes, entry count)
+        """
+        info = {'hashes': {}, 'entry_count': None}
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            files = []
+            if self.db_path.exists():
+                with self.snapshot(progress) as snapshot_path:
+                    size = snapshot_path.stat().st_size
+                    digest = hashlib.sha256()
+                    with open(snapshot_path, 'rb') as src, \
+                            zipf.open('passwords.db', 'w', force_zip64=size > ZIP64_LIMIT) as dst:
+                        for block in iter(lambda: src.read(COPY_BUFFER_SIZE), b''):
+                            digest.update(block)
+                            dst.write(block)
+                    info['hashes']['passwords.db'] = digest.hexdigest()
+                    info['entry_count'] = self._count_entries(snapshot_path)
+                files.append('passwords.db')
+            if self.salt_path.exists():
+                zipf.write(self.salt_path, 'salt.bin')
+                files.append('salt.bin')
+
+            # Add metadata
+            metadata = {
+                'created': datetime.now().isoformat(),
+                'version': '1.0',
+                'files': files
+            }
+            zipf.writestr('metadata.json', json.dumps(metadata, indent=2))
+        return info
+
+    def _chunk_store(self, backup_dir: Path) -> ChunkStore:
+        """Chunk store shared by all incremental backups in the backups folder holding backup_dir"""
+        return ChunkStore(backup_dir.parent / CHUNKS_DIR)
+
+    def create_backup(self, backup_path: Optional[str] = None, incremental: bool = False,
+                      progress: Optional[ProgressCallback] = None) -> Optional[str]:
         """
         Create compressed backup of database and salt
         Args:
-            backup_path: Optional custom backup location. If None, uses default path
+            backup_path: Optional custom backups folder. If None, uses data/backups.
+                The backup goes in a timestamped directory inside it, next to the
+                folder's own catalog and chunk store
+            incremental: Store only chunks not already held by earlier incremental backups
+            progress: Optional callback(pages_copied, total_pages) during the snapshot
         Returns:
             str: Path to backup directory or None if backup failed
         """
-        if backup_path:
-            backup_dir = Path(backup_path)
-        else:
-            # Default backup in data/backups/timestamp
-            backup_dir = self.base_path / 'backups' / datetime.now().strftime("%Y%m%d_%H%M%S")
-        
         try:
-            backup_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Create zip file with database and salt
-            zip_path = backup_dir / 'backup.zip'
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                if self.db_path.exists():
-                    zipf.write(self.db_path, 'passwords.db')
-                if self.salt_path.exists():
-                    zipf.write(self.salt_path, 'salt.bin')
-                
-                # Add metadata
-                metadata = {
-                    'created': datetime.now().isoformat(),
-                    'version': '1.0',
-                    'files': ['passwords.db', 'salt.bin']
-                }
-                zipf.writestr('metadata.json', json.dumps(metadata, indent=2))
-            
+            backup_dir = self._new_backup_dir(self._catalog_root(backup_path))
+        except OSError as e:
+            print(f"Backup failed: {e}")
+            return None
+
+        try:
+            if incremental:
+                info = self._create_incremental_backup(backup_dir, progress)
+                primary = backup_dir / MANIFEST_NAME
+            else:
+                # Create zip file with database and salt
+                info = self._write_archive(backup_dir / 'backup.zip', progress)
+                primary = backup_dir / 'backup.zip'
+
+            info['hashes'][primary.name] = self._hash_file(primary)
+            self._record_backup(backup_dir, {
+                'kind': 'incremental' if incremental else 'zip',
+                'created': datetime.now().isoformat(),
+                'size': primary.stat().st_size,
+                'hashes': info['hashes'],
+                'entry_count': info['entry_count'],
+            })
             return str(backup_dir)
         except Exception as e:
             print(f"Backup failed: {e}")
-            if backup_dir.exists():
-                shutil.rmtree(backup_dir)
+            # Only ever this call's own directory, which nothing else writes to
+            shutil.rmtree(backup_dir, ignore_errors=True)
             return None
 
-    def restore_backup(self, backup_dir: str) -> bool:
+    @staticmethod
+    def _new_backup_dir(root: Path) -> Path:
+        """Create an empty, uniquely named backup directory under root"""
+        root.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        attempt = 0
+        while True:
+            backup_dir = root / (f'{stamp}_{attempt}' if attempt else stamp)
+            try:
+                backup_dir.mkdir()
+                return backup_dir
+            except FileExistsError:
+                attempt += 1
+
+    def _create_incremental_backup(self, backup_dir: Path, progress: Optional[ProgressCallback] = None) -> dict:
+        """Chunk a database snapshot and the salt into the shared store and write a manifest"""
+        store = self._chunk_store(backup_dir)
+        files = {}
+        entry_count = None
+        if self.db_path.exists():
+            with self.snapshot(progress) as snapshot_path:
+                with open(snapshot_path, 'rb') as f:
+                    files['passwords.db'] = store.store_file(f)
+                entry_count = self._count_entries(snapshot_path)
+        if self.salt_path.exists():
+            with open(self.salt_path, 'rb') as f:
+                files['salt.bin'] = store.store_file(f)
+        manifest = {
+            'created': datetime.now().isoformat(),
+            'version': '2.0',
+            'kind': 'incremental',
+            'files': files,
+        }
+        with open(backup_dir / MANIFEST_NAME, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return {
+            'hashes': {name: entry['sha256'] for name, entry in files.items()},
+            'entry_count': entry_count,
+        }
+
+    def _catalog_root(self, backup_path: Optional[str] = None) -> Path:
+        return Path(backup_path) if backup_path else self.base_path / 'backups'
+
+    def load_catalog(self, backup_path: Optional[str] = None) -> dict:
         """
-        Restore from backup
+        Backup catalog for a backup location, keyed by backup directory name
         Args:
-            backup_dir: Path to backup directory containing backup.zip
+            backup_path: Optional custom backup location
         Returns:
-            bool: True if restore successful, False otherwise
+            dict: name -> {kind, created, size, hashes, entry_count}
         """
-        backup_path = Path(backup_dir)
-        zip_path = backup_path / 'backup.zip'
-        
-        if not zip_path.exists():
-            print(f"Backup file not found: {zip_path}")
-            return False
+        backups = self._read_catalog(self._catalog_root(backup_path))
+        if backups is None:
+            return self.rebuild_catalog(backup_path)
+        return backups
+
+    def _read_catalog(self, root: Path) -> Optional[dict]:
+        """The catalog saved in root, None when it is missing or unreadable"""
+        catalog_path = root / CATALOG_NAME
+        with self._catalog_lock:
+            try:
+                with open(catalog_path) as f:
+                    return json.load(f)['backups']
+            except (OSError, ValueError, KeyError, TypeError):
+                return None
 
+    def _save_catalog(self, root: Path, backups: dict) -> None:
+        root.mkdir(parents=True, exist_ok=True)
+        tmp_path = root / (CATALOG_NAME + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': 1, 'backups': backups}, f, indent=2)
+        os.replace(tmp_path, root / CATALOG_NAME)
+
+    def _update_catalog(self, root: Path, update: Callable[[dict], None]) -> None:
+        with self._catalog_lock:
+            catalog_path = root / CATALOG_NAME
+            backups = {}
+            if catalog_path.exists():
+                try:
+                    with open(catalog_path) as f:
+                        backups = json.load(f)['backups']
+                except (ValueError, KeyError):
+                    backups = {}
+            update(backups)
+            self._save_catalog(root, backups)
+
+    def _record_backup(self, backup_dir: Path, entry: dict) -> None:
+        def add(backups):
+            backups[backup_dir.name] = entry
+        self._update_catalog(backup_dir.parent, add)
+
+    def rebuild_catalog(self, backup_path: Optional[str] = None) -> dict:
+        """Recreate the catalog by scanning and hashing every backup in a location"""
+        root = self._catalog_root(backup_path)
+        backups = {}
+        if root.exists():
+            for backup_dir in self._scan_backups(root):
+                manifest = self._read_manifest(backup_dir)
+                primary = backup_dir / (MANIFEST_NAME if manifest else 'backup.zip')
+                hashes = {primary.name: self._hash_file(primary)}
+                if manifest:
+                    hashes.update((name, entry['sha256']) for name, entry in manifest['files'].items())
+                backups[backup_dir.name] = {
+                    'kind': 'incremental' if manifest else 'zip',
+                    'created': datetime.fromtimestamp(primary.stat().st_mtime).isoformat(),
+                    'size': primary.stat().st_size,
+                    'hashes': hashes,
+                    'entry_count': None,
+                }
+            with self._catalog_lock:
+                self._save_catalog(root, backups)
+        return backups
+
+    def _read_manifest(self, backup_dir: Path) -> Optional[dict]:
+        manifest_path = backup_dir / MANIFEST_NAME
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def _replace_file(self, target: Path, write: Callable) -> None:
+        """
+        Write a file next to target with write(f), fsync it and swap it in with
+        os.replace, so a crash leaves either the old file or the new one
+        """
+        fd, tmp_name = tempfile.mkstemp(prefix=f'.{target.name}-', suffix='.tmp', dir=target.parent)
         try:
-            # Create temporary directory for extraction
-            temp_dir = self.base_path / 'temp_restore'
-            temp_dir.mkdir(exist_ok=True)
-            
-            # Extract backup
-            with zipfile.ZipFile(zip_path, 'r') as zipf:
-                zipf.extractall(temp_dir)
-            
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            if target == self.db_path:
+                # A WAL left by the old database must never be replayed onto the new one
+                for suffix in ('-wal', '-shm'):
+                    Path(f'{target}{suffix}').unlink(missing_ok=True)
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def _restore_incremental(self, backup_dir: Path, manifest: dict) -> bool:
+        """Rebuild the database and salt from the chunks listed in a manifest"""
+        store = self._chunk_store(backup_dir)
+        targets = {'passwords.db': self.db_path, 'salt.bin': self.salt_path}
+        for name, entry in manifest['files'].items():
+            if name not in targets:
+                continue
+            self._replace_file(targets[name], lambda f: store.restore_file(entry, f))
+        return True
+
+    def _restore_archive(self, zip_path: Path) -> bool:
+        """Stream the members of a backup archive straight over the live files"""
+        with zipfile.ZipFile(zip_path, 'r') as zipf:
             # Verify metadata
             try:
-                with open(temp_dir / 'metadata.json') as f:
-                    metadata = json.load(f)
+                metadata = json.loads(zipf.read('metadata.json'))
                 if 'version' not in metadata:
                     raise ValueError("Invalid backup format")
             except Exception as e:
                 print(f"Invalid backup metadata: {e}")
                 return False
 
-            # Move files to correct location
-            if (temp_dir / 'passwords.db').exists():
-                shutil.copy2(temp_dir / 'passwords.db', self.db_path)
-            if (temp_dir / 'salt.bin').exists():
-                shutil.copy2(temp_dir / 'salt.bin', self.salt_path)
+            members = set(zipf.namelist())
+            for name, target in (('passwords.db', self.db_path), ('salt.bin', self.salt_path)):
+                if name in members:
+                    def write(f, name=name):
+                        with zipf.open(name) as src:
+                            shutil.copyfileobj(src, f, COPY_BUFFER_SIZE)
+                    self._replace_file(target, write)
+        return True
 
-            return True
+    def restore_backup(self, backup_dir: str) -> bool:
+        """
+        Restore from backup
+        Args:
+            backup_dir: Path to backup directory containing backup.zip or manifest.json
+        Returns:
+            bool: True if restore successful, False otherwise
+        """
+        backup_path = Path(backup_dir)
+        zip_path = backup_path / 'backup.zip'
+
+        try:
+            manifest = self._read_manifest(backup_path)
+            if manifest is not None:
+                return self._restore_incremental(backup_path, manifest)
+
+            if not zip_path.exists():
+                print(f"Backup file not found: {zip_path}")
+                return False
+            return self._restore_archive(zip_path)
         except Exception as e:
             print(f"Restore failed: {e}")
             return False
+
+    @contextmanager
+    def backup_database(self, backup_dir: str) -> Iterator[Path]:
+        """
+        Materialise the database held in a backup as a temporary file, for
+        reading single entries out of it without touching the live vault
+        """
+        backup_path = Path(backup_dir)
+        fd, tmp_name = tempfile.mkstemp(prefix='.backup-', suffix='.db', dir=self.base_path)
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                manifest = self._read_manifest(backup_path)
+                if manifest is not None:
+                    self._chunk_store(backup_path).restore_file(manifest['files']['passwords.db'], f)
+                else:
+                    with zipfile.ZipFile(backup_path / 'backup.zip', 'r') as zipf, \
+                            zipf.open('passwords.db') as src:
+                        shutil.copyfileobj(src, f, COPY_BUFFER_SIZE)
+            yield tmp_path
         finally:
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
+            tmp_path.unlink(missing_ok=True)
 
-    def export_to_device(self, destination: str) -> bool:
+    def export_to_device(self, destination: str, progress: Optional[ProgressCallback] = None) -> bool:
         """
         Export database to external device with compression
         Args:
             destination: Path to export location
+            progress: Optional callback(pages_copied, total_pages) during the snapshot
         Returns:
             bool: True if export successful, False otherwise
         """
@@ -124,20 +418,7 @@ class StorageManager:
             
             # Create zip file with database and salt
             zip_path = dest_path / 'passwords_backup.zip'
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                if self.db_path.exists():
-                    zipf.write(self.db_path, 'passwords.db')
-                if self.salt_path.exists():
-                    zipf.write(self.salt_path, 'salt.bin')
-                
-                # Add metadata
-                metadata = {
-                    'created': datetime.now().isoformat(),
-                    'version': '1.0',
-                    'files': ['passwords.db', 'salt.bin']
-                }
-                zipf.writestr('metadata.json', json.dumps(metadata, indent=2))
-            
+            self._write_archive(zip_path, progress)
             return True
         except Exception as e:
             print(f"Export failed: {e}")
@@ -145,6 +426,21 @@ class StorageManager:
                 zip_path.unlink()
             return False
 
+    def sync_copy_path(self, destination: str) -> Path:
+        """Where the live vault copy used for record-level sync sits on a device"""
+        return Path(destination) / SYNC_DB_NAME
+
+    def create_sync_copy(self, destination: str, progress: Optional[ProgressCallback] = None) -> Path:
+        """
+        Place a snapshot of the database on a device as the starting point for
+        later delta syncs; this is the only time the whole file is copied
+        """
+        target = self.sync_copy_path(destination)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with self.snapshot(progress) as snapshot_path, open(snapshot_path, 'rb') as src:
+            self._replace_file(target, lambda f: shutil.copyfileobj(src, f, COPY_BUFFER_SIZE))
+        return target
+
     def import_from_device(self, source: str) -> bool:
         """
         Import database from external device
@@ -165,51 +461,29 @@ class StorageManager:
             return False
 
         try:
-            # Create temporary directory for extraction
-            temp_dir = self.base_path / 'temp_import'
-            temp_dir.mkdir(exist_ok=True)
-            
-            # Extract backup
-            with zipfile.ZipFile(zip_path, 'r') as zipf:
-                zipf.extractall(temp_dir)
-            
-            # Verify metadata
-            try:
-                with open(temp_dir / 'metadata.json') as f:
-                    metadata = json.load(f)
-                if 'version' not in metadata:
-                    raise ValueError("Invalid backup format")
-            except Exception as e:
-                print(f"Invalid backup metadata: {e}")
-                return False
-
-            # Move files to correct location
-            if (temp_dir / 'passwords.db').exists():
-                shutil.copy2(temp_dir / 'passwords.db', self.db_path)
-            if (temp_dir / 'salt.bin').exists():
-                shutil.copy2(temp_dir / 'salt.bin', self.salt_path)
-
-            return True
+            return self._restore_archive(zip_path)
         except Exception as e:
             print(f"Import failed: {e}")
             return False
-        finally:
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
+
+    @staticmethod
+    def _scan_backups(search_path: Path) -> List[Path]:
+        return [d for d in search_path.iterdir()
+                if d.is_dir() and ((d / 'backup.zip').exists() or (d / MANIFEST_NAME).exists())]
 
     def get_backup_list(self, backup_path: Optional[str] = None) -> List[Path]:
         """
-        Get list of available backups
+        Get list of available backups from the catalog, scanning only when it is missing
         Args:
             backup_path: Optional custom backup location
         Returns:
             List[Path]: List of backup directories
         """
-        search_path = Path(backup_path) if backup_path else self.base_path / 'backups'
+        search_path = self._catalog_root(backup_path)
         if not search_path.exists():
             return []
         return sorted(
-            [d for d in search_path.iterdir() if d.is_dir() and (d / 'backup.zip').exists()],
+            [search_path / name for name in self.load_catalog(backup_path)],
             key=lambda x: x.name,
             reverse=True
         )
@@ -225,22 +499,91 @@ class StorageManager:
         if not backups:
             return
             
+        removed = []
         for backup in backups[keep_last:]:
             try:
                 shutil.rmtree(backup)
+                removed.append(backup.name)
             except Exception as e:
                 print(f"Failed to remove backup {backup}: {e}")
 
-    def verify_backup(self, backup_path: str) -> bool:
+        def drop(catalog):
+            for name in removed:
+                catalog.pop(name, None)
+        self._update_catalog(self._catalog_root(backup_path), drop)
+
+        # Drop chunks that no remaining incremental backup points to
+        search_path = self._catalog_root(backup_path)
+        referenced = set()
+        for backup in self.get_backup_list(backup_path):
+            manifest = self._read_manifest(backup)
+            if manifest:
+                for entry in manifest['files'].values():
+                    referenced.update(entry['chunks'])
+        try:
+            ChunkStore(search_path / CHUNKS_DIR).collect_garbage(referenced)
+        except Exception as e:
+            print(f"Failed to remove unused backup chunks: {e}")
+
+    def verify_backup(self, backup_path: str, deep: bool = False) -> bool:
         """
         Verify backup integrity
         Args:
             backup_path: Path to backup directory
+            deep: Decompress and re-hash every member instead of only checking
+                  the archive size and hash recorded in the catalog. Backups
+                  without a saved catalog entry always get the deep check
         Returns:
             bool: True if backup is valid, False otherwise
         """
         backup_dir = Path(backup_path)
+        if not deep:
+            # Only a catalog written when the backup was made is trusted; one
+            # rebuilt now would just hash the files as they are
+            catalog = self._read_catalog(backup_dir.parent) or {}
+            entry = catalog.get(backup_dir.name)
+            if isinstance(entry, dict):
+                return self._verify_fast(backup_dir, entry)
+        return self._verify_deep(backup_dir)
+
+    def _verify_fast(self, backup_dir: Path, entry: dict) -> bool:
+        """Size and SHA-256 of the archive or manifest, plus chunk presence; nothing is decompressed"""
+        try:
+            primary = backup_dir / (MANIFEST_NAME if entry['kind'] == 'incremental' else 'backup.zip')
+            if primary.stat().st_size != entry['size']:
+                return False
+            if self._hash_file(primary) != entry['hashes'].get(primary.name):
+                return False
+            if entry['kind'] == 'incremental':
+                manifest = self._read_manifest(backup_dir)
+                store = self._chunk_store(backup_dir)
+                return all(store.exists(digest)
+                           for file_entry in manifest['files'].values() for digest in file_entry['chunks'])
+            return True
+        except Exception:
+            return False
+
+    def _verify_deep(self, backup_dir: Path) -> bool:
         zip_path = backup_dir / 'backup.zip'
+
+        try:
+            manifest = self._read_manifest(backup_dir)
+        except Exception:
+            return False
+        if manifest is not None:
+            if 'passwords.db' not in manifest.get('files', {}):
+                return False
+            store = self._chunk_store(backup_dir)
+            try:
+                for file_entry in manifest['files'].values():
+                    digest = hashlib.sha256()
+                    for chunk in file_entry['chunks']:
+                        digest.update(store.get(chunk))
+                    if digest.hexdigest() != file_entry['sha256']:
+                        return False
+                return True
+            except Exception:
+                return False
         
         if not zip_path.exists():
             return False
@@ -251,9 +594,10 @@ class StorageManager:
                 if zipf.testzip() is not None:
                     return False
                     
-                # Verify required files exist
+                # Verify required files exist (salt.bin is optional now that
+                # the KDF salt lives in the vault header inside passwords.db)
                 files = zipf.namelist()
-                required_files = {'passwords.db', 'salt.bin', 'metadata.json'}
+                required_files = {'passwords.db', 'metadata.json'}
                 if not required_files.issubset(files):
                     return False
                     
@@ -265,4 +609,16 @@ class StorageManager:
                     
             return True
         except Exception:
-            return False
\ No newline at end of file
+            return False
+
+    def verify_all_backups(self, backup_path: Optional[str] = None, deep: bool = False,
+                           max_workers: int = 4) -> dict:
+        """
+        Verify every catalogued backup on a thread pool
+        Returns:
+            dict: backup directory -> True/False
+        """
+        backups = self.get_backup_list(backup_path)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda backup: self.verify_backup(str(backup), deep), backups)
+            return dict(zip(backups, results))
@@ -0,0 +1,603 @@
+"""
+Pattern-aware password strength estimation in the style of zxcvbn.
+
+A password is split into the cheapest sequence of patterns an attacker
+would try (dictionary words, keyboard walks, repeats, sequences, dates,
+and brute force for whatever is left). The product of their guess counts
+gives the estimate.
+"""
+import math
+import os
+import re
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+# Directory of extra ranked wordlists (*.txt, most common first), merged with the built-ins
+DICTIONARIES_ENV = 'PWMGR_DICTIONARIES'
+
+# Ranked most common first; kept as strings so importing this module stays cheap
+_PASSWORDS = '''
+123456 password 12345678 qwerty 123456789 12345 1234 111111 1234567 dragon 123123 baseball abc123
+football monkey letmein 696969 shadow master 666666 qwertyuiop 123321 mustang 1234567890 michael
+654321 superman 1qaz2wsx 7777777 121212 000000 qazwsx 123qwe killer trustno1 jordan jennifer zxcvbnm
+asdfgh hunter buster soccer harley batman andrew tigger sunshine iloveyou 2000 charlie robert thomas
+hockey ranger daniel starwars klaster 112233 george computer michelle jessica pepper 1111 zxcvbn
+555555 11111111 131313 freedom 777777 pass maggie 159753 aaaaaa ginger princess joshua cheese amanda
+summer love ashley nicole chelsea biteme matthew access yankees 987654321 dallas austin thunder taylor
+matrix admin welcome login passw0rd abc password1 qwerty123 letmein1 welcome1 monkey1 dragon1 secret
+hello whatever changeme default root test guest
+'''
+
+_ENGLISH = '''
+the of and to in is you that it he was for on are as with his they at be this have from or one had by
+word but not what all were we when your can said there use an each which she do how their if will up
+other about out many then them these so some her would make like him into time has look two more write
+go see number no way could people my than first water been call who oil its now find long down day did
+get come made may part over new sound take only little work know place year live me back give most very
+after thing our just name good sentence man think say great where help through much before line right
+too mean old any same tell boy follow came want show also around form three small set put end does
+another well large must big even such because turn here why ask went men read need land different home
+us move try kind hand picture again change off play spell air away animal house point page letter
+mother answer found study still learn should america world high every near add food between own below
+country plant last school father keep tree never start city earth eye light thought head under story
+saw left few while along might close something seem next hard open example begin life always those both
+paper together got group often run important until children side feet car mile night walk white sea
+began grow took river four carry state once book hear stop without second later miss idea enough eat
+face watch far indian really almost let above girl sometimes mountain cut young talk soon list song
+being leave family happy money secret dragon monkey master shadow sunshine princess flower summer winter
+spring autumn orange purple yellow silver golden black green blue red apple banana cherry tiger lion
+eagle falcon wolf bear shark snake horse puppy kitty kitten angel devil heaven magic power freedom peace
+hello welcome letmein access admin login password qwerty computer internet google facebook football
+baseball soccer hockey basketball guitar music movie star moon sun rainbow butterfly chocolate cookie
+coffee pizza cheese
+'''
+
+_NAMES = '''
+james john robert michael william david richard joseph thomas charles christopher daniel matthew anthony
+mark donald steven paul andrew joshua kenneth kevin brian george timothy ronald edward jason jeffrey
+ryan jacob gary nicholas eric jonathan stephen larry justin scott brandon benjamin samuel gregory
+alexander frank patrick raymond jack dennis jerry tyler aaron jose adam nathan henry douglas zachary
+peter kyle mary patricia jennifer linda elizabeth barbara susan jessica sarah karen lisa nancy betty
+margaret sandra ashley kimberly emily donna michelle carol amanda dorothy melissa deborah stephanie
+rebecca sharon laura cynthia kathleen amy angela shirley anna brenda pamela emma nicole helen samantha
+katherine christine debra rachel carolyn janet catherine maria heather diane ruth julie olivia joyce
+virginia victoria kelly lauren christina joan evelyn judith megan andrea cheryl hannah jacqueline
+martha gloria teresa ann sara madison frances kathryn janice jean abigail alice judy sophia grace
+smith johnson williams brown jones garcia miller davis rodriguez martinez hernandez lopez gonzalez
+wilson anderson taylor moore jackson martin lee thompson white harris clark lewis walker hall allen
+'''
+
+_KEYBOARD_ROWS = (
+    ('`1234567890-=', '~!@#$%^&*()_+'),
+    ('qwertyuiop[]\\', 'QWERTYUIOP{}|'),
+    ("asdfghjkl;'", 'ASDFGHJKL:"'),
+    ('zxcvbnm,./', 'ZXCVBNM<>?'),
+)
+# Each row starts half a key further right than the one above it
+_ROW_OFFSETS = (0.0, 1.5, 1.75, 2.25)
+
+_L33T_TABLES = (
+    str.maketrans({'4': 'a', '@': 'a', '8': 'b', '(': 'c', '{': 'c', '3': 'e', '6': 'g', '1': 'i',
+                   '!': 'i', '|': 'i', '0': 'o', '$': 's', '5': 's', '7': 't', '+': 't', '%': 'x', '2': 'z'}),
+    str.maketrans({'1': 'l', '|': 'l', '7': 'l', '9': 'g'}),
+)
+_L33T_CHARS = frozenset('4@8({36!1|0$57+%29')
+
+_DATE_SEPARATED_RE = re.compile(r'(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})')
+_YEAR_RE = re.compile(r'19\d\d|20\d\d')
+
+MIN_YEAR_SPACE = 20
+BRUTEFORCE_CARDINALITY = 10
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+# Extra cost of adding one more pattern to the sequence, as in zxcvbn
+PATTERN_PENALTY = 10000
+MAX_ANALYSED_LENGTH = 100
+# Pieces of MAX_ANALYSED_LENGTH analysed in a longer password; the rest is charged at their rate
+MAX_ANALYSED_PIECES = 10
+MIN_DICTIONARY_WORD = 3
+SCORE_THRESHOLDS = (1e3 + 5, 1e6 + 5, 1e8 + 5, 1e10 + 5)
+
+
+class Match(NamedTuple):
+    pattern: str
+    i: int
+    j: int
+    token: str
+    guesses: float
+    detail: str = ''
+
+
+class StrengthResult(NamedTuple):
+    """guesses needed, their log10, score 0 (trivial) to 4 (strong) and the patterns found"""
+    guesses: float
+    guesses_log10: float
+    score: int
+    sequence: List[Match]
+
+
+_BRUTEFORCE_GUESSES = [0.0] + [
+    max(float(BRUTEFORCE_CARDINALITY) ** length,
+        (MIN_SUBMATCH_GUESSES_SINGLE_CHAR if length == 1 else MIN_SUBMATCH_GUESSES_MULTI_CHAR) + 1)
+    for length in range(1, MAX_ANALYSED_LENGTH + 1)
+]
+
+
+def _ranked(words: Iterable[str]) -> Dict[str, int]:
+    ranked = {}
+    for rank, word in enumerate(words, 1):
+        ranked.setdefault(word.lower(), rank)
+    return ranked
+
+
+def _reference_year() -> int:
+    """Dates near the current year are the likeliest guesses; read per estimate, not at import"""
+    return date.today().year
+
+
+def _periodic_run(password: str, period: int) -> int:
+    """Length of the longest prefix of password that repeats its first period characters"""
+    low, high = period, len(password)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if password[period:middle] == password[:middle - period]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+@lru_cache(maxsize=None)
+def _dictionaries() -> Dict[str, Dict[str, int]]:
+    """Word -> rank maps, built on first use"""
+    dictionaries = {
+        'passwords': _ranked(_PASSWORDS.split()),
+        'english': _ranked(_ENGLISH.split()),
+        'names': _ranked(_NAMES.split()),
+    }
+    directory = os.environ.get(DICTIONARIES_ENV)
+    if directory:
+        for path in sorted(Path(directory).glob('*.txt')):
+            with open(path, encoding='utf-8', errors='ignore') as f:
+                dictionaries[path.stem] = _ranked(line.strip() for line in f if line.strip())
+    return dictionaries
+
+
+def _build_lexicon(dictionaries: Dict[str, Dict[str, int]]):
+    """
+    Merge ranked dictionaries into word -> ((dictionary, rank), ...) plus the
+    set of every word prefix, which works as a flattened trie: a scan stops
+    extending a substring as soon as it is no longer a prefix of any word.
+    """
+    entries: Dict[str, tuple] = {}
+    prefixes = set()
+    for name, ranked in dictionaries.items():
+        for word, rank in ranked.items():
+            entries[word] = entries.get(word, ()) + ((name, rank),)
+            for end in range(1, len(word) + 1):
+                prefixes.add(word[:end])
+    return entries, frozenset(prefixes)
+
+
+@lru_cache(maxsize=None)
+def _lexicon():
+    return _build_lexicon(_dictionaries())
+
+
+@lru_cache(maxsize=None)
+def _keyboard():
+    """(unshifted key -> set of neighbour keys, shifted -> unshifted, keys, average degree)"""
+    positions = {}
+    unshift = {}
+    for row, ((keys, shifted), offset) in enumerate(zip(_KEYBOARD_ROWS, _ROW_OFFSETS)):
+        for col, (key, shifted_key) in enumerate(zip(keys, shifted)):
+            positions[key] = (row, col + offset)
+            unshift[shifted_key] = key
+    neighbours = {key: set() for key in positions}
+    for key, (row, x) in positions.items():
+        for other, (other_row, other_x) in positions.items():
+            if other != key and abs(row - other_row) <= 1 and abs(x - other_x) <= 1.0:
+                neighbours[key].add(other)
+    average_degree = sum(len(adjacent) for adjacent in neighbours.values()) / len(neighbours)
+    return neighbours, unshift, positions, average_degree
+
+
+def _binomial(n: int, k: int) -> int:
+    return math.comb(n, k) if 0 <= k <= n else 0
+
+
+def _uppercase_variations(token: str) -> float:
+    if token.islower() or not any(c.isalpha() for c in token):
+        return 1
+    if token.isupper() or (token[0].isupper() and token[1:].islower()) or \
+            (token[-1].isupper() and token[:-1].islower()):
+        return 2
+    upper = sum(1 for c in token if c.isupper())
+    lower = sum(1 for c in token if c.islower())
+    return sum(_binomial(upper + lower, k) for k in range(1, min(upper, lower) + 1))
+
+
+def _l33t_variations(token: str, word: str) -> float:
+    variations = 1
+    for subbed in set(c for c, plain in zip(token.lower(), word) if c != plain):
+        plain = word[token.lower().index(subbed)]
+        substituted = token.lower().count(subbed)
+        unsubstituted = word.count(plain) - substituted
+        if unsubstituted <= 0:
+            variations *= 2
+        else:
+            variations *= sum(_binomial(substituted + unsubstituted, k)
+                              for k in range(1, min(substituted, unsubstituted) + 1))
+    return variations
+
+
+class StrengthEstimator:
+    """
+    Estimates guesses for passwords. Dictionaries and the keyboard graph are
+    built on first use and shared by every later call, so estimate_many can
+    score a whole vault in one pass.
+    """
+
+    def __init__(self, max_length: int = MAX_ANALYSED_LENGTH):
+        self.max_length = max_length
+
+    # -- matchers ---------------------------------------------------------
+
+    def _dictionary_matches(self, password: str, extra: Optional[Dict[str, int]]) -> List[Match]:
+        lexicons = [_lexicon()]
+        if extra:
+            lexicons.append(_build_lexicon({'user_inputs': extra}))
+        lower = password.lower()
+        matches = []
+        n = len(password)
+
+        def scan(text, reversed_=False, l33t=False):
+            for entries, prefixes in lexicons:
+                for i in range(n):
+                    for j in range(i, n):
+                        word = text[i:j + 1]
+                        if word not in prefixes:
+                            break
+                        found = entries.get(word)
+                        if found is None or j - i + 1 < MIN_DICTIONARY_WORD:
+                            continue
+                        start, end = (n - 1 - j, n - 1 - i) if reversed_ else (i, j)
+                        token = password[start:end + 1]
+                        if l33t and token.lower() == word:
+                            continue
+                        for name, rank in found:
+                            guesses = rank * _uppercase_variations(token)
+                            detail = name
+                            if l33t:
+                                guesses *= _l33t_variations(token, word)
+                                detail += ' l33t'
+                            if reversed_:
+                                guesses *= 2
+                                detail += ' reversed'
+                            matches.append(Match('dictionary', start, end, token, guesses, f'{detail}: {word}'))
+
+        scan(lower)
+        reversed_lower = lower[::-1]
+        if reversed_lower != lower:
+            scan(reversed_lower, reversed_=True)
+        if not _L33T_CHARS.isdisjoint(lower):
+            for table in _L33T_TABLES:
+                subbed = lower.translate(table)
+                if subbed != lower:
+                    scan(subbed, l33t=True)
+        return matches
+
+    def _spatial_matches(self, password: str) -> List[Match]:
+        neighbours, unshift, positions, average_degree = _keyboard()
+        starting_keys = len(positions)
+        matches = []
+        n = len(password)
+        i = 0
+        while i < n - 2:
+            j = i
+            turns = 0
+            direction = None
+            shifted = 1 if password[i] in unshift else 0
+            while j + 1 < n:
+                previous = unshift.get(password[j], password[j])
+                current = unshift.get(password[j + 1], password[j + 1])
+                if current not in neighbours.get(previous, ()):
+                    break
+                (row_a, x_a), (row_b, x_b) = positions[previous], positions[current]
+                step = (row_b - row_a, round(x_b - x_a))
+                if step != direction:
+                    turns += 1
+                    direction = step
+                if password[j + 1] in unshift:
+                    shifted += 1
+                j += 1
+            if j - i >= 2:
+                length = j - i + 1
+                guesses = 0
+                for k in range(2, length + 1):
+                    for t in range(1, min(turns, k - 1) + 1):
+                        guesses += _binomial(k - 1, t - 1) * starting_keys * average_degree ** t
+                if shifted:
+                    unshifted = length - shifted
+                    if unshifted == 0:
+                        guesses *= 2
+                    else:
+                        guesses *= sum(_binomial(shifted + unshifted, k)
+                                       for k in range(1, min(shifted, unshifted) + 1))
+                matches.append(Match('spatial', i, j, password[i:j + 1], guesses, f'{turns} turns'))
+                i = j
+            else:
+                i += 1
+        return matches
+
+    def _repeat_matches(self, password: str) -> List[Match]:
+        matches = []
+        greedy = re.compile(r'(.+)\1+')
+        lazy = re.compile(r'(.+?)\1+')
+        anchored = re.compile(r'^(.+?)\1+$')
+        pos = 0
+        while pos < len(password):
+            greedy_match = greedy.search(password, pos)
+            if not greedy_match:
+                break
+            lazy_match = lazy.search(password, pos)
+            if len(greedy_match.group(0)) > len(lazy_match.group(0)):
+                match = greedy_match
+                base = anchored.match(match.group(0)).group(1)
+            else:
+                match = lazy_match
+                base = match.group(1)
+            base_guesses = self._estimate(base, None).guesses
+            count = len(match.group(0)) // len(base)
+            matches.append(Match('repeat', match.start(), match.end() - 1, match.group(0),
+                                 base_guesses * count, f'{base!r} x{count}'))
+            pos = match.end()
+        return matches
+
+    def _sequence_matches(self, password: str) -> List[Match]:
+        matches = []
+        n = len(password)
+
+        def add(i, j, delta):
+            if j - i < 2 or abs(delta) != 1:
+                return
+            token = password[i:j + 1]
+            first = token[0]
+            if first in 'aAzZ019':
+                base = 4
+            elif first.isdigit():
+                base = 10
+            else:
+                base = 26
+            descending = delta < 0
+            matches.append(Match('sequence', i, j, token, base * len(token) * (2 if descending else 1),
+                                 'descending' if descending else 'ascending'))
+
+        def same_class(a, b):
+            return (a.isdigit() and b.isdigit()) or (a.islower() and b.islower()) or \
+                (a.isupper() and b.isupper())
+
+        i = 0
+        while i < n - 1:
+            delta = ord(password[i + 1]) - ord(password[i])
+            j = i + 1
+            if abs(delta) == 1 and same_class(password[i], password[j]):
+                while j + 1 < n and ord(password[j + 1]) - ord(password[j]) == delta and \
+                        same_class(password[j], password[j + 1]):
+                    j += 1
+                add(i, j, delta)
+                i = j
+            else:
+                i += 1
+        return matches
+
+    @staticmethod
+    def _date_guesses(year: int, separated: bool, reference_year: int) -> float:
+        return 365 * max(abs(year - reference_year), MIN_YEAR_SPACE) * (4 if separated else 1)
+
+    @staticmethod
+    def _valid_date(parts, reference_year: int) -> Optional[int]:
+        """Year of the first reading of (a, b, c) as a plausible day/month/year, None if none"""
+        a, b, c = parts
+        for year, first, second in ((c, a, b), (a, b, c)):
+            if year < 100:
+                year += 2000 if year <= reference_year % 100 else 1900
+            if not 1000 <= year <= reference_year + 30:
+                continue
+            for day, month in ((first, second), (second, first)):
+                if 1 <= month <= 12 and 1 <= day <= 31:
+                    return year
+        return None
+
+    def _date_matches(self, password: str) -> List[Match]:
+        reference_year = _reference_year()
+        matches = []
+        n = len(password)
+        for i in range(n):
+            for j in range(i + 3, min(n, i + 8)):
+                token = password[i:j + 1]
+                if not token.isdigit():
+                    break
+                best = None
+                for split_a in range(1, len(token) - 1):
+                    for split_b in range(split_a + 1, len(token)):
+                        parts = (int(token[:split_a]), int(token[split_a:split_b]), int(token[split_b:]))
+                        year = self._valid_date(parts, reference_year)
+                        if year is not None:
+                            distance = abs(year - reference_year)
+                            if best is None or distance < best:
+                                best = distance
+                                best_year = year
+                if best is not None:
+                    matches.append(Match('date', i, j, token, self._date_guesses(best_year, False, reference_year),
+                                         str(best_year)))
+        for match in _DATE_SEPARATED_RE.finditer(password):
+            year = self._valid_date((int(match.group(1)), int(match.group(3)), int(match.group(4))), reference_year)
+            if year is not None:
+                matches.append(Match('date', match.start(), match.end() - 1, match.group(0),
+                                     self._date_guesses(year, True, reference_year), str(year)))
+        for match in _YEAR_RE.finditer(password):
+            year = int(match.group(0))
+            matches.append(Match('date', match.start(), match.end() - 1, match.group(0),
+                                 max(abs(year - reference_year), MIN_YEAR_SPACE), 'year'))
+        return matches
+
+    # -- search -----------------------------------------------------------
+
+    @staticmethod
+    def _bruteforce_guesses(length: int) -> float:
+        floor = MIN_SUBMATCH_GUESSES_SINGLE_CHAR if length == 1 else MIN_SUBMATCH_GUESSES_MULTI_CHAR
+        return max(float(BRUTEFORCE_CARDINALITY) ** length, floor + 1)
+
+    def _estimate(self, password: str, extra: Optional[Dict[str, int]]) -> StrengthResult:
+        n = len(password)
+        if n == 0:
+            return StrengthResult(1.0, 0.0, 0, [])
+
+        matches_by_end: List[List[Match]] = [[] for _ in range(n)]
+        for match in (self._dictionary_matches(password, extra) + self._spatial_matches(password)
+                      + self._repeat_matches(password) + self._sequence_matches(password)
+                      + self._date_matches(password)):
+            if match.j - match.i + 1 < n:
+                floor = MIN_SUBMATCH_GUESSES_SINGLE_CHAR if match.i == match.j else MIN_SUBMATCH_GUESSES_MULTI_CHAR
+                match = match._replace(guesses=max(match.guesses, floor))
+            matches_by_end[match.j].append(match)
+
+        # best[k][l] = (product of guesses, start of the last pattern, its Match or None
+        # for brute force) for the cheapest l-pattern cover of password[:k+1]
+        best: List[Dict[int, tuple]] = [{} for _ in range(n)]
+        bruteforce = _BRUTEFORCE_GUESSES if n < len(_BRUTEFORCE_GUESSES) else \
+            [0.0] + [self._bruteforce_guesses(length) for length in range(1, n + 1)]
+        # Positions where some cover ends in a real match; brute force may only follow those
+        match_ends = []
+
+        def consider(k, length, product, start, match):
+            current = best[k].get(length)
+            if current is None or product < current[0]:
+                best[k][length] = (product, start, match)
+
+        for k in range(n):
+            for match in matches_by_end[k]:
+                if match.i == 0:
+                    consider(k, 1, match.guesses, 0, match)
+                else:
+                    for length, (product, _, _) in list(best[match.i - 1].items()):
+                        consider(k, length + 1, product * match.guesses, match.i, match)
+            consider(k, 1, bruteforce[k + 1], 0, None)
+            for end in match_ends:
+                guesses = bruteforce[k - end]
+                for length, (product, _, previous) in best[end].items():
+                    # Two adjacent brute-force runs are never cheaper than one
+                    if previous is not None:
+                        consider(k, length + 1, product * guesses, end + 1, None)
+            if matches_by_end[k]:
+                match_ends.append(k)
+
+        def total(length, product):
+            return math.factorial(length) * product + PATTERN_PENALTY ** (length - 1)
+
+        length, (product, _, _) = min(best[n - 1].items(), key=lambda item: total(item[0], item[1][0]))
+        guesses = total(length, product)
+
+        sequence = []
+        k = n - 1
+        while k >= 0:
+            _, start, match = best[k][length]
+            if match is None:
+                match = Match('bruteforce', start, k, password[start:k + 1], bruteforce[k - start + 1])
+            sequence.append(match)
+            k = start - 1
+            length -= 1
+        sequence.reverse()
+
+        guesses_log10 = math.log10(guesses)
+        score = sum(1 for threshold in SCORE_THRESHOLDS if guesses >= threshold)
+        return StrengthResult(guesses, round(guesses_log10, 3), score, sequence)
+
+    def estimate(self, password: str, user_inputs: Sequence[str] = ()) -> StrengthResult:
+        """
+        Estimate one password
+        Args:
+            password: Password to score; patterns are searched for in max_length pieces
+            user_inputs: Strings an attacker would try first (site name, username)
+        Returns:
+            StrengthResult: Guesses, their log10, score 0-4 and the pattern sequence
+        """
+        extra = _ranked(word for value in user_inputs for word in re.findall(r'\w+', value.lower())
+                        if len(word) >= MIN_DICTIONARY_WORD) if user_inputs else None
+        analysed = password[:self.max_length]
+        result = self._estimate(analysed, extra)
+        if len(password) > len(analysed):
+            guesses_log10 = self._long_password_log10(password, result.guesses_log10, extra)
+            score = sum(1 for threshold in SCORE_THRESHOLDS if guesses_log10 >= math.log10(threshold))
+            result = result._replace(guesses=10 ** min(guesses_log10, 300), guesses_log10=round(guesses_log10, 3),
+                                     score=score)
+        return result
+
+    def _long_password_log10(self, password: str, prefix_log10: float, extra: Optional[Dict[str, int]]) -> float:
+        """
+        Guesses (log10) for a password longer than max_length. A unit repeated
+        over more than max_length characters costs the unit times the repeat
+        count, like a repeat match, plus whatever follows the run. Otherwise
+        every max_length piece is analysed like the first, a copy of an earlier
+        piece only costs choosing which, and characters past
+        MAX_ANALYSED_PIECES pieces are charged at the rate of those analysed.
+        """
+        n = len(password)
+        run, period = max(((_periodic_run(password, period), -period)
+                           for period in range(1, self.max_length + 1)))
+        period = -period
+        if run > self.max_length:
+            total = self._estimate(password[:period], extra).guesses_log10 + math.log10(run / period)
+            rest = password[run:]
+            if len(rest) > self.max_length:
+                rest_prefix = self._estimate(rest[:self.max_length], extra).guesses_log10
+                total += self._long_password_log10(rest, rest_prefix, extra)
+            elif rest:
+                total += self._estimate(rest, extra).guesses_log10
+            return total
+
+        step = self.max_length
+        total = prefix_log10
+        seen = {password[:step]}
+        analysed = step
+        for start in range(step, min(n, step * MAX_ANALYSED_PIECES), step):
+            piece = password[start:start + step]
+            if piece in seen:
+                total += math.log10(len(seen) + 1)
+            else:
+                total += self._estimate(piece, extra).guesses_log10
+                seen.add(piece)
+            analysed += len(piece)
+        return total + (n - analysed) * total / analysed
+
+    def estimate_many(self, passwords: Iterable[str], workers: Optional[int] = None,
+                      chunk_size: int = 256) -> Iterator[StrengthResult]:
+        """
+        Score a stream of passwords in order, estimating each distinct password once
+        Args:
+            passwords: Passwords to score
+            workers: Processes to spread distinct passwords over; None or 1 scores inline
+            chunk_size: Passwords handed to a worker at a time
+        """
+        passwords = list(passwords)
+        distinct = list(dict.fromkeys(passwords))
+        if workers and workers > 1 and len(distinct) > chunk_size:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = dict(zip(distinct, executor.map(self.estimate, distinct, chunksize=chunk_size)))
+        else:
+            results = {password: self.estimate(password) for password in distinct}
+        for password in passwords:
+            yield results[password]
+
+
+@lru_cache(maxsize=1)
+def default_estimator() -> StrengthEstimator:
+    return StrengthEstimator()
+
+
+def estimate(password: str, user_inputs: Sequence[str] = ()) -> StrengthResult:
+    return default_estimator().estimate(password, user_inputs)
@@ -0,0 +1,140 @@
+"""Record-level sync between two copies of a vault using their change logs"""
+from typing import List, NamedTuple, Optional
+
+from core.password import token_to_raw
+
+LOCAL = 'local'
+REMOTE = 'remote'
+
+
+class Conflict(NamedTuple):
+    """An account changed on both copies since their last sync"""
+    website: str
+    username: str
+    local_time: str
+    remote_time: str
+    winner: str
+
+
+class SyncResult(NamedTuple):
+    sent: int
+    received: int
+    conflicts: List[Conflict]
+
+
+class VaultSync:
+    """
+    Exchanges the accounts changed since the last sync between two vaults.
+
+    Each side's change_log says which (website, username) keys changed after
+    the sequence number recorded for the peer; the current row (or its
+    absence, for a tombstone) is what gets copied. When both sides changed
+    the same account the newer updated_at wins and the pair is reported.
+    Ciphertexts are copied untouched, so both copies must share a data key.
+    """
+
+    def __init__(self, local_pm, remote_pm, encryption):
+        self.local = local_pm
+        self.remote = remote_pm
+        self.encryption = encryption
+
+    def mark_in_sync(self) -> None:
+        """Record both copies as fully exchanged, e.g. right after one was cloned from the other"""
+        local_id, remote_id = self._replica_ids()
+        local_seq, remote_seq = self.local.get_last_seq(), self.remote.get_last_seq()
+        self.local.set_sync_state(remote_id, local_seq, remote_seq)
+        self.remote.set_sync_state(local_id, remote_seq, local_seq)
+
+    def _replica_ids(self):
+        local_id = self.local.db.get_replica_id()
+        remote_id = self.remote.db.get_replica_id()
+        if local_id == remote_id:
+            raise ValueError("Both vaults have the same replica id; was one copied by hand?")
+        return local_id, remote_id
+
+    def _same_content(self, local_record, remote_record) -> bool:
+        if local_record is None or remote_record is None:
+            return local_record is remote_record
+        if local_record[1:] == remote_record[1:] and self._raw(local_record[0]) == self._raw(remote_record[0]):
+            return True
+        # Equal passwords encrypt to different tokens, so compare plaintexts
+        return (local_record[1] == remote_record[1] and local_record[4] == remote_record[4]
+                and self.encryption.decrypt(local_record[0]) == self.encryption.decrypt(remote_record[0]))
+
+    @staticmethod
+    def _raw(ciphertext):
+        return token_to_raw(ciphertext) if isinstance(ciphertext, str) else ciphertext
+
+    @staticmethod
+    def _prepare(key, record, changed_at, target_pm, records, deletions):
+        website, username = key
+        if record is None:
+            deletions.append((website, username, changed_at))
+            return
+        encrypted, notes, created_at, updated_at, category = record
+        if isinstance(encrypted, str) and target_pm.db.get_meta('ciphertext_format') == 'blob':
+            encrypted = token_to_raw(encrypted)
+        records.append((website, username, encrypted, notes, created_at, updated_at, category))
+
+    def sync(self) -> SyncResult:
+        """
+        Exchange changes in both directions, each side in one transaction
+        Returns:
+            SyncResult: Accounts sent to and received from the remote copy, plus conflicts
+        """
+        local_id, remote_id = self._replica_ids()
+        sent_seq, received_seq = self.local.get_sync_state(remote_id)
+        local_changes = {(w, u): changed_at for _, w, u, _, changed_at in self.local.get_changes_since(sent_seq)}
+        remote_changes = {(w, u): changed_at for _, w, u, _, changed_at in self.remote.get_changes_since(received_seq)}
+
+        outgoing, outgoing_deletions = [], []
+        incoming, incoming_deletions = [], []
+        conflicts = []
+        for key in local_changes.keys() | remote_changes.keys():
+            local_record = self.local.get_sync_record(*key) if key in local_changes else None
+            remote_record = self.remote.get_sync_record(*key) if key in remote_changes else None
+            if key not in remote_changes:
+                self._prepare(key, local_record, local_changes[key], self.remote, outgoing, outgoing_deletions)
+                continue
+            if key not in local_changes:
+                self._prepare(key, remote_record, remote_changes[key], self.local, incoming, incoming_deletions)
+                continue
+
+            if self._same_content(local_record, remote_record):
+                continue
+            local_time = local_record[3] if local_record else local_changes[key]
+            remote_time = remote_record[3] if remote_record else remote_changes[key]
+            # Ties keep the local copy so repeated syncs settle on one answer
+            if remote_time > local_time:
+                winner = REMOTE
+                self._prepare(key, remote_record, remote_changes[key], self.local, incoming, incoming_deletions)
+            else:
+                winner = LOCAL
+                self._prepare(key, local_record, local_changes[key], self.remote, outgoing, outgoing_deletions)
+            conflicts.append(Conflict(key[0], key[1], local_time, remote_time, winner))
+
+        self._check_key(incoming)
+        try:
+            self.remote.apply_changes(outgoing, outgoing_deletions, commit=False)
+            self.local.apply_changes(incoming, incoming_deletions, commit=False)
+            # Everything each side holds now, including what it just received, is known to the other
+            local_seq, remote_seq = self.local.get_last_seq(), self.remote.get_last_seq()
+            self.local.set_sync_state(remote_id, local_seq, remote_seq, commit=False)
+            self.remote.set_sync_state(local_id, remote_seq, local_seq, commit=False)
+            self.remote.db.conn.commit()
+            self.local.db.conn.commit()
+        except Exception:
+            self.remote.db.conn.rollback()
+            self.local.db.conn.rollback()
+            raise
+        return SyncResult(len(outgoing) + len(outgoing_deletions), len(incoming) + len(incoming_deletions), conflicts)
+
+    def _check_key(self, incoming) -> None:
+        """Refuse to mix ciphertexts from a copy encrypted under a different data key"""
+        samples = [record[2] for record in incoming]
+        if not samples:
+            sample = self.remote.get_any_password()
+            samples = [sample] if sample is not None else []
+        for result in self.encryption.decrypt_many(samples):
+            if result.error:
+                raise ValueError("The other copy is encrypted with a different key")
@@ -0,0 +1,78 @@
+"""Wordlists for passphrases, loaded lazily and kept packed in memory"""
+import math
+import mmap
+import os
+import re
+import secrets
+from array import array
+from pathlib import Path
+from typing import Iterable, Optional
+
+# Points at a wordlist file, e.g. the EFF large diceware list
+WORDLIST_ENV = 'PWMGR_WORDLIST'
+
+# Diceware files prefix every word with its dice roll: "11111\tabacus"
+_LINE_RE = re.compile(rb'^[ \t]*(?:[1-6]+[ \t]+)?(\S+)[ \t]*\r?$', re.MULTILINE)
+
+
+class Wordlist:
+    """
+    A list of distinct words held as one bytes blob plus an offset array,
+    about one byte per character instead of a Python str object per word.
+
+    A file-backed list is only read, through mmap, the first time a word is
+    drawn, so constructing one costs nothing on the startup path.
+    """
+
+    def __init__(self, path=None, words: Optional[Iterable[str]] = None):
+        self.path = Path(path) if path else None
+        self._words = words
+        self._blob = None
+        self._offsets = None
+
+    @classmethod
+    def from_env(cls) -> Optional['Wordlist']:
+        path = os.environ.get(WORDLIST_ENV)
+        return cls(path) if path else None
+
+    def _load(self) -> None:
+        if self.path is not None:
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self._pack(match.group(1) for match in _LINE_RE.finditer(mapped))
+        else:
+            self._pack(word.encode() for word in self._words)
+        if len(self) < 2:
+            raise ValueError("Wordlist needs at least two distinct words")
+
+    def _pack(self, words: Iterable[bytes]) -> None:
+        seen = set()
+        parts = []
+        offsets = array('L', [0])
+        end = 0
+        for word in words:
+            # Duplicates would overstate the entropy of every passphrase
+            if word in seen:
+                continue
+            seen.add(word)
+            parts.append(word)
+            end += len(word)
+            offsets.append(end)
+        self._blob = b''.join(parts)
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        if self._offsets is None:
+            self._load()
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if self._offsets is None:
+            self._load()
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].decode()
+
+    def choice(self) -> str:
+        return self[secrets.randbelow(len(self))]
+
+    @property
+    def bits_per_word(self) -> float:
+        return math.log2(len(self))
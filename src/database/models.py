@@ -1,10 +1,36 @@
 import sqlite3
+import uuid
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
+# PRAGMAs applied on connect. 'wal' lets readers run alongside a writer and
+# turns a commit into an append to the WAL instead of a full journal fsync
+CONNECTION_PROFILES = {
+    'default': {},
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,  # negative means KiB, so ~16 MiB
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+}
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def _chunked(items, size):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 class Database:
-    def __init__(self, db_path):
+    def __init__(self, db_path, profile='default'):
         self.db_path = db_path  # Just store the path, no need for Path object here
+        self.profile = profile
         self.conn = None
         self.cursor = None
         
@@ -13,6 +39,8 @@ class Database:
         try:
             self.conn = sqlite3.connect(self.db_path)
             self.cursor = self.conn.cursor()
+            for pragma, value in CONNECTION_PROFILES[self.profile].items():
+                self.cursor.execute(f'PRAGMA {pragma} = {value}')
         except sqlite3.Error as e:
             print(f"Error connecting to database: {e}")
 
@@ -20,6 +48,16 @@ class Database:
         """Close database connection"""
         if self.conn:
             self.conn.close()
+            self.conn = None
+            self.cursor = None
+
+    def checkpoint(self):
+        """Fold the WAL back into the main file so it can be copied on its own"""
+        if self.conn:
+            try:
+                self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            except sqlite3.Error as e:
+                print(f"Error checkpointing database: {e}")
 
     def init_tables(self):
         """Create tables if they don't exist"""
@@ -29,7 +67,7 @@ class Database:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 website TEXT NOT NULL,
                 username TEXT NOT NULL,
-                encrypted_password TEXT NOT NULL,
+                encrypted_password BLOB NOT NULL,
                 notes TEXT,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                 updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -45,56 +83,496 @@ class Database:
             )
             ''')
 
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_passwords_website ON passwords(website)')
+            self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_passwords_website_username
+            ON passwords(website, username)
+            ''')
+            self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_passwords_website_nocase
+            ON passwords(website COLLATE NOCASE)
+            ''')
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_passwords_category ON passwords(category_id)')
+            self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_passwords_updated_at ON passwords(updated_at)')
+
+            self._init_category_counts()
+            self._init_change_log()
+
+            self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vault_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+            ''')
+
             self.conn.commit()
         except sqlite3.Error as e:
             print(f"Error creating tables: {e}")
 
+    def _init_category_counts(self):
+        """
+        Per-category entry counts kept current by triggers, so menus never run
+        COUNT(*) over passwords. Uncategorised entries are counted under id 0.
+        """
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_counts'")
+        exists = self.cursor.fetchone() is not None
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS category_counts (
+            category_id INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS passwords_count_insert AFTER INSERT ON passwords
+        BEGIN
+            INSERT INTO category_counts (category_id, count) VALUES (COALESCE(NEW.category_id, 0), 1)
+            ON CONFLICT(category_id) DO UPDATE SET count = count + 1;
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS passwords_count_delete AFTER DELETE ON passwords
+        BEGIN
+            UPDATE category_counts SET count = count - 1
+            WHERE category_id = COALESCE(OLD.category_id, 0);
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS passwords_count_move AFTER UPDATE OF category_id ON passwords
+        WHEN COALESCE(OLD.category_id, 0) != COALESCE(NEW.category_id, 0)
+        BEGIN
+            UPDATE category_counts SET count = count - 1
+            WHERE category_id = COALESCE(OLD.category_id, 0);
+            INSERT INTO category_counts (category_id, count) VALUES (COALESCE(NEW.category_id, 0), 1)
+            ON CONFLICT(category_id) DO UPDATE SET count = count + 1;
+        END
+        ''')
+        if not exists:
+            # One-off scan to seed vaults created before the summary existed
+            self.cursor.execute('''
+            INSERT INTO category_counts (category_id, count)
+            SELECT COALESCE(category_id, 0), COUNT(*) FROM passwords GROUP BY COALESCE(category_id, 0)
+            ''')
+
+    def _init_change_log(self):
+        """
+        One change_log row per (website, username), moved to a fresh sequence
+        number by triggers whenever the entry changes, plus the sequence
+        numbers already exchanged with each peer copy of the vault. Deleted
+        entries leave their row behind as a tombstone.
+        """
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'change_log'")
+        exists = self.cursor.fetchone() is not None
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            website TEXT NOT NULL,
+            username TEXT NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            changed_at DATETIME NOT NULL,
+            UNIQUE (website, username)
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            peer_id TEXT PRIMARY KEY,
+            sent_seq INTEGER NOT NULL DEFAULT 0,
+            received_seq INTEGER NOT NULL DEFAULT 0,
+            synced_at DATETIME
+        )
+        ''')
+        # INSERT OR REPLACE gives the replaced row a new, higher seq
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS change_log_insert AFTER INSERT ON passwords
+        BEGIN
+            INSERT OR REPLACE INTO change_log (website, username, deleted, changed_at)
+            VALUES (NEW.website, NEW.username, 0, COALESCE(NEW.updated_at, CURRENT_TIMESTAMP));
+        END
+        ''')
+        # Only columns a user can change: re-encoding or re-encrypting the stored
+        # bytes (which leaves updated_at alone) must not resend the whole vault.
+        # Recreated every time so vaults made with the older, any-column trigger pick it up
+        self.cursor.execute('DROP TRIGGER IF EXISTS change_log_update')
+        self.cursor.execute('''
+        CREATE TRIGGER change_log_update
+        AFTER UPDATE OF website, username, notes, category_id, updated_at ON passwords
+        BEGIN
+            INSERT OR REPLACE INTO change_log (website, username, deleted, changed_at)
+            SELECT OLD.website, OLD.username, 1, CURRENT_TIMESTAMP
+            WHERE OLD.website IS NOT NEW.website OR OLD.username IS NOT NEW.username;
+            INSERT OR REPLACE INTO change_log (website, username, deleted, changed_at)
+            VALUES (NEW.website, NEW.username, 0, COALESCE(NEW.updated_at, CURRENT_TIMESTAMP));
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS change_log_delete AFTER DELETE ON passwords
+        BEGIN
+            INSERT OR REPLACE INTO change_log (website, username, deleted, changed_at)
+            VALUES (OLD.website, OLD.username, 1, CURRENT_TIMESTAMP);
+        END
+        ''')
+        if not exists:
+            # Vaults created before the log existed start with every entry logged once
+            self.cursor.execute('''
+            INSERT OR REPLACE INTO change_log (website, username, deleted, changed_at)
+            SELECT website, username, 0, COALESCE(updated_at, CURRENT_TIMESTAMP) FROM passwords ORDER BY id
+            ''')
+
+    def get_replica_id(self):
+        """Random id naming this copy of the vault in the sync state of other copies"""
+        return self.get_meta('replica_id') or self.new_replica_id()
+
+    def new_replica_id(self):
+        """Give this copy a fresh replica id, needed after the file itself was copied"""
+        replica_id = uuid.uuid4().hex
+        self.set_meta('replica_id', replica_id)
+        return replica_id
+
+    def get_meta(self, key):
+        """Read a vault_meta value, None if unset"""
+        try:
+            self.cursor.execute('SELECT value FROM vault_meta WHERE key = ?', (key,))
+            row = self.cursor.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"Error reading vault metadata: {e}")
+            return None
+
+    def set_meta(self, key, value, commit=True):
+        """Insert or replace a vault_meta value"""
+        self.cursor.execute('''
+            INSERT INTO vault_meta (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        ''', (key, value))
+        if commit:
+            self.conn.commit()
+
+# Columns returned by listings; encrypted_password is deliberately left out
+LISTING_COLUMNS = ('id', 'website', 'username', 'notes', 'created_at', 'updated_at', 'category_id')
+SORT_COLUMNS = ('website', 'updated_at', 'created_at', 'id')
+
 class PasswordManager:
     def __init__(self, database):
         self.db = database
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """Register callback(event, entry_id), called after 'add', 'update' or 'delete' commits"""
+        self.listeners.append(callback)
 
-    def add_password(self, website, username, encrypted_password, notes=None):
+    def _notify(self, event, entry_id):
+        for callback in self.listeners:
+            callback(event, entry_id)
+
+    def add_password(self, website, username, encrypted_password, notes=None, category_id=None):
         try:
             self.db.cursor.execute('''
-                INSERT INTO passwords (website, username, encrypted_password, notes)
-                VALUES (?, ?, ?, ?)
-            ''', (website, username, encrypted_password, notes))
+                INSERT INTO passwords (website, username, encrypted_password, notes, category_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (website, username, encrypted_password, notes, category_id))
             self.db.conn.commit()
+            self._notify('add', self.db.cursor.lastrowid)
             return True
         except sqlite3.Error as e:
             print(f"Error adding password: {e}")
             return False
 
-    def get_password(self, website):
+    def get_password(self, website, username=None):
+        """First entry for a website, or the exact (website, username) account"""
+        try:
+            if username is None:
+                self.db.cursor.execute('''
+                    SELECT * FROM passwords WHERE website = ? ORDER BY id
+                ''', (website,))
+            else:
+                self.db.cursor.execute('''
+                    SELECT * FROM passwords WHERE website = ? AND username = ?
+                ''', (website, username))
+            return self.db.cursor.fetchone()
+        except sqlite3.Error as e:
+            print(f"Error getting password: {e}")
+            return None 
+
+    def get_passwords(self, website):
+        """Every account stored for a website"""
         try:
             self.db.cursor.execute('''
-                SELECT * FROM passwords WHERE website = ?
+                SELECT * FROM passwords WHERE website = ? ORDER BY username
             ''', (website,))
+            return self.db.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error getting passwords: {e}")
+            return []
+
+    def get_password_by_id(self, entry_id):
+        try:
+            self.db.cursor.execute('SELECT * FROM passwords WHERE id = ?', (entry_id,))
             return self.db.cursor.fetchone()
         except sqlite3.Error as e:
             print(f"Error getting password: {e}")
-            return None 
+            return None
+
+    def search_websites(self, prefix, limit=50):
+        """Case-insensitive website prefix search, served by idx_passwords_website_nocase"""
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        try:
+            self.db.cursor.execute('''
+                SELECT id, website, username FROM passwords
+                WHERE website LIKE ? ESCAPE '\\'
+                ORDER BY website COLLATE NOCASE, username
+                LIMIT ?
+            ''', (escaped + '%', limit))
+            return self.db.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error searching passwords: {e}")
+            return []
+
+    def iter_index_fields(self):
+        """Yield (id, website, username, notes) for every entry, never the ciphertext"""
+        try:
+            yield from self.db.conn.execute('SELECT id, website, username, notes FROM passwords')
+        except sqlite3.Error as e:
+            print(f"Error reading entries: {e}")
 
-    def update_password(self, website, new_encrypted_password):
+    def iter_account_keys(self):
+        """Yield (website, username) for every entry, read from the covering index"""
+        try:
+            yield from self.db.conn.execute('SELECT website, username FROM passwords')
+        except sqlite3.Error as e:
+            print(f"Error reading entries: {e}")
+
+    def get_index_fields(self, entry_id):
+        try:
+            return self.db.conn.execute(
+                'SELECT id, website, username, notes FROM passwords WHERE id = ?', (entry_id,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading entry: {e}")
+            return None
+
+    def _resolve_id(self, website, username=None):
+        """Id of the single account matching website (and username), None if missing or ambiguous"""
+        if username is None:
+            self.db.cursor.execute('SELECT id FROM passwords WHERE website = ? LIMIT 2', (website,))
+        else:
+            self.db.cursor.execute('''
+                SELECT id FROM passwords WHERE website = ? AND username = ? LIMIT 2
+            ''', (website, username))
+        rows = self.db.cursor.fetchall()
+        if len(rows) > 1:
+            print(f"Multiple accounts stored for {website}, please specify the username")
+            return None
+        return rows[0][0] if rows else None
+
+    def get_any_password(self):
+        """Return one stored ciphertext, used to check a key against the vault"""
+        try:
+            self.db.cursor.execute('SELECT encrypted_password FROM passwords LIMIT 1')
+            row = self.db.cursor.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"Error getting password: {e}")
+            return None
+
+    def get_all_encrypted(self):
+        """Return (id, encrypted_password) for every entry"""
+        try:
+            self.db.cursor.execute('SELECT id, encrypted_password FROM passwords ORDER BY id')
+            return self.db.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error getting all passwords: {e}")
+            return []
+
+    def iter_encrypted_pages(self, page_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yield pages of (id, website, username, encrypted_password, updated_at) in id order,
+        one keyset query per page so a scan of the whole vault never loads it all at once
+        """
+        last_id = 0
+        while True:
+            try:
+                page = self.db.conn.execute('''
+                    SELECT id, website, username, encrypted_password, updated_at FROM passwords
+                    WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, page_size)).fetchall()
+            except sqlite3.Error as e:
+                print(f"Error reading passwords: {e}")
+                return
+            if not page:
+                return
+            yield page
+            last_id = page[-1][0]
+
+    def replace_encrypted(self, rows, commit=True):
+        """Overwrite ciphertexts from (encrypted_password, id) pairs without touching updated_at"""
+        self.db.cursor.executemany(
+            'UPDATE passwords SET encrypted_password = ? WHERE id = ?', rows)
+        if commit:
+            self.db.conn.commit()
+
+    def convert_ciphertexts(self, convert, batch_size=DEFAULT_CHUNK_SIZE, progress=None):
+        """
+        Rewrite every ciphertext still stored as text with convert(token), one
+        committed batch at a time so an interrupted run resumes where it stopped
+        Args:
+            convert: Callable mapping a text token to its new value
+            batch_size: Rows converted per transaction
+            progress: Optional callback(rows_converted_so_far)
+        Returns:
+            int: Number of rows converted
+        """
+        last_id = 0
+        count = 0
+        while True:
+            rows = self.db.conn.execute('''
+                SELECT id, encrypted_password FROM passwords
+                WHERE id > ? AND typeof(encrypted_password) = 'text'
+                ORDER BY id LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                return count
+            try:
+                self.db.conn.executemany(
+                    'UPDATE passwords SET encrypted_password = ? WHERE id = ?',
+                    [(convert(encrypted), entry_id) for entry_id, encrypted in rows])
+                self.db.conn.commit()
+            except Exception:
+                self.db.conn.rollback()
+                raise
+            last_id = rows[-1][0]
+            count += len(rows)
+            if progress:
+                progress(count)
+
+    def add_passwords(self, entries, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Insert many entries in a single transaction
+        Args:
+            entries: Iterable of (website, username, encrypted_password, notes) tuples
+            chunk_size: Rows handed to each executemany call
+        Returns:
+            int: Number of rows inserted, 0 if the transaction was rolled back
+        """
+        try:
+            # AUTOINCREMENT ids only grow, so new rows are exactly those above the current maximum
+            self.db.cursor.execute('SELECT COALESCE(MAX(id), 0) FROM passwords')
+            first_new_id = self.db.cursor.fetchone()[0]
+            count = 0
+            for chunk in _chunked(entries, chunk_size):
+                self.db.cursor.executemany('''
+                    INSERT INTO passwords (website, username, encrypted_password, notes)
+                    VALUES (?, ?, ?, ?)
+                ''', chunk)
+                count += len(chunk)
+            self.db.conn.commit()
+        except sqlite3.Error as e:
+            self.db.conn.rollback()
+            print(f"Error adding passwords: {e}")
+            return 0
+        if self.listeners:
+            for (entry_id,) in self.db.conn.execute(
+                    'SELECT id FROM passwords WHERE id > ? ORDER BY id', (first_new_id,)):
+                self._notify('add', entry_id)
+        return count
+
+    def update_passwords(self, updates, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Replace many ciphertexts in a single transaction
+        Args:
+            updates: Iterable of (entry_id, new_encrypted_password) pairs
+            chunk_size: Rows handed to each executemany call
+        Returns:
+            int: Number of rows updated, 0 if the transaction was rolled back
+        """
+        updated_ids = []
+        count = 0
+        try:
+            for chunk in _chunked(updates, chunk_size):
+                self.db.cursor.executemany('''
+                    UPDATE passwords
+                    SET encrypted_password = ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', [(encrypted, entry_id) for entry_id, encrypted in chunk])
+                updated_ids.extend(entry_id for entry_id, _ in chunk)
+                count += self.db.cursor.rowcount
+            self.db.conn.commit()
+        except sqlite3.Error as e:
+            self.db.conn.rollback()
+            print(f"Error updating passwords: {e}")
+            return 0
+        for entry_id in updated_ids:
+            self._notify('update', entry_id)
+        return count
+
+    def delete_passwords(self, entry_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Delete many entries by id in a single transaction
+        Returns:
+            int: Number of rows deleted, 0 if the transaction was rolled back
+        """
+        deleted_ids = []
+        count = 0
+        try:
+            for chunk in _chunked(entry_ids, chunk_size):
+                self.db.cursor.executemany('DELETE FROM passwords WHERE id = ?',
+                                           [(entry_id,) for entry_id in chunk])
+                deleted_ids.extend(chunk)
+                count += self.db.cursor.rowcount
+            self.db.conn.commit()
+        except sqlite3.Error as e:
+            self.db.conn.rollback()
+            print(f"Error deleting passwords: {e}")
+            return 0
+        for entry_id in deleted_ids:
+            self._notify('delete', entry_id)
+        return count
+
+    def update_password(self, website, new_encrypted_password, username=None):
+        try:
+            entry_id = self._resolve_id(website, username)
+            if entry_id is None:
+                return False
+            return self.update_password_by_id(entry_id, new_encrypted_password)
+        except sqlite3.Error as e:
+            print(f"Error updating password: {e}")
+            return False
+
+    def update_password_by_id(self, entry_id, new_encrypted_password):
         try:
             self.db.cursor.execute('''
                 UPDATE passwords 
                 SET encrypted_password = ?,
                     updated_at = CURRENT_TIMESTAMP
-                WHERE website = ?
-            ''', (new_encrypted_password, website))
+                WHERE id = ?
+            ''', (new_encrypted_password, entry_id))
             self.db.conn.commit()
+            if self.db.cursor.rowcount == 0:
+                return False
+            self._notify('update', entry_id)
             return True
         except sqlite3.Error as e:
             print(f"Error updating password: {e}")
             return False
 
-    def delete_password(self, website):
+    def delete_password(self, website, username=None):
         try:
-            self.db.cursor.execute('''
-                DELETE FROM passwords WHERE website = ?
-            ''', (website,))
+            entry_id = self._resolve_id(website, username)
+            if entry_id is None:
+                return False
+            return self.delete_password_by_id(entry_id)
+        except sqlite3.Error as e:
+            print(f"Error deleting password: {e}")
+            return False
+
+    def delete_password_by_id(self, entry_id):
+        try:
+            self.db.cursor.execute('DELETE FROM passwords WHERE id = ?', (entry_id,))
             self.db.conn.commit()
+            if self.db.cursor.rowcount == 0:
+                return False
+            self._notify('delete', entry_id)
             return True
         except sqlite3.Error as e:
             print(f"Error deleting password: {e}")
@@ -108,6 +586,62 @@ class PasswordManager:
             print(f"Error getting all passwords: {e}")
             return []
 
+    def iter_password_pages(self, order_by='website', descending=False, category_id=None,
+                            updated_since=None, page_size=100):
+        """
+        Yield pages of entries using keyset pagination, one query per page
+        Args:
+            order_by: One of SORT_COLUMNS
+            descending: Reverse the sort order
+            category_id: Only entries in this category
+            updated_since: Only entries updated at or after this 'YYYY-MM-DD HH:MM:SS' timestamp
+            page_size: Rows per page
+        Yields:
+            list: Rows with LISTING_COLUMNS plus the category name, never the ciphertext
+        """
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {order_by}")
+        direction, compare = ('DESC', '<') if descending else ('ASC', '>')
+        filters, params = [], []
+        if category_id is not None:
+            filters.append('category_id = ?')
+            params.append(category_id)
+        if updated_since is not None:
+            filters.append('updated_at >= ?')
+            params.append(updated_since)
+
+        sort_index = LISTING_COLUMNS.index(order_by)
+        columns = ', '.join(LISTING_COLUMNS) + \
+            ', (SELECT name FROM categories WHERE categories.id = passwords.category_id)'
+
+        order = f'{order_by} {direction}' if order_by == 'id' else f'{order_by} {direction}, id {direction}'
+        last = None
+        while True:
+            where = list(filters)
+            page_params = list(params)
+            if last is not None:
+                if order_by == 'id':
+                    where.append(f'id {compare} ?')
+                    page_params.append(last[0])
+                else:
+                    where.append(f'({order_by}, id) {compare} (?, ?)')
+                    page_params.extend((last[sort_index], last[0]))
+            sql = f'SELECT {columns} FROM passwords'
+            if where:
+                sql += ' WHERE ' + ' AND '.join(where)
+            sql += f' ORDER BY {order} LIMIT ?'
+            try:
+                page = self.db.conn.execute(sql, page_params + [page_size]).fetchall()
+            except sqlite3.Error as e:
+                print(f"Error listing passwords: {e}")
+                return
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            last = page[-1]
+
     def get_all_categories(self):
         try:
             self.db.cursor.execute('SELECT * FROM categories')
@@ -129,13 +663,188 @@ class PasswordManager:
             return False        
         
     def delete_category(self, name):
+        """Delete a category; its entries become uncategorised"""
         try:
+            category_id = self.get_category_id(name)
+            if category_id is None:
+                return True
+            entry_ids = [row[0] for row in self.db.cursor.execute(
+                'SELECT id FROM passwords WHERE category_id = ?', (category_id,)).fetchall()]
             self.db.cursor.execute('''
-                DELETE FROM categories WHERE name = ?
-            ''', (name,))
+                UPDATE passwords SET category_id = NULL WHERE category_id = ?
+            ''', (category_id,))
+            self.db.cursor.execute('DELETE FROM categories WHERE id = ?', (category_id,))
+            self.db.cursor.execute('DELETE FROM category_counts WHERE category_id = ?', (category_id,))
             self.db.conn.commit()
-            return True
         except sqlite3.Error as e:
+            self.db.conn.rollback()
             print(f"Error deleting category: {e}")
             return False
+        for entry_id in entry_ids:
+            self._notify('update', entry_id)
+        return True
+
+    def get_category_id(self, name):
+        try:
+            self.db.cursor.execute('SELECT id FROM categories WHERE name = ?', (name,))
+            row = self.db.cursor.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"Error getting category: {e}")
+            return None
+
+    def get_category_name(self, category_id):
+        try:
+            self.db.cursor.execute('SELECT name FROM categories WHERE id = ?', (category_id,))
+            row = self.db.cursor.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"Error getting category: {e}")
+            return None
+
+    def assign_category(self, entry_ids, category_id, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Move many entries into a category (None to clear it) in one transaction
+        Returns:
+            int: Number of entries updated, 0 if the transaction was rolled back
+        """
+        updated_ids = []
+        count = 0
+        try:
+            for chunk in _chunked(entry_ids, chunk_size):
+                self.db.cursor.executemany('''
+                    UPDATE passwords SET category_id = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', [(category_id, entry_id) for entry_id in chunk])
+                updated_ids.extend(chunk)
+                count += self.db.cursor.rowcount
+            self.db.conn.commit()
+        except sqlite3.Error as e:
+            self.db.conn.rollback()
+            print(f"Error assigning category: {e}")
+            return 0
+        for entry_id in updated_ids:
+            self._notify('update', entry_id)
+        return count
+
+    def get_passwords_by_category(self, name):
+        """Entries in a category with its name, via idx_passwords_category; no ciphertext"""
+        try:
+            self.db.cursor.execute('''
+                SELECT p.id, p.website, p.username, p.notes, p.created_at, p.updated_at, c.name
+                FROM categories c
+                JOIN passwords p ON p.category_id = c.id
+                WHERE c.name = ?
+                ORDER BY p.website, p.username
+            ''', (name,))
+            return self.db.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error getting passwords by category: {e}")
+            return []
+
+    def get_category_counts(self):
+        """(name, count) per category from the trigger-maintained summary; None is uncategorised"""
+        try:
+            self.db.cursor.execute('''
+                SELECT c.name, COALESCE(cc.count, 0)
+                FROM categories c
+                LEFT JOIN category_counts cc ON cc.category_id = c.id
+                UNION ALL
+                SELECT NULL, count FROM category_counts WHERE category_id = 0 AND count > 0
+            ''')
+            return self.db.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error getting category counts: {e}")
+            return []
         
+
+    def get_changes_since(self, seq):
+        """(seq, website, username, deleted, changed_at) for every change_log row after seq"""
+        return self.db.conn.execute('''
+            SELECT seq, website, username, deleted, changed_at FROM change_log
+            WHERE seq > ? ORDER BY seq
+        ''', (seq,)).fetchall()
+
+    def get_last_seq(self):
+        return self.db.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log').fetchone()[0]
+
+    def get_sync_record(self, website, username):
+        """(encrypted_password, notes, created_at, updated_at, category name) of an account, None if absent"""
+        return self.db.conn.execute('''
+            SELECT p.encrypted_password, p.notes, p.created_at, p.updated_at, c.name
+            FROM passwords p
+            LEFT JOIN categories c ON c.id = p.category_id
+            WHERE p.website = ? AND p.username = ?
+            ORDER BY p.id LIMIT 1
+        ''', (website, username)).fetchone()
+
+    def get_sync_state(self, peer_id):
+        """(sent_seq, received_seq) already exchanged with a peer copy"""
+        row = self.db.conn.execute(
+            'SELECT sent_seq, received_seq FROM sync_state WHERE peer_id = ?', (peer_id,)).fetchone()
+        return row or (0, 0)
+
+    def set_sync_state(self, peer_id, sent_seq, received_seq, commit=True):
+        self.db.conn.execute('''
+            INSERT INTO sync_state (peer_id, sent_seq, received_seq, synced_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(peer_id) DO UPDATE SET
+                sent_seq = excluded.sent_seq,
+                received_seq = excluded.received_seq,
+                synced_at = excluded.synced_at
+        ''', (peer_id, sent_seq, received_seq))
+        if commit:
+            self.db.conn.commit()
+
+    def apply_changes(self, records, deletions, commit=True):
+        """
+        Write changes replicated from another copy of the vault, keeping their
+        timestamps so last-writer-wins gives the same answer on every copy
+        Args:
+            records: (website, username, encrypted_password, notes, created_at, updated_at, category) tuples
+            deletions: (website, username, deleted_at) tuples
+            commit: Commit here; pass False to commit together with other writes
+        Returns:
+            int: Number of accounts written or deleted
+        """
+        events = []
+        cursor = self.db.conn.cursor()
+        try:
+            for website, username, encrypted, notes, created_at, updated_at, category in records:
+                category_id = None
+                if category:
+                    cursor.execute('INSERT OR IGNORE INTO categories (name) VALUES (?)', (category,))
+                    cursor.execute('SELECT id FROM categories WHERE name = ?', (category,))
+                    category_id = cursor.fetchone()[0]
+                ids = [row[0] for row in cursor.execute(
+                    'SELECT id FROM passwords WHERE website = ? AND username = ?', (website, username))]
+                if ids:
+                    cursor.execute('''
+                        UPDATE passwords
+                        SET encrypted_password = ?, notes = ?, updated_at = ?, category_id = ?
+                        WHERE website = ? AND username = ?
+                    ''', (encrypted, notes, updated_at, category_id, website, username))
+                    events.extend(('update', entry_id) for entry_id in ids)
+                else:
+                    cursor.execute('''
+                        INSERT INTO passwords
+                            (website, username, encrypted_password, notes, created_at, updated_at, category_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (website, username, encrypted, notes, created_at, updated_at, category_id))
+                    events.append(('add', cursor.lastrowid))
+            for website, username, deleted_at in deletions:
+                ids = [row[0] for row in cursor.execute(
+                    'SELECT id FROM passwords WHERE website = ? AND username = ?', (website, username))]
+                cursor.execute('DELETE FROM passwords WHERE website = ? AND username = ?', (website, username))
+                # The delete trigger stamps the local time; keep the original deletion time instead
+                cursor.execute('UPDATE change_log SET changed_at = ? WHERE website = ? AND username = ?',
+                               (deleted_at, website, username))
+                events.extend(('delete', entry_id) for entry_id in ids)
+            if commit:
+                self.db.conn.commit()
+        except sqlite3.Error:
+            self.db.conn.rollback()
+            raise
+        for event, entry_id in events:
+            self._notify(event, entry_id)
+        return len(records) + len(deletions)
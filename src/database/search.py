@@ -0,0 +1,216 @@
+import gc
+import heapq
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+
+from database.models import Database, PasswordManager
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+@lru_cache(maxsize=4096)
+def trigrams(text):
+    """Trigrams of every word in text, each word padded so its edges count too"""
+    padded = f" {' '.join(_WORD_RE.findall(text.lower()))} "
+    # A space in the middle would mean the trigram straddles two words
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2) if padded[i + 1] != ' ')
+
+
+class SearchIndex:
+    """
+    Typo-tolerant trigram index over website, username and notes.
+
+    Only plaintext metadata is indexed; encrypted_password is never read.
+    The index is built once, ideally ahead of time with start_build(), and
+    then kept current through PasswordManager change notifications.
+    """
+
+    FIELD_WEIGHTS = {'website': 3.0, 'username': 2.0, 'notes': 1.0}
+    # Trigrams present in more than this share of entries (".com", "mail")
+    # carry little signal, so they only score a bounded set of candidates
+    MAX_DOC_FREQUENCY = 0.01
+    # Entries scored on common trigrams, and rarest-posting entries looked at to find them
+    MAX_CANDIDATES = 200
+    MAX_SCAN = 2000
+    MIN_SCORE = 0.3
+
+    def __init__(self, password_manager):
+        self.password_manager = password_manager
+        self.postings = defaultdict(dict)
+        self.docs = {}
+        self.built = False
+        # Background build state; changes made meanwhile are replayed afterwards
+        self._lock = threading.Lock()
+        self._builder = None
+        self._built_index = None
+        self._pending = []
+        password_manager.add_listener(self._on_change)
+
+    def build(self):
+        """Index every entry now; later changes arrive incrementally"""
+        self.postings, self.docs = self._collect(self.password_manager.iter_index_fields())
+        self.built = True
+
+    def start_build(self):
+        """
+        Build the index on a background thread with its own read connection, so
+        the first search does not pay for it. A search that comes sooner waits.
+        """
+        with self._lock:
+            if self.built or self._builder is not None:
+                return
+            self._builder = threading.Thread(target=self._build_in_background, name='search-index', daemon=True)
+            self._builder.start()
+
+    def _build_in_background(self):
+        db = Database(self.password_manager.db.db_path)
+        db.connect()
+        if db.conn is None:
+            return
+        try:
+            self._built_index = self._collect(PasswordManager(db).iter_index_fields())
+        finally:
+            db.close()
+
+    def _ensure_built(self):
+        builder = self._builder
+        if builder is not None:
+            builder.join()
+            with self._lock:
+                self._builder = None
+                index, self._built_index = self._built_index, None
+                pending, self._pending = self._pending, []
+            if index is not None:
+                self.postings, self.docs = index
+                self.built = True
+                for event, entry_id in pending:
+                    self._apply(event, entry_id)
+        if not self.built:
+            self.build()
+
+    def _collect(self, rows):
+        """Postings and docs for rows of (id, website, username, notes)"""
+        postings = defaultdict(dict)
+        docs = {}
+        # Millions of small dict inserts would otherwise trigger repeated full GC passes
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for row in rows:
+                self._index(*row, postings=postings, docs=docs)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return postings, docs
+
+    def _index(self, entry_id, website, username, notes, postings=None, docs=None):
+        weights = {}
+        for field, value in (('website', website), ('username', username), ('notes', notes)):
+            if value:
+                field_weight = self.FIELD_WEIGHTS[field]
+                for gram in trigrams(value):
+                    weights[gram] = weights.get(gram, 0.0) + field_weight
+        postings = self.postings if postings is None else postings
+        docs = self.docs if docs is None else docs
+        for gram, weight in weights.items():
+            postings[gram][entry_id] = weight
+        docs[entry_id] = (website, username, tuple(weights))
+
+    def _unindex(self, entry_id):
+        doc = self.docs.pop(entry_id, None)
+        if doc is None:
+            return
+        for gram in doc[2]:
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.pop(entry_id, None)
+                if not posting:
+                    del self.postings[gram]
+
+    def _on_change(self, event, entry_id):
+        with self._lock:
+            if self._builder is not None:
+                self._pending.append((event, entry_id))
+                return
+        if self.built:
+            self._apply(event, entry_id)
+
+    def _apply(self, event, entry_id):
+        self._unindex(entry_id)
+        if event != 'delete':
+            row = self.password_manager.get_index_fields(entry_id)
+            if row:
+                self._index(*row)
+
+    def search(self, query, limit=10):
+        """
+        Rank entries against query
+        Args:
+            query: Free text, typos allowed
+            limit: Maximum number of results
+        Returns:
+            list: (id, website, username, score) tuples, best match first
+        """
+        self._ensure_built()
+        grams = trigrams(query)
+        if not grams:
+            return []
+        # Trigrams no entry has (usually the typo itself) cannot add to any score
+        present = sorted((self.postings[g] for g in grams if g in self.postings), key=len)
+        if not present:
+            return []
+
+        max_postings = max(1, int(len(self.docs) * self.MAX_DOC_FREQUENCY))
+        selective = [posting for posting in present if len(posting) <= max_postings]
+        common = present[len(selective):]
+
+        scores = {}
+        get_score = scores.get
+        for posting in selective:
+            for entry_id, weight in posting.items():
+                scores[entry_id] = get_score(entry_id, 0.0) + weight
+        if common:
+            if len(scores) > self.MAX_CANDIDATES:
+                # Keep the best selective matches as candidates, cutting ties at the limit
+                threshold = sorted(scores.values(), reverse=True)[self.MAX_CANDIDATES - 1]
+                kept = {entry_id: score for entry_id, score in scores.items() if score > threshold}
+                tied = (entry_id for entry_id, score in scores.items() if score == threshold)
+                kept.update((entry_id, threshold) for entry_id in islice(tied, self.MAX_CANDIDATES - len(kept)))
+                scores = kept
+            # Common trigrams still count, but only over a bounded candidate set:
+            # the selective matches plus a scan of the rarest common posting,
+            # preferring entries that also hold the next one. A typo in a
+            # common name leaves only common trigrams to find it by.
+            room = self.MAX_CANDIDATES - len(scores)
+            if room > 0:
+                rarest = common[0]
+                scan = list(islice(rarest, self.MAX_SCAN))
+                if len(common) > 1:
+                    following = common[1]
+                    scan = [entry_id for entry_id in scan if entry_id in following] or scan
+                for entry_id in scan[:room]:
+                    scores.setdefault(entry_id, 0.0)
+            for posting in common:
+                get = posting.get
+                for entry_id in scores:
+                    scores[entry_id] += get(entry_id, 0.0)
+
+        # Normalise by the best possible score so results are comparable across queries
+        best_possible = len(grams) * max(self.FIELD_WEIGHTS.values())
+        needle = query.lower()
+        results = []
+        for entry_id, score in heapq.nlargest(limit * 4, scores.items(), key=itemgetter(1)):
+            website, username, _ = self.docs[entry_id]
+            score /= best_possible
+            if website.lower().startswith(needle):
+                score += 1.0
+            elif needle in website.lower() or needle in username.lower():
+                score += 0.5
+            if score >= self.MIN_SCORE:
+                results.append((entry_id, website, username, round(score, 3)))
+        results.sort(key=lambda result: result[3], reverse=True)
+        return results[:limit]
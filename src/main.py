@@ -1,304 +1,247 @@
+"""
+Command line entry point. Without a command it starts the interactive menu;
+with one it runs that command and exits, printing JSON for vault commands.
+
+Only argparse is imported up front. Each command imports what it needs when
+it runs, and only vault commands open the database, so `--help` and
+`generate` never load cryptography or touch the data directory.
+Check with: python -X importtime src/main.py generate
+"""
+import argparse
 import os
-from pathlib import Path
-from core.password import Encryption
-from core.generator import PasswordGen
-from database.models import Database, PasswordManager
-from core.storage import StorageManager
-import shutil
 import sys
-from typing import Optional
-
-class PasswordManagerApp:
-    def __init__(self):
-        self.storage = StorageManager()
-        self.db = Database(str(self.storage.db_path))
-        self.db.connect()
-        self.db.init_tables()
-        self.password_manager = PasswordManager(self.db)
-        self.generator = PasswordGen()
-        self.encryption = None  
-
-    def initialize_encryption(self, master_password: str):
-        """Initialize encryption with master password"""
-        self.encryption = Encryption(master_password)
-
-    def add_password(self, website: str, username: str, password: str, notes: str = None) -> bool:
-        """Add encrypted password to database"""
-        if not self.encryption:
-            print("Please initialize encryption first!")
-            return False
-        try:
-            encrypted_password = self.encryption.encrypt(password)
-            return self.password_manager.add_password(website, username, encrypted_password, notes)
-        except Exception as e:
-            print(f"Failed to add password: {e}")
-            return False
-
-    def get_password(self, website: str) -> Optional[dict]:
-        """Retrieve and decrypt password"""
-        if not self.encryption:
-            print("Please initialize encryption first!")
-            return None
-        try:
-            result = self.password_manager.get_password(website)
-            if result:
-                id_, website, username, encrypted_password, notes, created, updated, category = result
-                decrypted_password = self.encryption.decrypt(encrypted_password)
-                return {
-                    'website': website,
-                    'username': username,
-                    'password': decrypted_password,
-                    'notes': notes,
-                    'created': created,
-                    'updated': updated,
-                    'category': category
-                }
-        except Exception as e:
-            print(f"Failed to retrieve password: {e}")
-        return None
-
-    def backup_data(self, backup_path: str = None) -> Optional[str]:
-        """Create backup of all data"""
-        try:
-            backup_location = self.storage.create_backup(backup_path)
-            if backup_location and self.storage.verify_backup(backup_location):
-                return backup_location
-            print("Backup verification failed")
-            return None
-        except Exception as e:
-            print(f"Backup failed: {e}")
-            return None
-
-    def restore_data(self, backup_path: str) -> bool:
-        """Restore data from backup"""
-        try:
-            if not self.storage.verify_backup(backup_path):
-                print("Invalid or corrupted backup")
-                return False
-            return self.storage.restore_backup(backup_path)
-        except Exception as e:
-            print(f"Restore failed: {e}")
-            return False
-
-    def export_to_usb(self, usb_path: str) -> bool:
-        """Export database to USB drive"""
-        if not usb_path:
-            print("Please provide a USB drive path")
-            return False
-        try:
-            return self.storage.export_to_device(usb_path)
-        except Exception as e:
-            print(f"Export failed: {e}")
-            return False
 
-    def import_from_usb(self, usb_path: str) -> bool:
-        """Import database from USB drive"""
-        try:
-            return self.storage.import_from_device(usb_path)
-        except Exception as e:
-            print(f"Import failed: {e}")
-            return False
 
-    def list_backups(self, backup_path: str = None) -> list:
-        """List available backups"""
-        try:
-            return self.storage.get_backup_list(backup_path)
-        except Exception as e:
-            print(f"Failed to list backups: {e}")
-            return []
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Password manager; starts the interactive menu without a command")
+    subparsers = parser.add_subparsers(dest='command')
+
+    generate = subparsers.add_parser('generate', aliases=['gen'],
+                                     help="print freshly generated passwords, one per line")
+    generate.add_argument('-n', '--count', type=int, default=1, help="number of passwords (default 1)")
+    generate.add_argument('-l', '--length', type=int, default=16, help="password length (default 16)")
+    generate.add_argument('--no-lowercase', dest='use_lowercase', action='store_false')
+    generate.add_argument('--no-uppercase', dest='use_uppercase', action='store_false')
+    generate.add_argument('--no-digits', dest='use_digits', action='store_false')
+    generate.add_argument('--no-symbols', dest='use_symbols', action='store_false')
+    generate.add_argument('--json', action='store_true', help="print one JSON array instead of lines")
+    generate.set_defaults(handler=generate_command)
+
+    strength = subparsers.add_parser('strength', help="rate passwords read from stdin, one per line")
+    strength.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: inline)")
+    strength.set_defaults(handler=strength_command)
+
+    pack = subparsers.add_parser('pack-breaches', help="pack a downloaded HIBP SHA-1 corpus for offline checks")
+    pack.add_argument('source', help="text corpus, HASH:COUNT lines ordered by hash")
+    pack.add_argument('dest', help="packed file to write; point PWMGR_HIBP at it")
+    pack.add_argument('--bloom-bits', type=int, default=10,
+                      help="Bloom filter bits per hash, 0 to skip the filter (default 10, about 1%% false positives)")
+    pack.set_defaults(handler=pack_breaches_command)
+
+    get = subparsers.add_parser('get', help="print an entry with its password as JSON")
+    get.add_argument('website')
+    get.add_argument('-u', '--username', help="account to show when the website has several")
+    get.set_defaults(handler=vault_command, action=get_entry, needs_key=True)
+
+    add = subparsers.add_parser('add', help="store a password read from stdin, or a generated one")
+    add.add_argument('website')
+    add.add_argument('username')
+    add.add_argument('-g', '--generate', type=int, metavar='LENGTH', help="generate a password of this length")
+    add.add_argument('--notes')
+    add.add_argument('--category')
+    add.set_defaults(handler=vault_command, action=add_entry, needs_key=True)
+
+    listing = subparsers.add_parser('list', help="print stored entries as JSON, without passwords")
+    listing.add_argument('--sort', choices=('website', 'updated'), default='website')
+    listing.add_argument('--category', help="only entries in this category")
+    listing.set_defaults(handler=vault_command, action=list_entries, needs_key=False)
+
+    backup = subparsers.add_parser('backup', help="create and verify a backup")
+    backup.add_argument('--path', help="folder to keep backups in (default data/backups)")
+    backup.add_argument('--incremental', action='store_true', help="only store chunks changed since the last one")
+    backup.set_defaults(handler=vault_command, action=create_backup, needs_key=False)
+
+    restore = subparsers.add_parser('restore', help="restore a backup, or only one website's entries from it")
+    restore.add_argument('backup', help="backup file or directory")
+    restore.add_argument('--website', help="merge just this website's accounts into the vault")
+    restore.add_argument('-u', '--username', help="with --website, only this account")
+    restore.set_defaults(handler=vault_command, action=restore_backup, needs_key=None)
+    return parser
+
+
+def _close_stdout_quietly() -> None:
+    # Reader went away (e.g. piped into head); keep the exit-time flush from failing again
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+def generate_command(args) -> int:
+    """Stream passwords to stdout as they are produced; no vault is opened"""
+    from core.generator import PasswordGen
 
-    def generate_password(self, length: int = 16, include_special: bool = True) -> Optional[str]:
-        """Generate a secure password"""
-        try:
-            return self.generator.generate(length, include_special)
-        except Exception as e:
-            print(f"Failed to generate password: {e}")
-            return None
+    try:
+        passwords = PasswordGen().generate_batch(args.count, args.length, args.use_lowercase,
+                                                 args.use_uppercase, args.use_digits, args.use_symbols)
+        if args.json:
+            import json
+            json.dump(list(passwords), sys.stdout)
+            sys.stdout.write('\n')
+        else:
+            sys.stdout.writelines(password + '\n' for password in passwords)
+        sys.stdout.flush()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        _close_stdout_quietly()
+    return 0
+
+
+def strength_command(args) -> int:
+    """Print guesses (log10) and a 0-4 score for every password on stdin"""
+    from core.strength import StrengthEstimator
+
+    passwords = [line.rstrip('\r\n') for line in sys.stdin]
+    try:
+        results = StrengthEstimator().estimate_many(passwords, workers=args.jobs)
+        sys.stdout.writelines(f"{result.score}\t{result.guesses_log10:.2f}\n" for result in results)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        _close_stdout_quietly()
+    return 0
+
+
+def pack_breaches_command(args) -> int:
+    """Build the packed corpus and, unless disabled, its Bloom filter"""
+    from core.breach import BreachChecker, pack_corpus
 
-    def clear_database(self) -> bool:
-        """Clear all data and reset the database"""
-        try:
-            self.close()  # Close database connection first
-            if os.path.exists('data'):
-                shutil.rmtree('data')
-            return True
-        except Exception as e:
-            print(f"Error clearing database: {e}")
-            return False
-
-    def close(self):
-        """Clean up and close connections"""
-        try:
-            self.db.close()
-        except Exception as e:
-            print(f"Error closing database: {e}")
-
-def print_menu():
-    print("\n=== Password Manager CLI ===")
-    print("1. Add Password")
-    print("2. Get Password")
-    print("3. Generate Password")
-    print("4. List All Passwords")
-    print("5. Create Backup")
-    print("6. Restore from Backup")
-    print("7. Export to USB")
-    print("8. Import from USB")
-    print("9. List Backups")
-    print("10. Clear Database")
-    print("11. Exit")
-    return input("Choose an option (1-11): ")
-
-def main():
-    app = PasswordManagerApp()
-    
-    print("\n⚠️  IMPORTANT: Please remember your master password!")
-    print("There is NO WAY to recover your passwords if you forget the master password.")
-    print("The master password is never stored and is required to decrypt your passwords.\n")
-    
     try:
-        # Get master password 
-        master_password = input("Enter master password: ")
-        app.initialize_encryption(master_password)
-        
-        while True:
-            try:
-                choice = print_menu()
-                
-                if choice == '1':
-                    website = input("Enter website: ")
-                    username = input("Enter username: ")
-                    use_generated = input("Generate password? (y/n): ").lower() == 'y'
-                    if use_generated:
-                        length = int(input("Enter password length (default 16): ") or "16")
-                        special = input("Include special characters? (y/n): ").lower() == 'y'
-                        password = app.generate_password(length, special)
-                        if password:
-                            print(f"Generated password: {password}")
-                        else:
-                            continue
-                    else:
-                        password = input("Enter password: ")
-                    notes = input("Enter notes (optional): ")
-                    
-                    if app.add_password(website, username, password, notes):
-                        print("Password added successfully!")
-                    else:
-                        print("Failed to add password.")
-
-                elif choice == '2':
-                    website = input("Enter website to search: ")
-                    result = app.get_password(website)
-                    if result:
-                        print("\nPassword Details:")
-                        print(f"Website: {result['website']}")
-                        print(f"Username: {result['username']}")
-                        print(f"Password: {result['password']}")
-                        if result['notes']:
-                            print(f"Notes: {result['notes']}")
-                        print(f"Created: {result['created']}")
-                        print(f"Last Updated: {result['updated']}")
-                        if result['category']:
-                            print(f"Category: {result['category']}")
-                    else:
-                        print("Password not found.")
-
-                elif choice == '3':
-                    length = int(input("Enter password length (default 16): ") or "16")
-                    special = input("Include special characters? (y/n): ").lower() == 'y'
-                    password = app.generate_password(length, special)
-                    if password:
-                        print(f"\nGenerated password: {password}")
-
-                elif choice == '4':
-                    passwords = app.password_manager.get_all_passwords()
-                    if passwords:
-                        print("\nAll Stored Passwords:")
-                        for pwd in passwords:
-                            id_, website, username, _, notes, created, updated, category = pwd
-                            print(f"\nWebsite: {website}")
-                            print(f"Username: {username}")
-                            if notes:
-                                print(f"Notes: {notes}")
-                            print(f"Created: {created}")
-                            print(f"Last Updated: {updated}")
-                            if category:
-                                print(f"Category: {category}")
-                    else:
-                        print("No passwords stored.")
-
-                elif choice == '5':
-                    backup_path = input("Enter backup path (or press Enter for default): ")
-                    backup_path = backup_path if backup_path else None
-                    backup_location = app.backup_data(backup_path)
-                    if backup_location:
-                        print(f"Backup created and verified at: {backup_location}")
-                    else:
-                        print("Backup failed.")
-
-                elif choice == '6':
-                    backup_path = input("Enter backup path to restore from: ")
-                    if app.restore_data(backup_path):
-                        print("Backup restored and verified successfully!")
-                        print("Please restart the application to use the restored data.")
-                        break
-                    else:
-                        print("Failed to restore backup.")
-
-                elif choice == '7':
-                    usb_path = input("Enter USB drive path: ")
-                    if app.export_to_usb(usb_path):
-                        print(f"Data exported to: {usb_path}")
-                    else:
-                        print("Export failed.")
-
-                elif choice == '8':
-                    usb_path = input("Enter USB drive path: ")
-                    if app.import_from_usb(usb_path):
-                        print("Data imported successfully!")
-                        print("Please restart the application to use the imported data.")
-                        break
-                    else:
-                        print("Import failed.")
-
-                elif choice == '9':
-                    backup_path = input("Enter backup directory to list (or press Enter for default): ")
-                    backup_path = backup_path if backup_path else None
-                    backups = app.list_backups(backup_path)
-                    if backups:
-                        print("\nAvailable Backups:")
-                        for backup in backups:
-                            print(f"- {backup}")
-                    else:
-                        print("No backups found.")
-
-                elif choice == '10':
-                    print("\n⚠️  WARNING: This will permanently delete all stored passwords!")
-                    confirm = input("Are you sure you want to clear the database? (type 'YES' to confirm): ")
-                    if confirm == 'YES':
-                        if app.clear_database():
-                            print("Database cleared successfully.")
-                            print("Please restart the application to create a new database.")
-                            break
-                        else:
-                            print("Failed to clear database.")
-
-                elif choice == '11':
-                    break
-                else:
-                    print("Invalid choice. Please try again.")
-
-            except ValueError as e:
-                print(f"Invalid input: {e}")
-            except Exception as e:
-                print(f"An error occurred: {e}")
-                print("Please try again.")
-
-    except KeyboardInterrupt:
-        print("\nExiting...")
-    except Exception as e:
-        print(f"Fatal error: {e}")
-    finally:
-        app.close()
+        count = pack_corpus(args.source, args.dest)
+        print(f"Packed {count:,} hashes into {args.dest}")
+        if args.bloom_bits > 0:
+            checker = BreachChecker(args.dest)
+            checker.build_bloom(bits_per_entry=args.bloom_bits)
+            print(f"Wrote Bloom filter {checker.bloom_path}")
+            checker.close()
+    except (OSError, ValueError) as e:
+        print(f"Failed to pack breach corpus: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _unlock(app) -> bool:
+    """Key from the unlock agent, else the master password (prompted on the terminal)"""
+    if app.unlock_from_agent():
+        return True
+    import getpass
+    return app.initialize_encryption(getpass.getpass("Master password: "))
+
+
+def get_entry(app, args) -> dict:
+    if args.username is None:
+        accounts = app.list_accounts(args.website)
+        if len(accounts) > 1:
+            return {'error': f"Several accounts for {args.website}; pass --username", 'accounts': accounts}
+    entry = app.get_password(args.website, args.username)
+    if not entry:
+        return {'error': f"No entry for {args.website}"}
+    return entry.to_dict()
+
+
+def add_entry(app, args) -> dict:
+    generated = args.generate is not None
+    if generated:
+        password = app.generate_password(args.generate)
+    elif sys.stdin.isatty():
+        import getpass
+        password = getpass.getpass("Password to store: ")
+    else:
+        # Never from argv, where other users could read it in the process list
+        password = sys.stdin.readline().rstrip('\r\n')
+    if not password:
+        return {'error': "No password given"}
+    if not app.add_password(args.website, args.username, password, args.notes, args.category):
+        return {'error': f"Could not add {args.website} ({args.username})"}
+    result = {'website': args.website, 'username': args.username, 'added': True}
+    strength = app.check_strength(password, (args.website, args.username))
+    if strength:
+        result['strength'] = strength['strength']
+    breached = app.check_breached(password)
+    if breached is not None:
+        result['breached'] = breached
+    if generated:
+        result['password'] = password
+    return result
+
+
+def list_entries(app, args) -> list:
+    category_id = None
+    if args.category:
+        category_id = app.password_manager.get_category_id(args.category)
+        if category_id is None:
+            return []
+    order_by, descending = ('updated_at', True) if args.sort == 'updated' else ('website', False)
+    pages = app.password_manager.iter_password_pages(order_by, descending, category_id, page_size=500)
+    return [
+        {'id': id_, 'website': website, 'username': username, 'notes': notes,
+         'created': created, 'updated': updated, 'category': category}
+        for page in pages
+        for id_, website, username, notes, created, updated, _, category in page
+    ]
+
+
+def create_backup(app, args) -> dict:
+    location = app.backup_data(args.path, args.incremental)
+    if not location:
+        return {'error': "Backup failed"}
+    return {'backup': str(location)}
+
+
+def restore_backup(app, args) -> dict:
+    if args.website:
+        restored = app.restore_entries(args.backup, args.website, args.username)
+        if restored is None:
+            return {'error': "Restore failed"}
+        return {'restored': restored}
+    if not app.restore_data(args.backup):
+        return {'error': "Restore failed"}
+    return {'restored': 'all'}
+
+
+def vault_command(args) -> int:
+    """
+    Open the vault, run args.action(app, args) and print its result as JSON.
+    The app reports progress and errors with print, so that goes to stderr
+    while the command runs, leaving stdout to the JSON document.
+    """
+    import json
+    from contextlib import redirect_stdout
+
+    out = sys.stdout
+    with redirect_stdout(sys.stderr):
+        from app import PasswordManagerApp
+
+        app = PasswordManagerApp()
+        try:
+            needs_key = args.needs_key if args.needs_key is not None else bool(args.website)
+            if needs_key and not _unlock(app):
+                result = {'error': "Could not unlock the vault"}
+            else:
+                result = args.action(app, args)
+        finally:
+            app.close()
+    json.dump(result, out, indent=2, default=str)
+    out.write('\n')
+    return 1 if isinstance(result, dict) and 'error' in result else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command:
+        return args.handler(args)
+
+    from app import run_interactive
+    return run_interactive()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app imports its modules relative to src/, as when run with python src/main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from database.models import Database, PasswordManager  # noqa: E402
+
+
+@pytest.fixture(params=['default', 'wal'])
+def profile(request):
+    return request.param
+
+
+@pytest.fixture
+def password_manager(tmp_path, profile):
+    db = Database(str(tmp_path / 'passwords.db'), profile=profile)
+    db.connect()
+    db.init_tables()
+    yield PasswordManager(db)
+    db.close()
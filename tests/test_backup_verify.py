@@ -0,0 +1,41 @@
+"""verify_backup must only take the fast path on a catalog written when the backup was made"""
+import shutil
+import zipfile
+from pathlib import Path
+
+from core.storage import CATALOG_NAME, StorageManager
+from database.models import Database, PasswordManager
+
+
+def make_backup(tmp_path):
+    storage = StorageManager(str(tmp_path / 'data'))
+    db = Database(str(storage.db_path))
+    db.connect()
+    db.init_tables()
+    PasswordManager(db).add_password('site.example', 'user', b'token')
+    db.close()
+    return storage, storage.create_backup()
+
+
+def tamper(backup_dir):
+    with zipfile.ZipFile(backup_dir / 'backup.zip', 'w') as zipf:
+        zipf.writestr('metadata.json', '{}')
+
+
+def test_uncatalogued_backup_gets_the_deep_check(tmp_path):
+    storage, location = make_backup(tmp_path)
+    loose = tmp_path / 'elsewhere' / 'copy'
+    shutil.copytree(location, loose)
+    assert storage.verify_backup(str(loose))
+    tamper(loose)
+    assert not storage.verify_backup(str(loose))
+    assert not (loose.parent / CATALOG_NAME).exists()
+
+
+def test_missing_catalog_is_not_rebuilt_by_verify(tmp_path):
+    storage, location = make_backup(tmp_path)
+    catalog = storage.base_path / 'backups' / CATALOG_NAME
+    catalog.unlink()
+    tamper(Path(location))
+    assert not storage.verify_backup(location)
+    assert not catalog.exists()
@@ -0,0 +1,38 @@
+"""encrypt_many/decrypt_many: inline by default, a pool only when asked for"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cryptography.fernet import Fernet
+
+import core.password
+from core.password import Encryption
+
+
+@pytest.fixture
+def encryption():
+    return Encryption.from_key(Fernet.generate_key())
+
+
+def test_default_runs_inline(encryption, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError('batch started a pool')
+    monkeypatch.setattr(core.password, 'ThreadPoolExecutor', no_pool)
+    monkeypatch.setattr(core.password, 'ProcessPoolExecutor', no_pool)
+    plaintexts = [f'secret-{i}' for i in range(1000)]
+    tokens = [result.value for result in encryption.encrypt_many(plaintexts, chunk_size=16)]
+    results = list(encryption.decrypt_many(tokens + ['not a token'], chunk_size=16))
+    assert [result.index for result in results] == list(range(1001))
+    assert [result.value for result in results[:-1]] == plaintexts
+    assert results[-1].value is None and results[-1].error.startswith('Decryption failed')
+
+
+def test_workers_keep_input_order(encryption, monkeypatch):
+    pools = []
+    def pool(*args, **kwargs):
+        pools.append(ThreadPoolExecutor(*args, **kwargs))
+        return pools[-1]
+    monkeypatch.setattr(core.password, 'ThreadPoolExecutor', pool)
+    plaintexts = [f'secret-{i}' for i in range(1000)]
+    tokens = [result.value for result in encryption.encrypt_many(plaintexts, chunk_size=16, workers=2)]
+    assert [result.value for result in encryption.decrypt_many(tokens, chunk_size=16, workers=2)] == plaintexts
+    assert len(pools) == 2
@@ -0,0 +1,133 @@
+"""add_passwords, update_passwords and delete_passwords: chunking, rollback, listeners, throughput"""
+import math
+import time
+
+ROWS = 50
+CHUNK_SIZE = 7
+THROUGHPUT_ROWS = 20000
+
+
+class CountingCursor:
+    """Wraps a sqlite3 cursor to count executemany calls, i.e. chunks"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.executemany_calls = 0
+
+    def executemany(self, sql, rows):
+        self.executemany_calls += 1
+        return self.cursor.executemany(sql, rows)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+def entries(count, start=0):
+    return [(f'site{i}.example', f'user{i}', f'token{i}'.encode(), None) for i in range(start, start + count)]
+
+
+def row_count(pm):
+    return pm.db.conn.execute('SELECT COUNT(*) FROM passwords').fetchone()[0]
+
+
+def all_ids(pm):
+    return [row[0] for row in pm.db.conn.execute('SELECT id FROM passwords ORDER BY id')]
+
+
+def record_events(pm):
+    events = []
+    pm.add_listener(lambda event, entry_id: events.append((event, entry_id)))
+    return events
+
+
+def test_add_passwords_chunks(password_manager):
+    cursor = password_manager.db.cursor = CountingCursor(password_manager.db.cursor)
+    assert password_manager.add_passwords(iter(entries(ROWS)), chunk_size=CHUNK_SIZE) == ROWS
+    assert cursor.executemany_calls == math.ceil(ROWS / CHUNK_SIZE)
+    assert row_count(password_manager) == ROWS
+
+
+def test_update_passwords_chunks(password_manager):
+    password_manager.add_passwords(entries(ROWS))
+    cursor = password_manager.db.cursor = CountingCursor(password_manager.db.cursor)
+    updates = ((entry_id, b'new') for entry_id in all_ids(password_manager))
+    assert password_manager.update_passwords(updates, chunk_size=CHUNK_SIZE) == ROWS
+    assert cursor.executemany_calls == math.ceil(ROWS / CHUNK_SIZE)
+    changed = password_manager.db.conn.execute(
+        "SELECT COUNT(*) FROM passwords WHERE encrypted_password = ?", (b'new',)).fetchone()[0]
+    assert changed == ROWS
+
+
+def test_delete_passwords_chunks(password_manager):
+    password_manager.add_passwords(entries(ROWS))
+    ids = all_ids(password_manager)
+    cursor = password_manager.db.cursor = CountingCursor(password_manager.db.cursor)
+    assert password_manager.delete_passwords(ids[:-1], chunk_size=CHUNK_SIZE) == ROWS - 1
+    assert cursor.executemany_calls == math.ceil((ROWS - 1) / CHUNK_SIZE)
+    assert all_ids(password_manager) == ids[-1:]
+
+
+def test_add_passwords_rolls_back_whole_batch(password_manager):
+    password_manager.add_passwords(entries(3))
+    events = record_events(password_manager)
+    batch = entries(ROWS, start=3)
+    # NOT NULL violation in the last chunk, after earlier chunks were already inserted
+    batch[-1] = (None, 'user', b'token', None)
+    assert password_manager.add_passwords(batch, chunk_size=CHUNK_SIZE) == 0
+    assert row_count(password_manager) == 3
+    assert events == []
+
+
+def test_update_passwords_rolls_back_whole_batch(password_manager):
+    password_manager.add_passwords(entries(ROWS))
+    events = record_events(password_manager)
+    updates = [(entry_id, b'new') for entry_id in all_ids(password_manager)]
+    updates[-1] = (updates[-1][0], None)
+    assert password_manager.update_passwords(updates, chunk_size=CHUNK_SIZE) == 0
+    changed = password_manager.db.conn.execute(
+        "SELECT COUNT(*) FROM passwords WHERE encrypted_password = ?", (b'new',)).fetchone()[0]
+    assert changed == 0
+    assert events == []
+
+
+def test_delete_passwords_rolls_back_whole_batch(password_manager):
+    password_manager.add_passwords(entries(ROWS))
+    events = record_events(password_manager)
+    ids = all_ids(password_manager)
+    # A value sqlite3 cannot bind fails the last chunk
+    assert password_manager.delete_passwords(ids[:-1] + [object()], chunk_size=CHUNK_SIZE) == 0
+    assert all_ids(password_manager) == ids
+    assert events == []
+
+
+def test_listeners_get_one_event_per_id(password_manager):
+    events = record_events(password_manager)
+    password_manager.add_passwords(entries(ROWS), chunk_size=CHUNK_SIZE)
+    ids = all_ids(password_manager)
+    assert events == [('add', entry_id) for entry_id in ids]
+
+    events.clear()
+    password_manager.update_passwords([(entry_id, b'new') for entry_id in ids], chunk_size=CHUNK_SIZE)
+    assert events == [('update', entry_id) for entry_id in ids]
+
+    events.clear()
+    password_manager.delete_passwords(ids, chunk_size=CHUNK_SIZE)
+    assert events == [('delete', entry_id) for entry_id in ids]
+
+
+def test_bulk_write_throughput(password_manager, profile, record_property):
+    """Rows per second for each connection profile; shown with pytest -s"""
+    started = time.perf_counter()
+    assert password_manager.add_passwords(entries(THROUGHPUT_ROWS)) == THROUGHPUT_ROWS
+    added = time.perf_counter()
+    ids = all_ids(password_manager)
+    assert password_manager.update_passwords((entry_id, b'new') for entry_id in ids) == THROUGHPUT_ROWS
+    updated = time.perf_counter()
+    assert password_manager.delete_passwords(ids) == THROUGHPUT_ROWS
+    deleted = time.perf_counter()
+
+    for operation, seconds in (('add', added - started), ('update', updated - added),
+                               ('delete', deleted - updated)):
+        rate = THROUGHPUT_ROWS / seconds
+        record_property(f'{operation}_rows_per_second', round(rate))
+        print(f"{profile:8}{operation:8}{rate:>12,.0f} rows/s")
@@ -0,0 +1,24 @@
+"""change_log: only user-visible edits move an entry to a new sequence number"""
+
+
+def logged(pm):
+    return dict(((website, username), seq) for seq, website, username in pm.db.conn.execute(
+        'SELECT seq, website, username FROM change_log'))
+
+
+def test_ciphertext_only_rewrites_are_not_logged(password_manager):
+    password_manager.add_passwords([('a.example', 'u', 'tok-a', None), ('b.example', 'u', 'tok-b', None)])
+    before = logged(password_manager)
+    password_manager.convert_ciphertexts(str.encode)
+    ids = [row[0] for row in password_manager.db.conn.execute('SELECT id FROM passwords ORDER BY id')]
+    password_manager.replace_encrypted([(b'rekeyed', entry_id) for entry_id in ids])
+    assert logged(password_manager) == before
+
+
+def test_user_edits_are_logged(password_manager):
+    password_manager.add_passwords([('a.example', 'u', b'tok-a', None), ('b.example', 'u', b'tok-b', None)])
+    before = logged(password_manager)
+    password_manager.update_password('a.example', b'new', 'u')
+    after = logged(password_manager)
+    assert after[('a.example', 'u')] > max(before.values())
+    assert after[('b.example', 'u')] == before[('b.example', 'u')]
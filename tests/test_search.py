@@ -0,0 +1,29 @@
+"""SearchIndex: typos in common names, background build"""
+from database.search import SearchIndex
+
+SITES = ('mail', 'shop', 'bank', 'news', 'travel')
+
+
+def fill(password_manager, rows=500):
+    password_manager.add_passwords((f'{SITES[i % len(SITES)]}{i}.example', f'user{i}', b'token', None)
+                                   for i in range(rows))
+
+
+def test_typo_in_common_name_still_matches(password_manager):
+    fill(password_manager)
+    index = SearchIndex(password_manager)
+    # Every trigram the query shares with 'travel' is common; the typo's own are in no entry
+    results = index.search('travle')
+    assert results
+    assert all(website.startswith('travel') for _, website, _, _ in results)
+
+
+def test_background_build_replays_changes(password_manager):
+    fill(password_manager)
+    index = SearchIndex(password_manager)
+    index.start_build()
+    password_manager.add_password('zebrafish.example', 'someone', b'token')
+    password_manager.delete_password('mail0.example', 'user0')
+    assert index.search('zebrafish')[0][1] == 'zebrafish.example'
+    assert not any(website == 'mail0.example' for _, website, _, _ in index.search('mail0'))
+    assert index.built
@@ -0,0 +1,32 @@
+"""StrengthEstimator on passwords longer than the analysed length"""
+import random
+import string
+
+from core.strength import MAX_ANALYSED_LENGTH, estimate
+
+
+def random_text(length, seed=1):
+    return ''.join(random.Random(seed).choices(string.ascii_letters + string.digits, k=length))
+
+
+def test_long_repeated_character_is_weak():
+    result = estimate('x' * 150)
+    assert result.score <= 1
+    assert result.guesses_log10 < 6
+
+
+def test_long_repeated_word_is_weak():
+    assert estimate('password' * 20 + '1').score <= 1
+    assert estimate('abc' * 60).score <= 1
+
+
+def test_long_password_that_repeats_its_first_piece_costs_little_more():
+    piece = random_text(MAX_ANALYSED_LENGTH)
+    once = estimate(piece).guesses_log10
+    assert estimate(piece + piece).guesses_log10 < once + 1
+
+
+def test_long_random_password_stays_strong():
+    result = estimate(random_text(3 * MAX_ANALYSED_LENGTH))
+    assert result.score == 4
+    assert result.guesses_log10 > estimate(random_text(MAX_ANALYSED_LENGTH)).guesses_log10